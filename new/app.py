@@ -1,6 +1,12 @@
 from flask import Flask, jsonify
 from flask_jwt_extended import JWTManager
 from config import Config
+from database import db_connection
+from models.search_model import SearchModel
+from models.recommendation_model import RecommendationModel
+from models import pet_popularity, view_events
+from models.smtp_pool import smtp_pool
+from models.sms_dispatcher import sms_dispatcher
 
 # Import your route blueprints
 from routes.auth_routes import auth_bp
@@ -11,6 +17,7 @@ from routes.main_routes import main_bp
 from routes.search_routes import search_bp
 from routes.adoption_routes import adoption_bp
 from routes.shelter_routes import shelter_bp
+from routes.analytics_routes import analytics_bp
 
 def create_app():
     app = Flask(__name__)
@@ -18,6 +25,9 @@ def create_app():
     # Load configuration
     app.config.from_object(Config)
     
+    # Return each request's pooled DB connection on teardown
+    db_connection.init_app(app)
+    
     # Initialize JWT with this app (MOVED INSIDE create_app)
     jwt = JWTManager(app)
     
@@ -62,6 +72,51 @@ def create_app():
             'DEBUG_MODE': app.debug
         })
     
+    # Debug route to size the DB connection pool under load
+    @app.route('/debug-db-pool', methods=['GET'])
+    def debug_db_pool():
+        """Debug route to check DB connection pool usage"""
+        return jsonify(db_connection.get_pool_stats())
+    
+    # Debug route to see statements slower than SLOW_QUERY_MS
+    @app.route('/debug-slow-queries', methods=['GET'])
+    def debug_slow_queries():
+        """Debug route to see recent slow SQL statements"""
+        return jsonify({
+            'threshold_ms': app.config.get('SLOW_QUERY_MS'),
+            'slow_queries': list(db_connection.slow_queries)
+        })
+    
+    # Debug route to tune the search caches
+    @app.route('/debug-search-cache', methods=['GET'])
+    def debug_search_cache():
+        """Debug route to see search cache hit/miss ratios"""
+        return jsonify(SearchModel.cache_stats())
+    
+    # Debug route to tune the per-user recommendation cache
+    @app.route('/debug-recommendation-cache', methods=['GET'])
+    def debug_recommendation_cache():
+        """Debug route to see recommendation cache hit ratio and stale drops"""
+        return jsonify(RecommendationModel.cache_stats())
+    
+    # Debug route to size the view event buffer
+    @app.route('/debug-view-events', methods=['GET'])
+    def debug_view_events():
+        """Debug route to see view ingestion counters (accepted, deduplicated, dropped, written)"""
+        return jsonify({'ingest': view_events.view_ingest.stats(), 'popularity': pet_popularity.view_counter.stats()})
+    
+    # Debug route for the pooled SMTP sessions (welcome emails and the in-app outbox worker send here)
+    @app.route('/debug-smtp-pool', methods=['GET'])
+    def debug_smtp_pool():
+        """Debug route to see SMTP session reuse, messages/second and per-message latency"""
+        return jsonify(smtp_pool.stats())
+    
+    # Debug route for the shared SMS dispatcher
+    @app.route('/debug-sms-dispatcher', methods=['GET'])
+    def debug_sms_dispatcher():
+        """Debug route to see SMS responses per status, retries, rate-limit waits and latency histograms"""
+        return jsonify(sms_dispatcher.stats())
+    
     # Register blueprints (route groups)
     try:
         app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -112,11 +167,49 @@ def create_app():
         print(f"❌ Error registering adoption_bp: {e}")
         print("❌ Make sure routes/adoption_routes.py exists and has adoption_bp defined")
 
+    try:
+        app.register_blueprint(analytics_bp, url_prefix='/api')
+        print("✅ analytics_bp registered successfully")
+    except Exception as e:
+        print(f"❌ Error registering analytics_bp: {e}")
+
+    # Build the in-memory search index up front when it is the selected engine
+    if app.config.get('SEARCH_ENGINE') == 'index':
+        try:
+            from models import search_index
+            with app.app_context():
+                search_index.ensure_built()
+        except Exception as e:
+            print(f"❌ Search index not built at startup (will retry on first search): {e}")
+
+    # Start loading the columnar pet catalog; searches use SQL until it is ready
+    try:
+        from models import pet_catalog
+        pet_catalog.get_catalog()
+    except Exception as e:
+        print(f"❌ Pet catalog not started: {e}")
+
+    # Development convenience: deliver queued notifications from this process
+    if app.config.get('NOTIFICATION_WORKER_IN_APP'):
+        try:
+            from models import notification_outbox
+            notification_outbox.start_in_app()
+            print("📬 Notification outbox worker running in-process")
+        except Exception as e:
+            print(f"❌ Notification outbox worker not started: {e}")
+
     print(f"\n🚀 Flask app created successfully!")
-    print(f"📊 Total blueprints registered: 7")
+    print(f"📊 Total blueprints registered: 9")
     print(f"🔧 Debug routes available:")
     print(f"   - GET /debug-routes (see all routes)")
     print(f"   - GET /debug-config (see JWT config)")
+    print(f"   - GET /debug-db-pool (see DB pool stats)")
+    print(f"   - GET /debug-slow-queries (see slow SQL)")
+    print(f"   - GET /debug-search-cache (see search cache hit ratios)")
+    print(f"   - GET /debug-recommendation-cache (see recommendation cache hit ratio)")
+    print(f"   - GET /debug-view-events (see view ingestion counters)")
+    print(f"   - GET /debug-smtp-pool (see SMTP session reuse and send latency)")
+    print(f"   - GET /debug-sms-dispatcher (see SMS status counters and latency histograms)")
     
     return app
 
@@ -12,6 +12,73 @@ class Config:
     DB_PASSWORD = os.environ.get('DB_PASSWORD') or "ifra@1234"
     DB_NAME = os.environ.get('DB_NAME') or "project"
     
+    # Connection pool (one pool per worker process)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 5)  # Seconds to wait for a free connection
+    DB_POOL_PRE_PING_SECONDS = float(os.environ.get('DB_POOL_PRE_PING_SECONDS') or 30)  # Ping connections idle longer than this
+    
+    # SQL instrumentation
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or 200)  # Statements slower than this are kept for analysis
+    SLOW_QUERY_LOG_SIZE = 500  # How many slow statements to remember per process
+    SQL_N_PLUS_ONE_THRESHOLD = 3  # Same statement shape this many times in one request is flagged
+    SQL_SUMMARY_HEADER = os.environ.get('SQL_SUMMARY_HEADER') == '1'  # Force the X-SQL-Summary header outside debug mode
+    
+    # Search
+    SEARCH_ENGINE = os.environ.get('SEARCH_ENGINE') or 'sql'  # 'sql' (LIKE predicates) or 'index' (in-memory inverted index)
+    SEARCH_INDEX_MAX_EXPANSIONS = 50  # Vocabulary terms a query prefix may expand to
+    SEARCH_INDEX_MAX_SQL_IDS = 1000  # Text matches sent to SQL as an id list; broader terms use word LIKEs instead
+    SEARCH_INDEX_REFRESH_SECONDS = 300  # Reload the search index, suggest trie and fuzzy vocabulary at least this often (other workers' writes)
+    SEARCH_SUGGEST_MAX_RESULTS = 10  # Hard cap on /api/search/suggest results (completions kept per trie node)
+    SEARCH_FUZZY_MIN_LENGTH = 4  # Shorter query words are never corrected (fuzzy=true)
+    SEARCH_FUZZY_MIN_SIMILARITY = 0.25  # Trigram overlap a correction candidate needs before edit distance is checked
+    SEARCH_DEFAULT_RADIUS_KM = 25  # near= without radius_km
+    SEARCH_MAX_RADIUS_KM = 500
+    GEOCODE_FILE = os.environ.get('GEOCODE_FILE') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'data', 'geocodes.csv')
+    GEO_INDEX_REFRESH_SECONDS = 300  # Reload shelter coordinates at least this often (picks up other workers' writes)
+    SEARCH_CATALOG_ENABLED = os.environ.get('SEARCH_CATALOG_ENABLED') != '0'  # Columnar in-memory filtering (needs NumPy)
+    SEARCH_CATALOG_MAX_AGE_SECONDS = 600  # Older snapshots are rebuilt in the background; SQL answers meanwhile
+    SEARCH_TRENDS_HALF_LIFE_HOURS = 24  # A search counts half as much a day later (changing it rescales stored scores)
+    SEARCH_TRENDS_FLUSH_SECONDS = 30  # How often each worker writes its counts to search_trends
+    SEARCH_TRENDS_MAX_PENDING = 10000  # Distinct queries held between flushes
+    SEARCH_TRENDS_MIN_SCORE = 0.01  # Rows decayed below this many searches are deleted
+    SEARCH_RESULT_CACHE_SIZE = int(os.environ.get('SEARCH_RESULT_CACHE_SIZE', 5000))  # Result pages remembered; 0 disables
+    SEARCH_RESULT_CACHE_TTL = int(os.environ.get('SEARCH_RESULT_CACHE_TTL', 30))  # Seconds; also bounds staleness across workers
+    SEARCH_COUNT_CACHE_SIZE = 2000  # Filter sets whose total count is remembered (count=cached)
+    SEARCH_COUNT_CACHE_TTL = 60  # Seconds
+    SEARCH_FACET_CACHE_SIZE = 1000  # Filter sets whose facet counts are remembered (facets=true)
+    SEARCH_FACET_CACHE_TTL = 120  # Seconds
+    RECOMMENDATION_CACHE_SIZE = int(os.environ.get('RECOMMENDATION_CACHE_SIZE', 10000))  # Users remembered; 0 disables
+    RECOMMENDATION_CACHE_TTL = int(os.environ.get('RECOMMENDATION_CACHE_TTL', 600))  # Seconds; bounds staleness across workers
+    RECOMMENDATION_CACHE_DEPTH = 24  # Pets cached per user, so dropping adopted ones still leaves a full dashboard
+    RECOMMENDATION_BATCH_DEPTH = 2 * RECOMMENDATION_CACHE_DEPTH  # Pets stored per user by the batch; the slack covers adoptions until the next run
+    RECOMMENDATION_BATCH_CHUNK_USERS = 1000  # User id range per batch task (manage.py recommend-batch)
+    RECOMMENDATION_BATCH_WORKERS = int(os.environ.get('RECOMMENDATION_BATCH_WORKERS', os.cpu_count() or 2))
+    RECOMMENDATION_PRECOMPUTED_MAX_AGE_HOURS = 24  # Older user_recommendations rows are ignored (new pets would be missing)
+    RECOMMENDATION_CF_ENABLED = os.environ.get('RECOMMENDATION_CF_ENABLED') != '0'  # Blend co-application similarity (needs NumPy)
+    RECOMMENDATION_CF_WEIGHT = 10  # Points per unit of summed breed/shelter similarity (a species match is 10 per application)
+    RECOMMENDATION_CF_NEIGHBORS = 50  # Similar items kept per breed/shelter; memory is items x this
+    RECOMMENDATION_CF_MAX_ITEMS_PER_USER = 50  # Items counted per adopter, so bulk appliers cannot blow up the pair count
+    RECOMMENDATION_CF_REBUILD_SECONDS = 6 * 3600  # Full rebuild interval; new applications are folded in meanwhile
+    RECOMMENDATION_CF_MAX_DELTA_PAIRS = 200000  # Incremental pairs tolerated before an early rebuild
+    PET_NEIGHBORS_K = 12  # Similar pets stored per pet (pet_neighbors); /similar?limit= is capped here
+    PET_NEIGHBORS_FAN_IN = 200  # Most similar pets checked for a place in their list when a pet is listed
+    PET_NEIGHBORS_DISTANCE_SCALE_KM = 50  # Shelter proximity falls to 1/e at this distance
+    PET_POPULARITY_HALF_LIFE_HOURS = 7 * 24  # An application counts half as much a week later (changing it rescales stored scores)
+    PET_POPULARITY_LISTING_WEIGHT = 1.0  # A new listing starts as if it had one application (must be > 0)
+    PET_POPULARITY_VIEW_WEIGHT = 0.05  # Twenty detail page views count as much as one application
+    PET_POPULARITY_FLUSH_SECONDS = 30  # How often each worker writes its view counts to pet_popularity
+    PET_POPULARITY_MAX_PENDING = 10000  # Distinct pets with unflushed views per worker
+    VIEW_EVENTS_BUFFER_SIZE = int(os.environ.get('VIEW_EVENTS_BUFFER_SIZE', 50000))  # Unwritten views held per worker; more are dropped
+    VIEW_EVENTS_BATCH_SIZE = 1000  # Views per INSERT batch; a full batch wakes the writer early
+    VIEW_EVENTS_FLUSH_SECONDS = 2  # Writer wakes at least this often
+    VIEW_EVENTS_DEDUPE_SECONDS = 1800  # Repeat views of a pet by the same viewer inside this window are ignored
+    VIEW_EVENTS_DEDUPE_MAX_KEYS = 200000  # (viewer, pet) pairs remembered per worker for deduplication
+    PET_REACH_FLUSH_SECONDS = 60  # How often each worker merges its visitor sketches into pet_reach_daily
+    PET_REACH_MAX_PENDING = 20000  # (pet, day) sketches held per worker between flushes
+    PET_REACH_RETENTION_DAYS = 400  # Older daily sketches are deleted
+    PET_REACH_DEFAULT_DAYS = 7  # /api/shelter/<id>/pet-reach without start/end, and the dashboard figure
+    PET_REACH_MAX_DAYS = 366  # Longest date range one request may merge
+
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your-super-secret-jwt-key-change-this-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
@@ -39,8 +106,36 @@ class Config:
     # EMAIL SETTINGS
     EMAIL_USER = os.environ.get('EMAIL_USER') or "ifrashaikh701@gmail.com"
     EMAIL_PASSWORD = os.environ.get('EMAIL_PASSWORD') or "lskk hhmw kmjg pjrj"
+    SMTP_SERVER = os.environ.get('SMTP_SERVER') or "smtp.gmail.com"
+    SMTP_PORT = int(os.environ.get('SMTP_PORT') or 587)
+    SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS') != '0'  # 0 for a local sink: no TLS, no login
+    SMTP_TIMEOUT = 10  # Seconds per SMTP connect/command
+    SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE') or 3)  # Logged-in sessions kept per process; 0 = one session per email
+    SMTP_POOL_TIMEOUT = 30  # Seconds to wait for a free session before the send fails
+    SMTP_NOOP_AFTER_SECONDS = 60  # Idle sessions are checked with NOOP before reuse
+    SMTP_MAX_MESSAGES_PER_SESSION = 100  # Then QUIT and reconnect (providers cap messages per connection)
+    SMTP_BATCH_SIZE = 20  # Outbox emails sent back to back over one session
+    SMTP_STATS_WINDOW = 1000  # Recent sends behind messages/second and latency figures
     
     # TWILIO SETTINGS
     TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID') or "ACea010f12673fb4f61dffc2a37aa8fa2c"
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN') or "9e5117ba8a14079a94f0bfcb30c9e799"
-    TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER') or "+918483803769"
\ No newline at end of file
+    TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER') or "+918483803769"
+    TWILIO_API_URL = os.environ.get('TWILIO_API_URL') or "https://api.twilio.com"  # A local sink for offline runs
+    SMS_TIMEOUT = 10  # Seconds per SMS API call
+    SMS_CONCURRENCY = int(os.environ.get('SMS_CONCURRENCY') or 8)  # SMS API requests in flight per process
+    SMS_RATE_PER_SECOND = float(os.environ.get('SMS_RATE_PER_SECOND') or 10)  # Our provider sending limit
+    SMS_RATE_BURST = 10  # Requests allowed back to back before the rate applies
+    SMS_MAX_ATTEMPTS = 3  # Per send, for 429/5xx/connection errors; the outbox retries later on top
+    SMS_RETRY_BASE_SECONDS = 0.5  # Jittered, doubling per attempt
+    SMS_RETRY_MAX_SECONDS = 8
+    
+    # NOTIFICATION OUTBOX (models/notification_outbox.py)
+    NOTIFICATION_WORKERS = int(os.environ.get('NOTIFICATION_WORKERS') or 4)  # Sender threads per outbox worker
+    NOTIFICATION_BATCH_SIZE = 50  # Rows claimed per round
+    NOTIFICATION_POLL_SECONDS = 2  # Idle wait when nothing is due
+    NOTIFICATION_LEASE_SECONDS = 120  # A claimed row is handed to another worker if not finished by then
+    NOTIFICATION_MAX_ATTEMPTS = 6  # Then the row is dead-lettered
+    NOTIFICATION_RETRY_BASE_SECONDS = 30  # First retry delay; doubles per attempt (30s, 1m, 2m, 4m, 8m)
+    NOTIFICATION_RETRY_MAX_SECONDS = 3600
+    NOTIFICATION_WORKER_IN_APP = os.environ.get('NOTIFICATION_WORKER_IN_APP') == '1'  # Drain from the web process (dev)
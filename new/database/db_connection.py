@@ -1,11 +1,429 @@
+import os
+import re
+import time
+import threading
+from collections import deque, Counter
+from contextlib import contextmanager
+from datetime import datetime
+
 import mysql.connector
+from flask import g, current_app, has_app_context, has_request_context, request
 from config import Config
 
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of MySQL connections
+    What this does: Keeps authenticated connections open and hands them out on demand
+    Why: Opening a new TCP + auth handshake for every model call is the slowest part of a request
+    """
+
+    def __init__(self, size, timeout, pre_ping_seconds, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.pre_ping_seconds = pre_ping_seconds
+        self.connect_args = connect_args
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (connection, returned_at)
+        self._created = 0
+        self._in_use = 0
+
+        # Counters for sizing the pool under load
+        self._checkouts = 0
+        self._checkout_failures = 0
+        self._reconnects = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _new_connection(self):
+        return mysql.connector.connect(**self.connect_args)
+
+    def checkout(self):
+        """Borrow a connection, waiting up to `timeout` seconds for one to be returned"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        connection = None
+        returned_at = None
+
+        with self._lock:
+            while True:
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._checkout_failures += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout}s "
+                        f"(pool size {self.size})"
+                    )
+                self._lock.wait(remaining)
+            self._in_use += 1
+
+        try:
+            if connection is None:
+                connection = self._new_connection()
+            elif time.monotonic() - returned_at > self.pre_ping_seconds:
+                connection = self._pre_ping(connection)
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._created -= 1
+                self._checkout_failures += 1
+                self._lock.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return connection
+
+    def _pre_ping(self, connection):
+        """Make sure a connection that sat idle is still alive, replacing it if not"""
+        try:
+            connection.ping(reconnect=False)
+            return connection
+        except mysql.connector.Error:
+            try:
+                connection.close()
+            except Exception:
+                pass
+            with self._lock:
+                self._reconnects += 1
+            return self._new_connection()
+
+    def checkin(self, connection, discard=False):
+        """Return a borrowed connection; broken connections are dropped instead of reused"""
+        if not discard:
+            try:
+                discard = not connection.is_connected()
+            except Exception:
+                discard = True
+
+        with self._lock:
+            self._in_use -= 1
+            if discard:
+                self._created -= 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._lock.notify()
+
+        if discard:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """Snapshot of pool usage"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'created': self._created,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'checkout_failures': self._checkout_failures,
+                'reconnects': self._reconnects,
+                'avg_wait_ms': round(self._total_wait * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                'max_wait_ms': round(self._max_wait * 1000, 3),
+            }
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Slow statements seen by this process, newest last
+slow_queries = deque(maxlen=Config.SLOW_QUERY_LOG_SIZE)
+
+# Per-thread list of (statement, params) while capture_statements() is active
+_capture = threading.local()
+
+
+@contextmanager
+def capture_statements():
+    """
+    Collect the exact statements and parameters executed on this thread
+    What this does: Yields a list that every execute() appends (statement, params) to until the block ends
+    Why: explain-check EXPLAINs the SQL the models really run, not a hand-copied version of it
+    """
+    statements = []
+    previous = getattr(_capture, 'statements', None)
+    _capture.statements = statements
+    try:
+        yield statements
+    finally:
+        _capture.statements = previous
+
+
+def normalize_sql(statement):
+    """
+    Reduce a statement to its shape
+    What this does: Replaces literals and placeholders with ? and collapses whitespace
+    Why: Two lookups that only differ by id are the same query for N+1 detection
+    """
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode('utf-8', 'replace')
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = shape.replace('%s', '?')
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(?...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def _params_shape(params):
+    """Types of the bound parameters, never their values"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def _record_statement(statement, params, duration, rows):
+    shape = normalize_sql(statement)
+    duration_ms = duration * 1000
+
+    if has_app_context():
+        log = g.get('_sql_log')
+        if log is None:
+            log = g._sql_log = []
+        log.append({'statement': shape, 'duration_ms': duration_ms, 'rows': rows})
+
+    if duration_ms >= Config.SLOW_QUERY_MS:
+        slow_queries.append({
+            'statement': shape,
+            'sql': statement if isinstance(statement, str) else shape,
+            'params_shape': _params_shape(params),
+            'duration_ms': round(duration_ms, 3),
+            'rows': rows,
+            'path': request.path if has_request_context() else None,
+            'at': datetime.now().isoformat()
+        })
+
+
+class InstrumentedCursor:
+    """
+    Cursor wrapper that times every statement
+    What this does: Records normalized text, duration and row count of each execute
+    Why: We had no idea how many queries a page actually costs
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        captured = getattr(_capture, 'statements', None)
+        if captured is not None:
+            captured.append((operation, params))
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            _record_statement(operation, params, time.perf_counter() - started, self._cursor.rowcount)
+
+    def executemany(self, operation, seq_params):
+        seq_params = list(seq_params)
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params)
+        finally:
+            _record_statement(operation, seq_params[0] if seq_params else None,
+                              time.perf_counter() - started, self._cursor.rowcount)
+
+
+def get_request_sql_summary():
+    """
+    Per-request query totals
+    What this does: Counts statements, total time and repeated statement shapes
+    Why: Repeated identical shapes in one request are almost always an N+1 loop
+    """
+    log = g.get('_sql_log') or []
+    shapes = Counter(entry['statement'] for entry in log)
+    repeated = [
+        {'statement': shape, 'count': count}
+        for shape, count in shapes.most_common()
+        if count >= Config.SQL_N_PLUS_ONE_THRESHOLD
+    ]
+    return {
+        'queries': len(log),
+        'total_ms': round(sum(entry['duration_ms'] for entry in log), 3),
+        'rows': sum(max(entry['rows'] or 0, 0) for entry in log),
+        'repeated': repeated
+    }
+
+
+def attach_sql_summary(response):
+    """After-request hook: header in debug mode, one log line otherwise"""
+    if not g.get('_sql_log'):
+        return response
+
+    summary = get_request_sql_summary()
+    if Config.SQL_SUMMARY_HEADER or current_app.debug:
+        response.headers['X-SQL-Summary'] = (
+            f"queries={summary['queries']}; time_ms={summary['total_ms']}; "
+            f"rows={summary['rows']}; repeated={len(summary['repeated'])}"
+        )
+    else:
+        print(f"[sql] {request.method} {request.path} queries={summary['queries']} "
+              f"time={summary['total_ms']}ms rows={summary['rows']}")
+
+    for entry in summary['repeated']:
+        print(f"[sql] possible N+1 on {request.path}: {entry['count']}x {entry['statement'][:200]}")
+    return response
+
+
+class PooledConnection:
+    """
+    Connection handle given to model code
+    What this does: Behaves like a mysql.connector connection, but close() gives it back to the pool
+    Why: Models keep calling conn.close() exactly as before while the socket stays open
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+        self._cursors = []
+        self._leases = 0
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        # Buffered by default so a half-read cursor never blocks the next query on a shared connection
+        kwargs.setdefault('buffered', True)
+        cursor = self._connection.cursor(*args, **kwargs)
+        self._cursors.append(cursor)
+        return InstrumentedCursor(cursor)
+
+    def reset(self):
+        """Close leftover cursors and discard uncommitted work, like closing a fresh connection would"""
+        for cursor in self._cursors:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        self._cursors = []
+        if self._connection.in_transaction:
+            self._connection.rollback()
+
+    def release(self):
+        """Hand the underlying connection back to the pool"""
+        if self._released:
+            return
+        self._released = True
+        try:
+            self.reset()
+            self._pool.checkin(self._connection)
+        except Exception:
+            self._pool.checkin(self._connection, discard=True)
+
+    def close(self):
+        self.release()
+
+
+class RequestConnectionLease:
+    """
+    A model's view of the request-wide connection
+    What this does: Lets several model calls in one request share a single pooled connection
+    Why: A dashboard hit used to open one connection per model call
+    """
+
+    def __init__(self, handle):
+        self._handle = handle
+        self._closed = False
+        handle._leases += 1
+
+    def __getattr__(self, name):
+        return getattr(self._handle, name)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._handle._leases -= 1
+        # Only the outermost model call cleans up, so a nested lookup never rolls back its caller
+        if self._handle._leases == 0:
+            try:
+                self._handle.reset()
+            except mysql.connector.Error as e:
+                print(f"Error resetting request connection: {e}")
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool, recreated after a fork so workers never share sockets"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(
+                    size=Config.DB_POOL_SIZE,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    pre_ping_seconds=Config.DB_POOL_PRE_PING_SECONDS,
+                    host=Config.DB_HOST,
+                    user=Config.DB_USER,
+                    password=Config.DB_PASSWORD,
+                    database=Config.DB_NAME
+                )
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def get_pool_stats():
+    """Pool usage numbers for the debug endpoint"""
+    return get_pool().stats()
+
+
+def get_db():
+    """Connection bound to the current request (flask.g), checked out on first use"""
+    handle = g.get('_db_connection')
+    if handle is None:
+        pool = get_pool()
+        handle = PooledConnection(pool, pool.checkout())
+        g._db_connection = handle
+    return handle
+
+
+def close_db(exception=None):
+    """Teardown hook: return the request's connection to the pool"""
+    handle = g.pop('_db_connection', None)
+    if handle is not None:
+        handle.release()
+
+
+def init_app(app):
+    """Register the request-scoped connection teardown and SQL summary with the Flask app"""
+    app.after_request(attach_sql_summary)
+    app.teardown_appcontext(close_db)
+
+
 def connect_to_database():
     """Function to establish database connection"""
-    return mysql.connector.connect(
-        host=Config.DB_HOST,
-        user=Config.DB_USER,
-        password=Config.DB_PASSWORD,
-        database=Config.DB_NAME
-    )
\ No newline at end of file
+    if has_app_context():
+        return RequestConnectionLease(get_db())
+    pool = get_pool()
+    return PooledConnection(pool, pool.checkout())
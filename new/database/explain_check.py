@@ -0,0 +1,261 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from config import Config
+from database.db_connection import capture_statements, connect_to_database, normalize_sql
+from models import notification_outbox, pet_popularity
+from models.adopter_model import AdopterModel
+from models.adoption_model import AdoptionModel
+from models.auth_model import AuthModel
+from models.medical_model import MedicalModel
+from models.pet_model import PetModel
+from models.pet_status import PetStatus
+from models.recommendation_model import RecommendationModel
+from models.search_model import SearchModel
+from models.shelter_model import ShelterModel
+
+# Tables smaller than this are allowed to be scanned; the optimizer prefers it anyway
+MIN_SCAN_ROWS = 50
+
+
+@contextmanager
+def _settings(**overrides):
+    """Temporarily override Config values, with the search caches emptied so every path reaches SQL"""
+    saved = {name: getattr(Config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(Config, name, value)
+    for cache in (SearchModel._result_cache, SearchModel._count_cache, SearchModel._facet_cache):
+        cache.clear()
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(Config, name, value)
+
+
+def _sql_search(filters, engine='like'):
+    """search_pets on its SQL path (no catalog, no result cache), following the cursor to a second page"""
+    with _settings(SEARCH_ENGINE=engine, SEARCH_CATALOG_ENABLED=False, SEARCH_RESULT_CACHE_SIZE=0):
+        first = SearchModel.search_pets(dict(filters, limit=5))
+        if first.get('next_cursor'):
+            SearchModel.search_pets(dict(filters, limit=5, cursor=first['next_cursor']))
+
+
+def _sql_facets(filters):
+    with _settings(SEARCH_CATALOG_ENABLED=False):
+        SearchModel.get_facet_counts(filters)
+
+
+def _sql_recommendations(user_id):
+    with _settings(SEARCH_CATALOG_ENABLED=False):
+        RecommendationModel.compute_recommendations(user_id, Config.RECOMMENDATION_CACHE_DEPTH)
+
+
+def _with_cursor(read):
+    conn = connect_to_database()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        read(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _claim_due(cursor):
+    now = datetime.now()
+    cursor.execute(notification_outbox.CLAIM_DUE, (now, now, Config.NOTIFICATION_BATCH_SIZE))
+    cursor.fetchall()
+
+
+# Hot read paths, run through the model code itself with statement capture on: every SELECT they
+# issue is EXPLAINed with the exact text and parameters it ran with, so the check follows the SQL
+# as the models change. Each entry is (name, callable taking the sample values).
+HOT_PATHS = [
+    ('ShelterModel.get_shelter_pets', lambda s: ShelterModel.get_shelter_pets(s['shelter_id'])),
+    ('ShelterModel.get_shelter_statistics', lambda s: ShelterModel.get_shelter_statistics(s['shelter_id'])),
+    ('ShelterModel.get_shelter_by_user_id', lambda s: ShelterModel.get_shelter_by_user_id(s['user_id'])),
+    ('PetModel.get_pets_by_category', lambda s: PetModel.get_pets_by_category(s['category'])),
+    ('PetModel.get_pets_by_user_role (adopter)', lambda s: PetModel.get_pets_by_user_role(s['user_id'], 'adopter')),
+    ('PetModel.get_similar_pets', lambda s: PetModel.get_similar_pets(s['pet_id'])),
+    ('SearchModel.search_pets (category, keyset pages)', lambda s: _sql_search({'category': s['category']})),
+    ('SearchModel.search_pets (age range, by age)',
+     lambda s: _sql_search({'min_age': 1, 'max_age': 5, 'sort_by': 'age', 'sort_order': 'DESC'})),
+    ('SearchModel.search_pets (text, like engine)', lambda s: _sql_search({'search_text': s['breed']})),
+    ('SearchModel.search_pets (text, index engine)',
+     lambda s: _sql_search({'search_text': s['breed'], 'category': s['category'], 'sort_by': 'relevance'}, engine='index')),
+    ('SearchModel.get_facet_counts', lambda s: _sql_facets({'category': s['category']})),
+    ('SearchModel._fetch_pets (catalog page)', lambda s: SearchModel._fetch_pets(s['pet_ids'])),
+    ('RecommendationModel.get_user_preferences', lambda s: RecommendationModel.get_user_preferences(s['applicant_id'])),
+    ('RecommendationModel.compute_recommendations (personalized)', lambda s: _sql_recommendations(s['applicant_id'])),
+    ('RecommendationModel.compute_recommendations (popular)', lambda s: _sql_recommendations(0)),
+    ('RecommendationModel._fetch_ranked',
+     lambda s: _with_cursor(lambda cursor: RecommendationModel._fetch_ranked(cursor, [(pet_id, 1.0) for pet_id in s['pet_ids']]))),
+    ('RecommendationModel._drop_unavailable (cached lists)',
+     lambda s: RecommendationModel._drop_unavailable([{'pet_id': pet_id} for pet_id in s['pet_ids']])),
+    ('AdoptionModel.get_adoption_statistics', lambda s: AdoptionModel.get_adoption_statistics()),
+    ('AdoptionModel.get_applications_by_status', lambda s: AdoptionModel.get_applications_by_status('pending')),
+    ('AdoptionModel.get_user_applications', lambda s: AdoptionModel.get_user_applications(s['applicant_id'])),
+    ('AuthModel.get_user_by_email', lambda s: AuthModel.get_user_by_email(s['email'])),
+    ('AuthModel.get_users_by_status', lambda s: AuthModel.get_users_by_status('pending')),
+    ('MedicalModel.get_medical_records', lambda s: MedicalModel.get_medical_records(s['pet_id'])),
+    ('AdopterModel.get_adopter_by_user_id', lambda s: AdopterModel.get_adopter_by_user_id(s['adopter_user_id'])),
+    ('OutboxWorker.claim', lambda s: _with_cursor(_claim_due)),
+]
+
+SPECIES_BREEDS = {
+    'Dog': ['Labrador', 'German Shepherd', 'Beagle', 'Pug', 'Indie'],
+    'Cat': ['Persian', 'Siamese', 'Indie'],
+    'Bird': ['Parrot', 'Cockatiel'],
+    'Rabbit': ['Lionhead', 'Dutch'],
+}
+
+
+def seed_dataset(pets=5000, shelters=50, users=2000, applications=8000):
+    """
+    Fill a scratch database with synthetic rows
+    What this does: Inserts enough shelters, users, pets and applications for EXPLAIN to be meaningful
+    Why: On a near-empty table MySQL scans regardless of indexes, which hides missing ones
+    """
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    rng = random.Random(42)
+    now = datetime.now()
+
+    try:
+        cursor.executemany('''
+            INSERT INTO shelter (shelter_name, location, contact_person, contact_phone, email)
+            VALUES (%s, %s, %s, %s, %s)
+        ''', [(f'Seed Shelter {i}', f'City {i % 20}', 'Seed Contact', '0000000000', f'shelter{i}@seed.test')
+              for i in range(shelters)])
+        cursor.execute('SELECT MIN(shelter_id), MAX(shelter_id) FROM shelter')
+        min_shelter, max_shelter = cursor.fetchone()
+
+        cursor.executemany('''
+            INSERT INTO users (email, password_hash, role, first_name, last_name, created_at, is_active, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ''', [(f'seed{i}@seed.test', 'x', 'adopter', 'Seed', str(i), now - timedelta(days=i % 365), True,
+               'pending' if i % 50 == 0 else 'active') for i in range(users)])
+        cursor.execute('SELECT MIN(id), MAX(id) FROM users')
+        min_user, max_user = cursor.fetchone()
+
+        pet_rows = []
+        for i in range(pets):
+            species = rng.choice(list(SPECIES_BREEDS))
+            state = PetStatus.ADOPTED if rng.random() < 0.3 else PetStatus.AVAILABLE
+            pet_rows.append((
+                species.lower(), f'Seed Pet {i}', species, rng.choice(['Male', 'Female']),
+                rng.randint(0, 15), rng.choice(SPECIES_BREEDS[species]), '',
+                rng.randint(min_shelter, max_shelter), PetStatus.label(state), state
+            ))
+        cursor.executemany('''
+            INSERT INTO pets (category, name, species, gender, age, breed, image, shelter_id, adoption_status, adoption_state)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ''', pet_rows)
+        cursor.execute('SELECT MIN(pet_id), MAX(pet_id) FROM pets')
+        min_pet, max_pet = cursor.fetchone()
+
+        application_rows = []
+        for i in range(applications):
+            status = rng.choice(['pending', 'approved', 'rejected'])
+            applied = now - timedelta(days=rng.randint(0, 365))
+            application_rows.append((
+                rng.randint(min_user, max_user), rng.randint(min_pet, max_pet), 'Seed Applicant',
+                'seed@seed.test', '0000000000', 'Seed Street', status, applied, applied,
+                None if status == 'pending' else applied + timedelta(days=2)
+            ))
+        cursor.executemany('''
+            INSERT INTO adoption_applications
+            (user_id, pet_id, applicant_name, email, phone, address, status, application_date, created_at, reviewed_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ''', application_rows)
+
+        conn.commit()
+
+        for pet_id in range(min_pet, max_pet + 1, 5):
+            cursor.execute('CALL update_medical_records(%s, %s, %s, %s, %s, %s)',
+                           (pet_id, now.date(), 'Rabies', 'Healthy', 'Dr. Seed', '0000000000'))
+        cursor.execute(MedicalModel.SUMMARY_REFRESH_QUERY, (min_pet, max_pet))
+        cursor.execute(pet_popularity.RECONCILE, pet_popularity._params(first=min_pet, last=max_pet))
+        conn.commit()
+
+        for table in ('shelter', 'users', 'pets', 'adoption_applications', 'medical_records', 'pet_medical_summary', 'pet_popularity', 'adopters'):
+            cursor.execute(f'ANALYZE TABLE {table}')
+            cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _sample_values(cursor):
+    cursor.execute('SELECT shelter_id FROM shelter ORDER BY shelter_id LIMIT 1')
+    shelter = cursor.fetchone()
+    cursor.execute('SELECT id, email FROM users ORDER BY id LIMIT 1')
+    user = cursor.fetchone()
+    cursor.execute('SELECT pet_id, category, breed FROM pets WHERE adoption_state = %s ORDER BY pet_id LIMIT 20',
+                   (PetStatus.AVAILABLE,))
+    pets = cursor.fetchall()
+    cursor.execute("SELECT user_id FROM adoption_applications WHERE status IN ('pending', 'approved') LIMIT 1")
+    applicant = cursor.fetchone()
+    cursor.execute('SELECT user_id FROM adopters WHERE user_id IS NOT NULL LIMIT 1')
+    adopter = cursor.fetchone()
+    pet = pets[0] if pets else {}
+    return {
+        'shelter_id': shelter['shelter_id'] if shelter else 0,
+        'user_id': user['id'] if user else 0,
+        'email': user['email'] if user else '',
+        'pet_id': pet.get('pet_id', 0),
+        'pet_ids': [row['pet_id'] for row in pets] or [0],
+        'category': pet.get('category') or '',
+        'breed': pet.get('breed') or 'dog',
+        'applicant_id': applicant['user_id'] if applicant else 0,
+        'adopter_user_id': adopter['user_id'] if adopter else 0,
+    }
+
+
+def _captured_selects(samples):
+    """Run every hot path; [(path name, statement, params)] for each distinct SELECT shape it issued"""
+    selects = []
+    for name, run in HOT_PATHS:
+        with capture_statements() as statements:
+            run(samples)
+        seen = set()
+        for statement, params in statements:
+            shape = normalize_sql(statement)
+            if shape.upper().startswith('SELECT') and shape not in seen:
+                seen.add(shape)
+                selects.append((name, statement, params))
+    return selects
+
+
+def check_queries():
+    """
+    EXPLAIN every SELECT the hot paths run and collect full table scans
+    Returns (problems, statements checked); problems is a list of {'query', 'table', 'rows', 'sql'},
+    empty when every statement uses an index
+    """
+    conn = connect_to_database()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        samples = _sample_values(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+    selects = _captured_selects(samples)
+    conn = connect_to_database()
+    cursor = conn.cursor(dictionary=True)
+    problems = []
+    try:
+        for name, statement, params in selects:
+            cursor.execute('EXPLAIN ' + statement, params)
+            for row in cursor.fetchall():
+                table = row.get('table') or ''
+                # Derived and subquery tables (<derived2>, <subquery3>) are not real scans
+                if row.get('type') == 'ALL' and not table.startswith('<') and (row.get('rows') or 0) >= MIN_SCAN_ROWS:
+                    problems.append({'query': name, 'table': table, 'rows': row.get('rows'),
+                                     'sql': normalize_sql(statement)})
+        return problems, len(selects)
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,179 @@
+import os
+import re
+import importlib.util
+from datetime import datetime
+
+from database.db_connection import connect_to_database
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.(up|down)\.sql$')
+PYTHON_MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+
+class MigrationError(Exception):
+    """Raised when migration files are inconsistent or a target version is unknown"""
+
+
+def discover_migrations():
+    """
+    Find migration files on disk
+    What this does: Pairs NNNN_name.up.sql with NNNN_name.down.sql, ordered by version
+    Why: The version number in the file name is the only ordering we rely on
+
+    Data migrations that need batching are NNNN_name.py files defining up(cursor, conn)
+    and down(cursor, conn) instead of the two SQL files.
+    """
+    migrations = {}
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        path = os.path.join(MIGRATIONS_DIR, filename)
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            version, name, directions = int(match.group(1)), match.group(2), [match.group(3)]
+        else:
+            match = PYTHON_MIGRATION_FILE.match(filename)
+            if not match:
+                continue
+            version, name, directions = int(match.group(1)), match.group(2), ['up', 'down']
+
+        migration = migrations.setdefault(version, {'version': version, 'name': name})
+        if migration['name'] != name:
+            raise MigrationError(f"Two different migrations share version {version:04d}")
+        for direction in directions:
+            if direction in migration:
+                raise MigrationError(f"Migration {version:04d} has both SQL and Python {direction} steps")
+            migration[direction] = path
+
+    for migration in migrations.values():
+        if 'up' not in migration:
+            raise MigrationError(f"Migration {migration['version']:04d} has no up step")
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(sql):
+    """Split a DDL file into statements; each statement ends with ';' at the end of a line"""
+    statements = []
+    current = []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('--'):
+            continue
+        current.append(line)
+        if stripped.endswith(';'):
+            statements.append('\n'.join(current).rstrip().rstrip(';'))
+            current = []
+    if current:
+        statements.append('\n'.join(current))
+    return statements
+
+
+def ensure_version_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT NOT NULL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    ''')
+
+
+def applied_versions(cursor):
+    cursor.execute('SELECT version FROM schema_version ORDER BY version')
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _run_file(cursor, conn, path, direction):
+    if path.endswith('.py'):
+        spec = importlib.util.spec_from_file_location(f'migration_{os.path.basename(path)[:-3]}', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        getattr(module, direction)(cursor, conn)
+        return
+
+    with open(path) as f:
+        for statement in split_statements(f.read()):
+            cursor.execute(statement)
+
+
+def upgrade(target=None):
+    """
+    Apply pending migrations up to `target` (default: latest)
+    Returns the list of versions applied
+    """
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    applied_now = []
+    try:
+        ensure_version_table(cursor)
+        done = set(applied_versions(cursor))
+
+        for migration in discover_migrations():
+            version = migration['version']
+            if version in done:
+                continue
+            if target is not None and version > target:
+                break
+
+            print(f"Applying {version:04d}_{migration['name']} ...")
+            # MySQL DDL commits implicitly, so a migration is recorded only after all its statements succeed
+            _run_file(cursor, conn, migration['up'], 'up')
+            cursor.execute(
+                'INSERT INTO schema_version (version, name, applied_at) VALUES (%s, %s, %s)',
+                (version, migration['name'], datetime.now())
+            )
+            conn.commit()
+            applied_now.append(version)
+        return applied_now
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def downgrade(target=None, steps=1):
+    """
+    Revert migrations down to (but not including) `target`, or the last `steps` migrations
+    Returns the list of versions reverted
+    """
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    reverted = []
+    try:
+        ensure_version_table(cursor)
+        migrations = {m['version']: m for m in discover_migrations()}
+        done = applied_versions(cursor)
+
+        if target is not None:
+            to_revert = [v for v in reversed(done) if v > target]
+        else:
+            to_revert = list(reversed(done))[:steps]
+
+        for version in to_revert:
+            migration = migrations.get(version)
+            if not migration or 'down' not in migration:
+                raise MigrationError(f"Migration {version:04d} cannot be reverted (no down step)")
+
+            print(f"Reverting {version:04d}_{migration['name']} ...")
+            _run_file(cursor, conn, migration['down'], 'down')
+            cursor.execute('DELETE FROM schema_version WHERE version = %s', (version,))
+            conn.commit()
+            reverted.append(version)
+        return reverted
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def status():
+    """List every known migration with whether it has been applied"""
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    try:
+        ensure_version_table(cursor)
+        conn.commit()
+        done = set(applied_versions(cursor))
+        return [
+            {'version': m['version'], 'name': m['name'], 'applied': m['version'] in done}
+            for m in discover_migrations()
+        ]
+    finally:
+        cursor.close()
+        conn.close()
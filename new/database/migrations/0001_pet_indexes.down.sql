@@ -0,0 +1,5 @@
+DROP INDEX idx_pets_status_created ON pets;
+DROP INDEX idx_pets_category ON pets;
+DROP INDEX idx_pets_status_category ON pets;
+DROP INDEX idx_pets_shelter_status ON pets;
+DROP INDEX idx_pets_status_shelter ON pets;
@@ -0,0 +1,4 @@
+DROP INDEX idx_applications_pet ON adoption_applications;
+DROP INDEX idx_applications_status_date ON adoption_applications;
+DROP INDEX idx_applications_status_reviewed ON adoption_applications;
+DROP INDEX idx_applications_user_status ON adoption_applications;
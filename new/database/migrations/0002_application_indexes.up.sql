@@ -0,0 +1,5 @@
+-- adoption_applications: a user's open applications, review queues and 30-day statistics
+CREATE INDEX idx_applications_user_status ON adoption_applications (user_id, status);
+CREATE INDEX idx_applications_status_reviewed ON adoption_applications (status, reviewed_at);
+CREATE INDEX idx_applications_status_date ON adoption_applications (status, application_date);
+CREATE INDEX idx_applications_pet ON adoption_applications (pet_id);
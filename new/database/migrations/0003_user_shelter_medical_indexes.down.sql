@@ -0,0 +1,5 @@
+DROP INDEX idx_adopters_user ON adopters;
+DROP INDEX idx_medical_records_pet ON medical_records;
+DROP INDEX idx_shelter_manager ON shelter;
+DROP INDEX idx_users_status_created ON users;
+DROP INDEX idx_users_email ON users;
@@ -0,0 +1,6 @@
+-- Login lookups, the pending-user queue, shelter manager lookups and per-pet medical records
+CREATE INDEX idx_users_email ON users (email);
+CREATE INDEX idx_users_status_created ON users (status, created_at);
+CREATE INDEX idx_shelter_manager ON shelter (manager_user_id);
+CREATE INDEX idx_medical_records_pet ON medical_records (pet_id);
+CREATE INDEX idx_adopters_user ON adopters (user_id);
@@ -0,0 +1,78 @@
+"""
+Compact, indexed adoption status for pets
+
+Adds pets.adoption_state (TINYINT, see models/pet_status.py), backfills it from the
+free-text adoption_status column in small primary-key batches so the table is never
+locked for long, normalizes the legacy labels on the way, and indexes the new column.
+"""
+import time
+
+BATCH_SIZE = 1000
+BATCH_PAUSE_SECONDS = 0.05
+
+# Rows not yet backfilled carry this value; nothing in the app ever writes it
+UNSET = 255
+
+
+def up(cursor, conn):
+    # Instant on MySQL 8; the default keeps unconverted rows out of "available" queries
+    cursor.execute(f'''
+        ALTER TABLE pets
+        ADD COLUMN adoption_state TINYINT UNSIGNED NOT NULL DEFAULT {UNSET}
+    ''')
+    conn.commit()
+
+    backfill(cursor, conn)
+
+    cursor.execute('ALTER TABLE pets ALTER COLUMN adoption_state SET DEFAULT 0')
+    conn.commit()
+
+    # Rows inserted by old code while the backfill ran
+    backfill(cursor, conn)
+
+    for name, columns in (
+        ('idx_pets_state_shelter', 'adoption_state, shelter_id'),
+        ('idx_pets_shelter_state', 'shelter_id, adoption_state'),
+        ('idx_pets_state_category', 'adoption_state, category'),
+        ('idx_pets_state_created', 'adoption_state, created_at'),
+    ):
+        cursor.execute(f'CREATE INDEX {name} ON pets ({columns}) ALGORITHM=INPLACE LOCK=NONE')
+    conn.commit()
+
+
+def backfill(cursor, conn):
+    """Convert rows still marked UNSET, one primary-key range per transaction"""
+    cursor.execute('SELECT MIN(pet_id), MAX(pet_id) FROM pets')
+    low, high = cursor.fetchone()
+    if low is None:
+        return
+
+    converted = 0
+    start = low
+    while start <= high:
+        end = start + BATCH_SIZE - 1
+        cursor.execute(f'''
+            UPDATE pets
+            SET adoption_state = CASE
+                    WHEN LOWER(REPLACE(adoption_status, ' ', '')) = 'adopted' THEN 1
+                    ELSE 0
+                END,
+                adoption_status = CASE
+                    WHEN LOWER(REPLACE(adoption_status, ' ', '')) = 'adopted' THEN 'Adopted'
+                    ELSE 'Not Adopted'
+                END
+            WHERE pet_id BETWEEN %s AND %s AND adoption_state = {UNSET}
+        ''', (start, end))
+        converted += cursor.rowcount
+        conn.commit()
+        start = end + 1
+        time.sleep(BATCH_PAUSE_SECONDS)
+
+    print(f"  backfilled {converted} pet(s)")
+
+
+def down(cursor, conn):
+    for name in ('idx_pets_state_created', 'idx_pets_state_category', 'idx_pets_shelter_state', 'idx_pets_state_shelter'):
+        cursor.execute(f'DROP INDEX {name} ON pets')
+    cursor.execute('ALTER TABLE pets DROP COLUMN adoption_state')
+    conn.commit()
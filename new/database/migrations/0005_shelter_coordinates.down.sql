@@ -0,0 +1,3 @@
+ALTER TABLE shelter
+    DROP COLUMN longitude,
+    DROP COLUMN latitude;
@@ -0,0 +1,4 @@
+-- Shelter coordinates for radius search; fill them with: python manage.py geocode-shelters
+ALTER TABLE shelter
+    ADD COLUMN latitude DECIMAL(9, 6) NULL,
+    ADD COLUMN longitude DECIMAL(9, 6) NULL;
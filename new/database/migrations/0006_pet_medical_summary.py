@@ -0,0 +1,78 @@
+"""
+One summary row per pet with medical history
+
+Creates pet_medical_summary (vaccinated flag, last visit, visit count, latest diagnosis and vaccinations)
+and fills it from medical_records in pet_id batches. MedicalModel keeps it current from
+then on; `python manage.py rebuild-medical-summary` recomputes it from scratch.
+"""
+import time
+
+BATCH_SIZE = 1000
+BATCH_PAUSE_SECONDS = 0.05
+
+# Same shape as MedicalModel.SUMMARY_REFRESH_QUERY at the time this migration was written
+REFRESH = '''
+    INSERT INTO pet_medical_summary
+        (pet_id, is_vaccinated, last_visit_date, visit_count, latest_diagnosis, latest_dr_name, latest_vaccinations)
+    SELECT agg.pet_id, agg.is_vaccinated, agg.last_visit_date, agg.visit_count, latest.diagnosis, latest.dr_name,
+           (SELECT v.vaccinations FROM medical_records v
+            WHERE v.pet_id = agg.pet_id AND v.vaccinations IS NOT NULL AND v.vaccinations != ''
+            ORDER BY v.date_of_visit DESC, v.record_id DESC LIMIT 1)
+    FROM (
+        SELECT pet_id,
+               MAX(vaccinations IS NOT NULL AND vaccinations != '') AS is_vaccinated,
+               MAX(date_of_visit) AS last_visit_date,
+               COUNT(*) AS visit_count
+        FROM medical_records
+        WHERE pet_id BETWEEN %s AND %s
+        GROUP BY pet_id
+    ) agg
+    LEFT JOIN medical_records latest
+        ON latest.record_id = (SELECT r.record_id FROM medical_records r WHERE r.pet_id = agg.pet_id
+                               ORDER BY r.date_of_visit DESC, r.record_id DESC LIMIT 1)
+    ON DUPLICATE KEY UPDATE
+        is_vaccinated = VALUES(is_vaccinated),
+        last_visit_date = VALUES(last_visit_date),
+        visit_count = VALUES(visit_count),
+        latest_diagnosis = VALUES(latest_diagnosis),
+        latest_dr_name = VALUES(latest_dr_name),
+        latest_vaccinations = VALUES(latest_vaccinations)
+'''
+
+
+def up(cursor, conn):
+    cursor.execute('''
+        CREATE TABLE pet_medical_summary (
+            pet_id INT NOT NULL PRIMARY KEY,
+            is_vaccinated TINYINT(1) NOT NULL DEFAULT 0,
+            last_visit_date DATE NULL,
+            visit_count INT UNSIGNED NOT NULL DEFAULT 0,
+            latest_diagnosis TEXT NULL,
+            latest_dr_name VARCHAR(255) NULL,
+            latest_vaccinations TEXT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            KEY idx_pet_medical_summary_vaccinated (is_vaccinated)
+        )
+    ''')
+    conn.commit()
+
+    cursor.execute('SELECT MIN(pet_id), MAX(pet_id) FROM medical_records')
+    low, high = cursor.fetchone()
+    if low is None:
+        return
+
+    start = low
+    while start <= high:
+        end = start + BATCH_SIZE - 1
+        cursor.execute(REFRESH, (start, end))
+        conn.commit()
+        start = end + 1
+        time.sleep(BATCH_PAUSE_SECONDS)
+
+    cursor.execute('SELECT COUNT(*) FROM pet_medical_summary')
+    print(f"  summarized {cursor.fetchone()[0]} pet(s)")
+
+
+def down(cursor, conn):
+    cursor.execute('DROP TABLE pet_medical_summary')
+    conn.commit()
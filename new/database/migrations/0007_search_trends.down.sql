@@ -0,0 +1 @@
+DROP TABLE search_trends;
@@ -0,0 +1,12 @@
+-- Decayed per-query search counts flushed by models/search_trends.py (scores are log-scale, see there)
+CREATE TABLE search_trends (
+    query_hash CHAR(40) NOT NULL PRIMARY KEY,
+    filters VARCHAR(2000) NOT NULL,
+    log_score DOUBLE NOT NULL,
+    zero_log_score DOUBLE NULL,
+    searches INT UNSIGNED NOT NULL DEFAULT 0,
+    zero_results INT UNSIGNED NOT NULL DEFAULT 0,
+    last_searched_at DATETIME NOT NULL,
+    KEY idx_search_trends_score (log_score),
+    KEY idx_search_trends_zero_score (zero_log_score)
+);
@@ -0,0 +1,3 @@
+DROP TABLE recommendation_run_chunks;
+DROP TABLE recommendation_runs;
+DROP TABLE user_recommendations;
@@ -0,0 +1,26 @@
+-- Precomputed "pets you may like" lists written by: python manage.py recommend-batch
+CREATE TABLE user_recommendations (
+    user_id INT NOT NULL,
+    position SMALLINT UNSIGNED NOT NULL,
+    pet_id INT NOT NULL,
+    score INT NOT NULL,
+    computed_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, position)
+);
+
+-- One row per batch run; a run with finished_at NULL is resumed by the next invocation
+CREATE TABLE recommendation_runs (
+    run_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    chunk_size INT UNSIGNED NOT NULL,
+    started_at DATETIME NOT NULL,
+    finished_at DATETIME NULL
+);
+
+-- User id ranges a run has already written, committed together with their recommendations
+CREATE TABLE recommendation_run_chunks (
+    run_id INT NOT NULL,
+    first_user_id INT NOT NULL,
+    users INT UNSIGNED NOT NULL,
+    finished_at DATETIME NOT NULL,
+    PRIMARY KEY (run_id, first_user_id)
+);
@@ -0,0 +1,10 @@
+-- k most similar available pets per pet, kept current by models/pet_neighbors.py
+-- Full rebuild: python manage.py rebuild-pet-neighbors
+CREATE TABLE pet_neighbors (
+    pet_id INT NOT NULL,
+    position TINYINT UNSIGNED NOT NULL,
+    neighbor_id INT NOT NULL,
+    similarity FLOAT NOT NULL,
+    PRIMARY KEY (pet_id, position),
+    KEY idx_pet_neighbors_neighbor (neighbor_id)
+);
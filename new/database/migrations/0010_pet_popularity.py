@@ -0,0 +1,82 @@
+"""
+Per-pet popularity counters for the cold-start recommendations
+
+Creates pet_popularity (availability, application and view counts, forward-decayed score)
+with an (is_available, log_score) index and fills it from pets and adoption_applications
+in pet_id batches. models/pet_popularity.py keeps it current from then on;
+`python manage.py reconcile-popularity` recomputes it.
+"""
+import math
+import time
+
+BATCH_SIZE = 1000
+BATCH_PAUSE_SECONDS = 0.05
+
+# Config and PetStatus values when this migration was written; reconcile-popularity rescores with current ones
+AVAILABLE = 0
+LANDMARK = 1704067200
+DECAY_RATE = math.log(2) / (7 * 24 * 3600)
+LISTING_WEIGHT = 1.0
+
+# Same shape as pet_popularity.RECONCILE at the time this migration was written (no views yet)
+BACKFILL = '''
+    INSERT INTO pet_popularity (pet_id, is_available, applications, views, log_score, last_activity_at)
+    SELECT p.pet_id,
+           p.adoption_state = %(available)s,
+           COUNT(aa.application_id),
+           0,
+           %(rate)s * (UNIX_TIMESTAMP(p.created_at) - %(landmark)s) + LN(
+               %(listing)s
+               + COALESCE(SUM(EXP(%(rate)s * (UNIX_TIMESTAMP(aa.application_date) - UNIX_TIMESTAMP(p.created_at)))), 0)
+           ),
+           MAX(aa.application_date)
+    FROM pets p
+    LEFT JOIN adoption_applications aa ON aa.pet_id = p.pet_id
+    WHERE p.pet_id BETWEEN %(first)s AND %(last)s
+    GROUP BY p.pet_id
+'''
+
+
+def up(cursor, conn):
+    cursor.execute('''
+        CREATE TABLE pet_popularity (
+            pet_id INT NOT NULL PRIMARY KEY,
+            is_available TINYINT(1) NOT NULL DEFAULT 0,
+            applications INT UNSIGNED NOT NULL DEFAULT 0,
+            views INT UNSIGNED NOT NULL DEFAULT 0,
+            log_score DOUBLE NOT NULL,
+            view_log_score DOUBLE NULL,
+            last_activity_at DATETIME NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            KEY idx_pet_popularity_rank (is_available, log_score)
+        )
+    ''')
+    conn.commit()
+
+    cursor.execute('SELECT MIN(pet_id), MAX(pet_id) FROM pets')
+    low, high = cursor.fetchone()
+    if low is None:
+        return
+
+    start = low
+    while start <= high:
+        end = start + BATCH_SIZE - 1
+        cursor.execute(BACKFILL, {
+            'rate': DECAY_RATE,
+            'landmark': LANDMARK,
+            'listing': LISTING_WEIGHT,
+            'available': AVAILABLE,
+            'first': start,
+            'last': end,
+        })
+        conn.commit()
+        start = end + 1
+        time.sleep(BATCH_PAUSE_SECONDS)
+
+    cursor.execute('SELECT COUNT(*) FROM pet_popularity')
+    print(f"  counted {cursor.fetchone()[0]} pet(s)")
+
+
+def down(cursor, conn):
+    cursor.execute('DROP TABLE pet_popularity')
+    conn.commit()
@@ -0,0 +1 @@
+DROP TABLE pet_views;
@@ -0,0 +1,9 @@
+-- Raw pet view events, batch-inserted by models/view_events.py
+CREATE TABLE pet_views (
+    view_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    pet_id INT NOT NULL,
+    user_id INT NULL,
+    viewed_at DATETIME NOT NULL,
+    KEY idx_pet_views_pet (pet_id, viewed_at),
+    KEY idx_pet_views_user (user_id, viewed_at)
+);
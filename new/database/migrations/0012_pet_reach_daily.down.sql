@@ -0,0 +1 @@
+DROP TABLE pet_reach_daily;
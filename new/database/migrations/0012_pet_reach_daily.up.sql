@@ -0,0 +1,8 @@
+-- Per-pet, per-day HyperLogLog visitor sketches merged by models/pet_reach.py (blob format described there)
+CREATE TABLE pet_reach_daily (
+    pet_id INT NOT NULL,
+    day DATE NOT NULL,
+    sketch BLOB NOT NULL,
+    PRIMARY KEY (pet_id, day),
+    KEY idx_pet_reach_daily_day (day)
+);
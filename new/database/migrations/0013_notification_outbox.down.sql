@@ -0,0 +1 @@
+DROP TABLE notification_outbox;
@@ -0,0 +1,19 @@
+-- Notifications written with the change they announce, delivered by models/notification_outbox.py
+CREATE TABLE notification_outbox (
+    notification_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    channel VARCHAR(10) NOT NULL,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NULL,
+    body TEXT NOT NULL,
+    application_id INT NULL,
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',
+    attempts TINYINT UNSIGNED NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL,
+    claimed_by CHAR(16) NULL,
+    locked_until DATETIME NULL,
+    last_error VARCHAR(500) NULL,
+    created_at DATETIME NOT NULL,
+    sent_at DATETIME NULL,
+    KEY idx_notification_outbox_due (status, next_attempt_at),
+    KEY idx_notification_outbox_application (application_id)
+);
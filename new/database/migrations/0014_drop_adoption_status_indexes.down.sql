@@ -0,0 +1,4 @@
+CREATE INDEX idx_pets_status_created ON pets (adoption_status, created_at);
+CREATE INDEX idx_pets_status_category ON pets (adoption_status, category);
+CREATE INDEX idx_pets_shelter_status ON pets (shelter_id, adoption_status);
+CREATE INDEX idx_pets_status_shelter ON pets (adoption_status, shelter_id);
@@ -0,0 +1,6 @@
+-- The string adoption_status column is only written now (for display); every read filters on the
+-- adoption_state indexes from 0004, so its 0001 indexes just add write cost. idx_pets_category stays.
+DROP INDEX idx_pets_status_shelter ON pets;
+DROP INDEX idx_pets_shelter_status ON pets;
+DROP INDEX idx_pets_status_category ON pets;
+DROP INDEX idx_pets_status_created ON pets;
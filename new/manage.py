@@ -0,0 +1,256 @@
+# manage.py - maintenance commands (run from this directory)
+#
+#   python manage.py migrate [--target N]
+#   python manage.py rollback [--target N | --steps N]
+#   python manage.py migration-status
+#   python manage.py explain-check [--seed]
+#   python manage.py geocode-shelters [--all]
+#   python manage.py rebuild-medical-summary
+#   python manage.py recommend-batch [--workers N] [--chunk-size N] [--restart]
+#   python manage.py rebuild-pet-neighbors
+#   python manage.py reconcile-popularity
+#   python manage.py notification-worker [--workers N] [--once]
+#   python manage.py notification-status [--requeue-dead]
+#   python manage.py notification-sinks [--latency-ms N] [--failure-rate F] [--gateway-limit N]
+#   python manage.py notification-bench [--messages N] [--workers N] [--latency-ms N] [--failure-rate F]
+#                                       [--gateway-limit N] [--no-pool] [--sms-rate N]
+import argparse
+import sys
+
+
+def cmd_migrate(args):
+    from database import migrate
+    applied = migrate.upgrade(target=args.target)
+    print(f"✅ Applied {len(applied)} migration(s)" if applied else "✅ Schema is up to date")
+
+
+def cmd_rollback(args):
+    from database import migrate
+    reverted = migrate.downgrade(target=args.target, steps=args.steps)
+    print(f"✅ Reverted {len(reverted)} migration(s)")
+
+
+def cmd_migration_status(args):
+    from database import migrate
+    for migration in migrate.status():
+        mark = '✅' if migration['applied'] else '⏳'
+        print(f"{mark} {migration['version']:04d}_{migration['name']}")
+
+
+def cmd_explain_check(args):
+    from database import explain_check
+    if args.seed:
+        print("🌱 Seeding synthetic rows (use a scratch database!) ...")
+        explain_check.seed_dataset()
+
+    problems, checked = explain_check.check_queries()
+    for problem in problems:
+        print(f"❌ {problem['query']}: full scan of {problem['table']} (~{problem['rows']} rows)")
+        print(f"   {problem['sql'][:300]}")
+    if problems:
+        return 1
+    print(f"✅ All {checked} statements from {len(explain_check.HOT_PATHS)} hot paths use an index")
+    return 0
+
+
+def cmd_geocode_shelters(args):
+    from models.shelter_model import ShelterModel
+    updated, unresolved = ShelterModel.geocode_shelters(only_missing=not args.all)
+    print(f"✅ Geocoded {updated} shelter(s)")
+    for location in sorted(set(unresolved), key=str):
+        print(f"⚠️  No coordinates for {location!r} (add it to database/data/geocodes.csv)")
+
+
+def cmd_rebuild_medical_summary(args):
+    from models.medical_model import MedicalModel
+    summarized = MedicalModel.rebuild_medical_summaries()
+    if summarized is None:
+        return 1
+    print(f"✅ Medical summary rebuilt for {summarized} pet(s)")
+
+
+def cmd_recommend_batch(args):
+    from models import recommendation_batch
+    result = recommendation_batch.run_batch(workers=args.workers, chunk_size=args.chunk_size, restart=args.restart)
+    if result['failed_chunks']:
+        print(f"⚠️  Run {result['run_id']}: {result['failed_chunks']} chunk(s) failed; run the command again to resume")
+        return 1
+    print(f"✅ Run {result['run_id']}: {result['users']} user(s) in {result['seconds']}s "
+          f"({result['users_per_second']} users/s on {result['workers']} worker(s))")
+
+
+def cmd_rebuild_pet_neighbors(args):
+    from models import pet_neighbors
+    if pet_neighbors.np is None:
+        print("❌ NumPy is required to compute similar pets")
+        return 1
+    written = pet_neighbors.rebuild_all()
+    print(f"✅ Similar pets recomputed for {written} available pet(s)")
+
+
+def cmd_reconcile_popularity(args):
+    from models import pet_popularity
+    result = pet_popularity.reconcile()
+    if result is None:
+        return 1
+    print(f"✅ Popularity reconciled for {result['pets']} pet(s), {result['orphans']} orphaned row(s) removed")
+
+
+def cmd_notification_worker(args):
+    from models import notification_outbox
+    worker = notification_outbox.OutboxWorker(workers=args.workers)
+    print(f"📬 Notification worker {worker.worker_id} with {worker.workers} sender thread(s); Ctrl+C to stop")
+    try:
+        worker.run(once=args.once)
+    except KeyboardInterrupt:
+        worker.stop()
+    stats = worker.stats()
+    print(f"✅ Sent {stats['sent']}, retrying {stats['retried']}, dead-lettered {stats['dead']}")
+    _print_smtp_pool()
+    _print_sms_dispatcher()
+
+
+def _print_smtp_pool():
+    from models.smtp_pool import smtp_pool
+    stats = smtp_pool.stats()
+    print(f"   SMTP: {stats['sent']} sent over {stats['sessions_opened']} session(s), "
+          f"{stats['messages_per_second'] or '-'} msg/s, latency ms {stats['latency_ms'] or '-'}, "
+          f"{stats['reconnects']} reconnect(s), {stats['noops']} NOOP check(s)")
+
+
+def cmd_notification_status(args):
+    from models import notification_outbox
+    if args.requeue_dead:
+        print(f"↩️  Requeued {notification_outbox.requeue_dead()} dead notification(s)")
+    counts = notification_outbox.outbox_counts()
+    for status in ('pending', 'sending', 'sent', 'dead'):
+        print(f"  {status:8} {counts.get(status, 0)}")
+
+
+def _start_sinks(latency_ms, failure_rate, gateway_limit=None):
+    from config import Config
+    from models.notification_sinks import SMSGatewaySink, SMTPSink
+    smtp = SMTPSink(latency=latency_ms / 1000, failure_rate=failure_rate).start()
+    sms = SMSGatewaySink(latency=latency_ms / 1000, failure_rate=failure_rate, rate_limit=gateway_limit).start()
+    Config.SMTP_SERVER, Config.SMTP_PORT, Config.SMTP_STARTTLS = smtp.host, smtp.port, False
+    Config.TWILIO_API_URL = sms.url
+    return smtp, sms
+
+
+def cmd_notification_sinks(args):
+    import time
+    smtp, sms = _start_sinks(args.latency_ms, args.failure_rate, args.gateway_limit)
+    print("📭 Local notification sinks running; start the app or worker with:")
+    print(f"   SMTP_SERVER={smtp.host} SMTP_PORT={smtp.port} SMTP_STARTTLS=0 TWILIO_API_URL={sms.url}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"   email {smtp.stats()}  sms {sms.stats()}")
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_notification_bench(args):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from models import notification_outbox
+    smtp, sms = _start_sinks(args.latency_ms, args.failure_rate, args.gateway_limit)
+    if args.sms_rate:
+        from models.sms_dispatcher import sms_dispatcher
+        sms_dispatcher.limiter.rate = args.sms_rate
+    worker = notification_outbox.OutboxWorker(workers=args.workers)
+    rows = [{'notification_id': i, 'channel': 'email' if i % 2 else 'sms', 'recipient': f'bench{i}@sink.test',
+             'subject': 'Benchmark', 'body': '<p>Benchmark message</p>', 'attempts': 0}
+            for i in range(args.messages)]
+    if args.no_pool:
+        from models.smtp_pool import smtp_pool
+        smtp_pool.size = 0
+    # Same delivery path as the worker (batched emails, SMS per task), without the database round trips
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=worker.workers) as pool:
+        results = worker.send_all(rows, pool)
+    elapsed = time.monotonic() - started
+    failed = sum(1 for _, error in results if error)
+    print(f"✅ {len(rows)} message(s) in {elapsed:.2f}s: {len(rows) / elapsed:.0f} msg/s on {worker.workers} sender(s), "
+          f"{failed} failed")
+    print(f"   email {smtp.stats()}  sms {sms.stats()}")
+    _print_smtp_pool()
+    _print_sms_dispatcher()
+
+
+def _print_sms_dispatcher():
+    from models.sms_dispatcher import sms_dispatcher
+    stats = sms_dispatcher.stats()
+    latency = stats['message_latency']
+    print(f"   SMS: {stats['sent']} sent, {stats['failed']} failed, {stats['retries']} retries, "
+          f"responses {stats['statuses']}, {stats['throttled_seconds']}s waiting on the rate limit")
+    print(f"   SMS message latency avg {latency['avg_ms']} ms, histogram {latency['buckets']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pet adoption maintenance commands')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = commands.add_parser('migrate', help='Apply pending schema migrations')
+    migrate_parser.add_argument('--target', type=int, help='Stop after this version')
+    migrate_parser.set_defaults(func=cmd_migrate)
+
+    rollback_parser = commands.add_parser('rollback', help='Revert applied schema migrations')
+    rollback_parser.add_argument('--target', type=int, help='Revert everything above this version')
+    rollback_parser.add_argument('--steps', type=int, default=1, help='How many migrations to revert')
+    rollback_parser.set_defaults(func=cmd_rollback)
+
+    status_parser = commands.add_parser('migration-status', help='Show applied and pending migrations')
+    status_parser.set_defaults(func=cmd_migration_status)
+
+    explain_parser = commands.add_parser('explain-check', help='Fail if a hot query does a full table scan')
+    explain_parser.add_argument('--seed', action='store_true', help='Insert a synthetic dataset first')
+    explain_parser.set_defaults(func=cmd_explain_check)
+
+    geocode_parser = commands.add_parser('geocode-shelters', help='Fill shelter coordinates from the offline geocode file')
+    geocode_parser.add_argument('--all', action='store_true', help='Re-geocode shelters that already have coordinates')
+    geocode_parser.set_defaults(func=cmd_geocode_shelters)
+
+    summary_parser = commands.add_parser('rebuild-medical-summary', help='Recompute pet_medical_summary from medical_records')
+    summary_parser.set_defaults(func=cmd_rebuild_medical_summary)
+
+    batch_parser = commands.add_parser('recommend-batch', help='Precompute recommendations for every adopter')
+    batch_parser.add_argument('--workers', type=int, help='Worker processes (default RECOMMENDATION_BATCH_WORKERS)')
+    batch_parser.add_argument('--chunk-size', type=int, help='User ids per task; ignored when resuming a run')
+    batch_parser.add_argument('--restart', action='store_true', help='Abandon an unfinished run instead of resuming it')
+    batch_parser.set_defaults(func=cmd_recommend_batch)
+
+    neighbors_parser = commands.add_parser('rebuild-pet-neighbors', help='Recompute the similar-pets table')
+    neighbors_parser.set_defaults(func=cmd_rebuild_pet_neighbors)
+
+    popularity_parser = commands.add_parser('reconcile-popularity', help='Recompute pet_popularity counters (run periodically)')
+    popularity_parser.set_defaults(func=cmd_reconcile_popularity)
+
+    worker_parser = commands.add_parser('notification-worker', help='Deliver queued email/SMS notifications')
+    worker_parser.add_argument('--workers', type=int, help='Sender threads (default NOTIFICATION_WORKERS)')
+    worker_parser.add_argument('--once', action='store_true', help='Exit when nothing is due instead of polling')
+    worker_parser.set_defaults(func=cmd_notification_worker)
+
+    outbox_parser = commands.add_parser('notification-status', help='Show the notification outbox backlog')
+    outbox_parser.add_argument('--requeue-dead', action='store_true', help='Retry dead-lettered notifications')
+    outbox_parser.set_defaults(func=cmd_notification_status)
+
+    for name, func, help_text in (('notification-sinks', cmd_notification_sinks, 'Run local SMTP/SMS stand-ins'),
+                                  ('notification-bench', cmd_notification_bench, 'Measure delivery throughput against local stand-ins')):
+        sink_parser = commands.add_parser(name, help=help_text)
+        sink_parser.add_argument('--latency-ms', type=float, default=0, help='Delay the stand-ins add per message')
+        sink_parser.add_argument('--failure-rate', type=float, default=0, help='Share of messages the stand-ins reject')
+        sink_parser.add_argument('--gateway-limit', type=int, help='SMS requests/second the stand-in accepts before 429s')
+        if name == 'notification-bench':
+            sink_parser.add_argument('--messages', type=int, default=1000)
+            sink_parser.add_argument('--workers', type=int, help='Sender threads (default NOTIFICATION_WORKERS)')
+            sink_parser.add_argument('--no-pool', action='store_true', help='One SMTP session per email, for comparison')
+            sink_parser.add_argument('--sms-rate', type=float, help='SMS requests/second to send (default SMS_RATE_PER_SECOND)')
+        sink_parser.set_defaults(func=func)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
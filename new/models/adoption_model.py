@@ -1,6 +1,10 @@
 import mysql.connector
 from datetime import datetime
 from database.db_connection import connect_to_database as get_db_connection
+from models.pet_status import PetStatus
+from models import catalog_events, pet_popularity
+from models.notification_model import NotificationModel
+from models.recommendation_model import RecommendationModel
 
 class AdoptionModel:
     @staticmethod
@@ -35,10 +39,14 @@ class AdoptionModel:
             ))
             
             application_id = cursor.lastrowid
+            # Same transaction, so the popular list never counts an application that rolled back
+            pet_popularity.record_application(cursor, pet_id)
             conn.commit()
             cursor.close()
             conn.close()
             
+            # The new application changes this user's preferences, exclusions and co-applications
+            RecommendationModel.record_application(user_id, pet_id)
             return application_id
             
         except Exception as e:
@@ -132,10 +140,23 @@ class AdoptionModel:
         Update application status with reviewer tracking
         What this does: Shelter staff approve/reject applications
         Why: We need application workflow management
+        
+        The applicant's email/SMS is queued in the same transaction (notification outbox)
+        and delivered by the outbox worker, never from the request thread
         """
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
+            adopted_pet_id = None
+            
+            cursor.execute('''
+                SELECT aa.user_id, aa.pet_id, aa.applicant_name, u.email, u.phone, p.name
+                FROM adoption_applications aa
+                LEFT JOIN users u ON aa.user_id = u.id
+                LEFT JOIN pets p ON aa.pet_id = p.pet_id
+                WHERE aa.application_id = %s
+            ''', (application_id,))
+            application = cursor.fetchone()
             
             # FIXED: Use correct column name 'application_id' not 'id'
             cursor.execute('''
@@ -147,20 +168,33 @@ class AdoptionModel:
             
             # If approved, update pet status to adopted
             if new_status == 'approved':
-                cursor.execute('''
-                    SELECT pet_id FROM adoption_applications WHERE application_id = %s
-                ''', (application_id,))
-                result = cursor.fetchone()
-                if result:
-                    pet_id = result[0]
+                if application:
+                    pet_id = application[1]
                     
                     cursor.execute('''
-                        UPDATE pets SET adoption_status = 'adopted' WHERE pet_id = %s
-                    ''', (pet_id,))
+                        UPDATE pets SET adoption_status = %s, adoption_state = %s WHERE pet_id = %s
+                    ''', (PetStatus.label(PetStatus.ADOPTED), PetStatus.ADOPTED, pet_id))
+                    adopted_pet_id = pet_id
+            
+            if application:
+                NotificationModel.queue_adoption_status_notification(cursor, {
+                    'application_id': application_id,
+                    'applicant_name': application[2],
+                    'email': application[3],
+                    'phone': application[4],
+                    'pet_name': application[5],
+                    'review_notes': review_notes
+                }, new_status)
             
             conn.commit()
             cursor.close()
             conn.close()
+            
+            if application:
+                # Pending/approved applications count towards preferences; rejected ones don't
+                RecommendationModel.forget_user(application[0])
+            if adopted_pet_id is not None:
+                catalog_events.publish('pet_status_changed', pet_id=adopted_pet_id, state=PetStatus.ADOPTED)
             return True
             
         except Exception as e:
@@ -178,6 +178,19 @@ def role_required(allowed_roles):
         return decorated_function
     return decorator
 
+def optional_user_id():
+    """
+    Id of the logged-in user, or None for anonymous visitors (and bad or expired tokens)
+    Checks the token only, without a database lookup, so tracking endpoints can use it
+    """
+    try:
+        if verify_jwt_in_request(optional=True):
+            identity = get_jwt_identity()
+            return int(identity) if identity is not None else None
+    except Exception:
+        pass
+    return None
+
 def get_current_user():
     """
     Helper function to get current logged-in user
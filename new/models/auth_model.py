@@ -3,6 +3,7 @@ import mysql.connector
 from datetime import datetime
 from database.db_connection import connect_to_database as get_db_connection
 from config import Config
+from models.pet_status import PetStatus
 
 class AuthModel:
     @staticmethod
@@ -222,11 +223,11 @@ class AuthModel:
             
             elif role == 'adopter':
                 # Adopters see all available pets
-                cursor.execute('''
+                cursor.execute(f'''
                     SELECT p.*, s.shelter_name 
                     FROM pets p
                     LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
-                    WHERE p.adoption_status = 'notadopted'
+                    WHERE p.adoption_state = {PetStatus.AVAILABLE}
                 ''')
             
             pets = cursor.fetchall()
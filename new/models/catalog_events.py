@@ -0,0 +1,46 @@
+# models/catalog_events.py
+#
+# Tiny in-process publish/subscribe hub for catalog writes.
+# Models publish after they commit; in-memory structures (search index, caches, ...)
+# subscribe at import time to keep themselves in sync.
+#
+# Events and their payloads:
+#   pet_added           pet_id
+#   pet_deleted         pet_id
+#   pet_status_changed  pet_id, state (a PetStatus code)
+#   shelter_added       shelter_id
+#   shelter_updated     shelter_id
+#   shelter_deleted     shelter_id
+#   medical_updated     pet_id
+#
+# Every published event also bumps the catalog version, which caches fold into their keys.
+# The version is per process: writes served by another worker only show up once entries expire.
+import itertools
+
+_listeners = {}
+_version_counter = itertools.count(1)
+_version = 0
+
+
+def subscribe(event, callback):
+    """Call `callback(**payload)` every time `event` is published in this process"""
+    _listeners.setdefault(event, []).append(callback)
+
+
+def publish(event, **payload):
+    """
+    Notify subscribers of a committed catalog write
+    A failing subscriber is logged and skipped; the write itself already succeeded
+    """
+    global _version
+    _version = next(_version_counter)
+    for callback in _listeners.get(event, []):
+        try:
+            callback(**payload)
+        except Exception as e:
+            print(f"Catalog event {event} handler {getattr(callback, '__name__', callback)} failed: {e}")
+
+
+def catalog_version():
+    """Changes whenever a pet, shelter or medical record is written in this process"""
+    return _version
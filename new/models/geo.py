@@ -0,0 +1,172 @@
+# models/geo.py
+import csv
+import math
+import threading
+import time
+
+from config import Config
+from database.db_connection import connect_to_database
+from models import catalog_events
+
+EARTH_RADIUS_KM = 6371.0088
+
+_geocodes = None
+_geocodes_lock = threading.Lock()
+
+
+def _normalize_place(text):
+    return ' '.join((text or '').lower().replace('.', ' ').split())
+
+
+def load_geocodes():
+    """place -> (latitude, longitude) from the bundled CSV; read once per process"""
+    global _geocodes
+    if _geocodes is None:
+        with _geocodes_lock:
+            if _geocodes is None:
+                places = {}
+                with open(Config.GEOCODE_FILE, newline='', encoding='utf-8') as handle:
+                    for row in csv.DictReader(handle):
+                        places[_normalize_place(row['place'])] = (float(row['latitude']), float(row['longitude']))
+                _geocodes = places
+    return _geocodes
+
+
+def geocode(location):
+    """
+    Coordinates for a free-text shelter location, without any network call
+    What this does: Tries the whole string, then each comma-separated part ("Andheri West, Mumbai" -> mumbai)
+    Returns (latitude, longitude) or None when the place is not in the geocode file
+    """
+    places = load_geocodes()
+    place = _normalize_place(location)
+    if place in places:
+        return places[place]
+    for part in place.split(','):
+        part = part.strip()
+        if part in places:
+            return places[part]
+    return None
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _unit_vector(lat, lng):
+    phi, lam = math.radians(lat), math.radians(lng)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+class ShelterLocator:
+    """
+    k-d tree over shelter coordinates
+    What this does: Answers "which shelters are within R km of this point" without touching the database
+    Why: Shelters are few and rarely change; pets are then filtered by shelter_id, which is indexed
+
+    Points live on the unit sphere in 3-D, where straight-line distance grows with
+    great-circle distance, so plain axis-aligned pruning stays correct near the poles and the date line.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._root = None
+        self._size = 0
+        self._coordinates = {}
+        self.built_at = None
+
+    def build(self, rows):
+        """rows: (shelter_id, latitude, longitude)"""
+        points = [(_unit_vector(float(lat), float(lng)), shelter_id, float(lat), float(lng))
+                  for shelter_id, lat, lng in rows]
+        root = self._build(points, 0)
+        with self._lock:
+            self._root = root
+            self._size = len(points)
+            self._coordinates = {shelter_id: (lat, lng) for _, shelter_id, lat, lng in points}
+            self.built_at = time.monotonic()
+
+    def _build(self, points, axis):
+        if not points:
+            return None
+        points.sort(key=lambda point: point[0][axis])
+        middle = len(points) // 2
+        next_axis = (axis + 1) % 3
+        return (points[middle], axis,
+                self._build(points[:middle], next_axis),
+                self._build(points[middle + 1:], next_axis))
+
+    def invalidate(self, **_):
+        self.built_at = None
+
+    @property
+    def stale(self):
+        return self.built_at is None or time.monotonic() - self.built_at > Config.GEO_INDEX_REFRESH_SECONDS
+
+    def within(self, lat, lng, radius_km):
+        """[(shelter_id, distance_km)] for shelters inside the radius, nearest first"""
+        target = _unit_vector(lat, lng)
+        # Chord length of the radius on the unit sphere
+        chord = 2 * math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2)
+        chord_squared = chord * chord
+
+        found = []
+        with self._lock:
+            stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            (vector, shelter_id, shelter_lat, shelter_lng), axis, left, right = node
+            if sum((a - b) ** 2 for a, b in zip(vector, target)) <= chord_squared:
+                found.append((shelter_id, round(haversine_km(lat, lng, shelter_lat, shelter_lng), 2)))
+            gap = target[axis] - vector[axis]
+            near_side, far_side = (left, right) if gap < 0 else (right, left)
+            stack.append(near_side)
+            if abs(gap) <= chord:
+                stack.append(far_side)
+        found.sort(key=lambda item: (item[1], item[0]))
+        return found
+
+    def coordinates(self):
+        """shelter_id -> (latitude, longitude) of every geocoded shelter"""
+        with self._lock:
+            return dict(self._coordinates)
+
+    def stats(self):
+        return {'shelters': self._size, 'stale': self.stale}
+
+
+# One locator per worker process
+shelter_locator = ShelterLocator()
+_build_lock = threading.Lock()
+
+
+def ensure_built():
+    """Load geocoded shelters when first needed and again after GEO_INDEX_REFRESH_SECONDS"""
+    if not shelter_locator.stale:
+        return shelter_locator
+    with _build_lock:
+        if shelter_locator.stale:
+            conn = connect_to_database()
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    SELECT shelter_id, latitude, longitude FROM shelter
+                    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+                ''')
+                shelter_locator.build(cursor.fetchall())
+            finally:
+                cursor.close()
+                conn.close()
+    return shelter_locator
+
+
+# Shelter writes go through ShelterModel; the refresh interval covers writes made by other processes
+catalog_events.subscribe('shelter_added', shelter_locator.invalidate)
+catalog_events.subscribe('shelter_updated', shelter_locator.invalidate)
+catalog_events.subscribe('shelter_deleted', shelter_locator.invalidate)
@@ -0,0 +1,308 @@
+# models/item_similarity.py
+#
+# Item-to-item collaborative filtering over adoption applications.
+#
+# Pets come and go too quickly to be items themselves, so the items are what an application says
+# about taste and reach: the pet's breed ("b:labrador") and its shelter ("s:12"). Two items are
+# similar when the same adopters applied for both (cosine over adopter sets):
+#
+#     similarity(a, b) = co_applicants(a, b) / sqrt(applicants(a) * applicants(b))
+#
+# Co-applicant counts live in compact CSR arrays (indptr / indices / counts), pruned to the
+# RECOMMENDATION_CF_NEIGHBORS strongest neighbours per item, so memory is bounded by
+# items x neighbours no matter how many applications there are. New applications are folded in
+# as a small delta on top of the arrays until the next full rebuild.
+import threading
+import time
+from array import array
+
+from config import Config
+from database.db_connection import connect_to_database
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: recommendations are then content-only
+    np = None
+
+
+APPLICATIONS_QUERY = '''
+    SELECT DISTINCT aa.user_id, p.breed, p.shelter_id
+    FROM adoption_applications aa
+    JOIN pets p ON p.pet_id = aa.pet_id
+    ORDER BY aa.user_id
+'''
+
+
+def application_items(breed, shelter_id):
+    """The items one application contributes"""
+    items = []
+    if breed:
+        items.append('b:' + str(breed).strip().lower())
+    if shelter_id is not None:
+        items.append(f's:{shelter_id}')
+    return items
+
+
+class ItemSimilarity:
+    """
+    Sparse item x item co-applicant counts
+    What this does: Answers "adopters who liked these breeds/shelters also liked ..." from memory
+    Why: The content score only knows the user's own breeds; co-applications surface related ones
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.items = []        # code -> item key
+        self.codes = {}        # item key -> code
+        self._applicants = np.zeros(0, dtype=np.int32)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._counts = np.zeros(0, dtype=np.int32)
+        self._delta = {}       # code -> {code: extra co-applicants} since the build
+        self.delta_pairs = 0
+        self.built_at = None
+        self.build_stats = {}
+
+    def _code(self, item):
+        code = self.codes.get(item)
+        if code is None:
+            code = self.codes[item] = len(self.items)
+            self.items.append(item)
+        return code
+
+    def build(self, rows, neighbors, max_items_per_user):
+        """
+        rows: (user_id, breed, shelter_id) ordered by user_id, e.g. streamed from the database
+        Keeps the `neighbors` most similar items per item; adopters with more than
+        `max_items_per_user` items only contribute their first ones (bulk appliers say little)
+        """
+        started = time.monotonic()
+        users = array('q')
+        items = array('i')
+        breed_codes, shelter_codes = {}, {}  # raw column value -> item code, skips re-normalizing
+        loaded = 0
+        for user_id, breed, shelter_id in rows:
+            loaded += 1
+            if breed:
+                code = breed_codes.get(breed)
+                if code is None:
+                    code = breed_codes[breed] = self._code(application_items(breed, None)[0])
+                users.append(user_id)
+                items.append(code)
+            if shelter_id is not None:
+                code = shelter_codes.get(shelter_id)
+                if code is None:
+                    code = shelter_codes[shelter_id] = self._code(application_items(None, shelter_id)[0])
+                users.append(user_id)
+                items.append(code)
+
+        n_items = len(self.items)
+        # One (user, item) pair per distinct item an adopter applied for, sorted by user
+        keys = np.unique(np.frombuffer(users, dtype=np.int64) * max(n_items, 1) + np.frombuffer(items, dtype=np.int32))
+        del users, items
+        user_of = keys // max(n_items, 1)
+        item_of = (keys % max(n_items, 1)).astype(np.int32)
+        del keys
+
+        starts = np.flatnonzero(np.r_[True, user_of[1:] != user_of[:-1]]) if user_of.size else np.zeros(0, dtype=np.int64)
+        sizes = np.diff(np.r_[starts, user_of.size])
+        position = np.arange(user_of.size) - np.repeat(starts, sizes)
+        keep = position < max_items_per_user
+        item_of, position = item_of[keep], position[keep]
+        group_size = np.minimum(np.repeat(sizes, sizes), max_items_per_user)[keep]
+        del user_of, keep
+
+        applicants = np.bincount(item_of, minlength=n_items).astype(np.int32)
+
+        # Every pair of items within one adopter: pair each item with the one d places later. Items are
+        # sorted within an adopter, so a < b; each offset is counted on its own to keep peak memory at
+        # about one key per application, and the partial counts are merged once at the end
+        keys_parts, count_parts = [], []
+        for d in range(1, int(group_size.max()) if group_size.size else 1):
+            left = np.flatnonzero(position + d < group_size)
+            keys, counts = np.unique(item_of[left].astype(np.int64) * n_items + item_of[left + d], return_counts=True)
+            keys_parts.append(keys)
+            count_parts.append(counts)
+        del position, group_size
+        pair_keys = np.concatenate(keys_parts) if keys_parts else np.zeros(0, dtype=np.int64)
+        pair_counts = np.concatenate(count_parts) if count_parts else np.zeros(0, dtype=np.int64)
+        del keys_parts, count_parts
+        order = np.argsort(pair_keys, kind='stable')
+        pair_keys, pair_counts = pair_keys[order], pair_counts[order]
+        firsts = np.flatnonzero(np.r_[True, pair_keys[1:] != pair_keys[:-1]]) if pair_keys.size else np.zeros(0, dtype=np.int64)
+        co = np.add.reduceat(pair_counts, firsts) if pair_keys.size else pair_counts
+        a, b = pair_keys[firsts] // max(n_items, 1), pair_keys[firsts] % max(n_items, 1)
+        del pair_keys, pair_counts, order, firsts
+        # Similarity is symmetric: store both directions
+        row, col, co = np.concatenate([a, b]), np.concatenate([b, a]), np.concatenate([co, co])
+        del a, b
+
+        # Strongest `neighbors` per row by cosine similarity
+        similarity = co / np.sqrt(applicants[row].astype(np.float64) * applicants[col])
+        order = np.lexsort((-similarity, row))
+        row, col, co = row[order], col[order], co[order]
+        row_starts = np.searchsorted(row, row)
+        keep = np.arange(row.size) - row_starts < neighbors
+        row, col, co = row[keep], col[keep], co[keep]
+
+        with self._lock:
+            self._applicants = applicants
+            self._indptr = np.r_[0, np.cumsum(np.bincount(row, minlength=n_items))].astype(np.int64)
+            self._indices = col.astype(np.int32)
+            self._counts = co.astype(np.int32)
+            self._delta = {}
+            self.delta_pairs = 0
+            self.built_at = time.monotonic()
+            self.build_stats = {
+                'rows': loaded,  # distinct (adopter, breed, shelter)
+                'items': n_items,
+                'pairs_kept': int(self._indices.size),
+                'array_bytes': int(self._applicants.nbytes + self._indptr.nbytes
+                                   + self._indices.nbytes + self._counts.nbytes),
+                'build_seconds': round(time.monotonic() - started, 2),
+            }
+
+    def add_application(self, previous_items, new_items):
+        """
+        Fold one new application in without a rebuild
+        previous_items: the adopter's items before it; new_items: the items of the pet applied for
+        Pairs that were pruned from the arrays restart from zero here, so the delta slightly
+        under-counts them until the next build
+        """
+        with self._lock:
+            seen = {self._code(item) for item in previous_items}
+            for item in new_items:
+                code = self._code(item)
+                if code in seen:
+                    continue
+                if code >= self._applicants.size:
+                    self._applicants = np.append(self._applicants, np.zeros(code + 1 - self._applicants.size, dtype=np.int32))
+                self._applicants[code] += 1
+                for other in seen:
+                    for a, b in ((code, other), (other, code)):
+                        row = self._delta.setdefault(a, {})
+                        row[b] = row.get(b, 0) + 1
+                    self.delta_pairs += 2
+                seen.add(code)
+
+    def affinity(self, user_items):
+        """
+        Summed similarity of every item to the adopter's items, split by kind:
+        ({breed: weight}, {shelter_id: weight})
+        """
+        totals = {}
+        with self._lock:
+            for item in set(user_items):
+                a = self.codes.get(item)
+                if a is None or a >= self._applicants.size or not self._applicants[a]:
+                    continue
+                if a + 1 < self._indptr.size:
+                    start, end = self._indptr[a], self._indptr[a + 1]
+                    cols, co = self._indices[start:end], self._counts[start:end]
+                else:
+                    cols, co = self._indices[:0], self._counts[:0]
+                delta = self._delta.get(a)
+                if delta:
+                    # Similarity is linear in the count, so delta entries can simply be added alongside
+                    cols = np.concatenate([cols, np.fromiter(delta.keys(), dtype=np.int32, count=len(delta))])
+                    co = np.concatenate([co, np.fromiter(delta.values(), dtype=np.int32, count=len(delta))])
+                similarity = co / np.sqrt(float(self._applicants[a]) * self._applicants[cols])
+                for b, weight in zip(cols.tolist(), similarity.tolist()):
+                    totals[b] = totals.get(b, 0.0) + weight
+            decoded = [(self.items[code], weight) for code, weight in totals.items()]
+
+        breeds, shelters = {}, {}
+        for item, weight in decoded:
+            kind, value = item.split(':', 1)
+            if kind == 'b':
+                breeds[value] = weight
+            else:
+                shelters[int(value)] = weight
+        return breeds, shelters
+
+    @property
+    def stale(self):
+        return (self.built_at is None
+                or time.monotonic() - self.built_at > Config.RECOMMENDATION_CF_REBUILD_SECONDS
+                or self.delta_pairs > Config.RECOMMENDATION_CF_MAX_DELTA_PAIRS)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.build_stats, delta_pairs=self.delta_pairs,
+                        age_seconds=None if self.built_at is None else round(time.monotonic() - self.built_at, 1))
+
+
+# One model per worker process, swapped whole on rebuild
+item_similarity = None
+_rebuild_lock = threading.Lock()
+_rebuild_thread = None
+_pending = None  # applications recorded while a rebuild was loading
+
+
+def _stream_rows(cursor, batch=10000):
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            return
+        yield from rows
+
+
+def rebuild():
+    """Build a fresh model from every application and swap it in"""
+    global item_similarity, _pending
+    with _rebuild_lock:
+        _pending = []
+    model = ItemSimilarity()
+    conn = connect_to_database()
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(APPLICATIONS_QUERY)
+        model.build(_stream_rows(cursor), Config.RECOMMENDATION_CF_NEIGHBORS, Config.RECOMMENDATION_CF_MAX_ITEMS_PER_USER)
+    finally:
+        cursor.close()
+        conn.close()
+
+    # Applications committed while the query ran may be counted twice; the next build settles it
+    with _rebuild_lock:
+        pending, _pending = _pending, None
+        for previous_items, new_items in pending:
+            model.add_application(previous_items, new_items)
+        item_similarity = model
+    stats = model.stats()
+    print(f"🤝 Item similarity built: {stats['items']} items, {stats['pairs_kept']} pairs "
+          f"from {stats['rows']} application rows in {stats['build_seconds']}s ({stats['array_bytes']} bytes)")
+    return model
+
+
+def _rebuild_in_background():
+    try:
+        rebuild()
+    except Exception as e:
+        print(f"❌ Item similarity rebuild failed (recommendations stay content-only): {e}")
+
+
+def get_model():
+    """
+    The current model, or None before the first build
+    A missing or stale model starts one background rebuild; a stale one keeps serving meanwhile
+    """
+    global _rebuild_thread
+    if np is None or not Config.RECOMMENDATION_CF_ENABLED:
+        return None
+    model = item_similarity
+    if model is None or model.stale:
+        with _rebuild_lock:
+            if _rebuild_thread is None or not _rebuild_thread.is_alive():
+                _rebuild_thread = threading.Thread(target=_rebuild_in_background, name='item-similarity-rebuild', daemon=True)
+                _rebuild_thread.start()
+    return model
+
+
+def record_application(previous_items, new_items):
+    """Fold a committed application into this process's model (and into a rebuild in progress)"""
+    with _rebuild_lock:
+        if _pending is not None:
+            _pending.append((list(previous_items), list(new_items)))
+        model = item_similarity
+    if model is not None:
+        model.add_application(previous_items, new_items)
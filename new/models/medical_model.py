@@ -1,7 +1,41 @@
 import mysql.connector
 from database.db_connection import connect_to_database
+from models import catalog_events
 
 class MedicalModel:
+    # Recompute pet_medical_summary for the pets in a pet_id range from their medical_records rows.
+    # The latest visit supplies the diagnosis and doctor, the latest visit that recorded any the vaccinations text.
+    # Visits on the same date (or with no date) go to the highest record_id, so reruns always pick the same row.
+    SUMMARY_REFRESH_QUERY = """
+        INSERT INTO pet_medical_summary
+            (pet_id, is_vaccinated, last_visit_date, visit_count, latest_diagnosis, latest_dr_name, latest_vaccinations)
+        SELECT agg.pet_id, agg.is_vaccinated, agg.last_visit_date, agg.visit_count, latest.diagnosis, latest.dr_name,
+               (SELECT v.vaccinations FROM medical_records v
+                WHERE v.pet_id = agg.pet_id AND v.vaccinations IS NOT NULL AND v.vaccinations != ''
+                ORDER BY v.date_of_visit DESC, v.record_id DESC LIMIT 1)
+        FROM (
+            SELECT pet_id,
+                   MAX(vaccinations IS NOT NULL AND vaccinations != '') AS is_vaccinated,
+                   MAX(date_of_visit) AS last_visit_date,
+                   COUNT(*) AS visit_count
+            FROM medical_records
+            WHERE pet_id BETWEEN %s AND %s
+            GROUP BY pet_id
+        ) agg
+        LEFT JOIN medical_records latest
+            ON latest.record_id = (SELECT r.record_id FROM medical_records r WHERE r.pet_id = agg.pet_id
+                                   ORDER BY r.date_of_visit DESC, r.record_id DESC LIMIT 1)
+        ON DUPLICATE KEY UPDATE
+            is_vaccinated = VALUES(is_vaccinated),
+            last_visit_date = VALUES(last_visit_date),
+            visit_count = VALUES(visit_count),
+            latest_diagnosis = VALUES(latest_diagnosis),
+            latest_dr_name = VALUES(latest_dr_name),
+            latest_vaccinations = VALUES(latest_vaccinations)
+    """
+    
+    SUMMARY_BATCH_SIZE = 1000
+    
     @staticmethod
     def get_medical_records(pet_id):
         """Fetch medical records data from the database based on pet_id"""
@@ -37,7 +71,10 @@ class MedicalModel:
                 CALL update_medical_records(%s, %s, %s, %s, %s, %s)
             """
             cursor.execute(update_medical_records_query, (pet_id, date_of_visit, medicines_or_vaccinations, diagnosis, dr_name, dr_number))
+            # Same transaction, so search never sees a visit without its summary
+            cursor.execute(MedicalModel.SUMMARY_REFRESH_QUERY, (pet_id, pet_id))
             mysql_connection.commit()
+            catalog_events.publish('medical_updated', pet_id=pet_id)
             return True
         except mysql.connector.Error as e:
             print("Error:", e)
@@ -45,4 +82,43 @@ class MedicalModel:
             return False
         finally:
             cursor.close()
-            mysql_connection.close()
\ No newline at end of file
+            mysql_connection.close()
+    
+    @staticmethod
+    def rebuild_medical_summaries():
+        """
+        Recompute every pet's medical summary from medical_records
+        What this does: Upserts pet_medical_summary one pet_id range per transaction, then drops rows for pets without records
+        Why: Repairs the summary after bulk imports or edits that bypassed update_medical_records
+        Returns the number of summarized pets
+        """
+        mysql_connection = connect_to_database()
+        cursor = mysql_connection.cursor()
+        
+        try:
+            cursor.execute("SELECT MIN(pet_id), MAX(pet_id) FROM medical_records")
+            low, high = cursor.fetchone()
+            
+            start = low
+            while low is not None and start <= high:
+                end = start + MedicalModel.SUMMARY_BATCH_SIZE - 1
+                cursor.execute(MedicalModel.SUMMARY_REFRESH_QUERY, (start, end))
+                mysql_connection.commit()
+                start = end + 1
+            
+            cursor.execute("""
+                DELETE ms FROM pet_medical_summary ms
+                LEFT JOIN medical_records m ON m.pet_id = ms.pet_id
+                WHERE m.pet_id IS NULL
+            """)
+            mysql_connection.commit()
+            
+            cursor.execute("SELECT COUNT(*) FROM pet_medical_summary")
+            return cursor.fetchone()[0]
+        except mysql.connector.Error as e:
+            print("Error:", e)
+            mysql_connection.rollback()
+            return None
+        finally:
+            cursor.close()
+            mysql_connection.close()
@@ -1,36 +1,15 @@
 # models/notification_model.py
-import requests
 from datetime import datetime
 from config import Config
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from models import notification_outbox
+from models.smtp_pool import smtp_pool
+from models.sms_dispatcher import sms_dispatcher
 
 class NotificationModel:
     @staticmethod
-    def send_email_notification(to_email, subject, message, user_name=""):
-        """
-        Send email using Gmail SMTP (Easy & Free)
-        What this does: Sends professional emails about adoption status
-        Why: Users need to know when their application status changes
-        """
-        try:
-            # Gmail SMTP configuration
-            smtp_server = "smtp.gmail.com"
-            smtp_port = 587
-            
-            # Your Gmail credentials (use App Password, not regular password)
-            from_email = Config.EMAIL_USER  # Your Gmail
-            from_password = Config.EMAIL_PASSWORD  # Your Gmail App Password
-            
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = from_email
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            # HTML email body
-            html_body = f"""
+    def render_email_html(message, user_name=""):
+        """Wrap a message in the standard adoption-update email layout"""
+        return f"""
             <html>
             <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
                 <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 10px;">
@@ -48,17 +27,41 @@ class NotificationModel:
             </body>
             </html>
             """
-            
-            msg.attach(MIMEText(html_body, 'html'))
-            
-            # Send email
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(from_email, from_password)
-            text = msg.as_string()
-            server.sendmail(from_email, to_email, text)
-            server.quit()
-            
+    
+    @staticmethod
+    def deliver_email(to_email, subject, html_body):
+        """
+        Hand one rendered email to the SMTP server over a pooled session (models/smtp_pool.py); raises on failure
+        Credentials are only sent over STARTTLS, so a local sink needs SMTP_STARTTLS=0 and no login
+        """
+        smtp_pool.send(to_email, subject, html_body)
+    
+    @staticmethod
+    def deliver_email_batch(messages):
+        """
+        Send [(to_email, subject, html_body)] back to back over one pooled session
+        Returns one entry per message: None when accepted, else the exception
+        """
+        return smtp_pool.send_batch(messages)
+    
+    @staticmethod
+    def deliver_sms(to_phone, body):
+        """
+        Send one SMS through the Twilio Messages API (Config.TWILIO_API_URL); raises on failure
+        Goes through the shared dispatcher (models/sms_dispatcher.py): kept-alive connections, rate limit, retries
+        Returns the message SID
+        """
+        return sms_dispatcher.send(to_phone, body)
+    
+    @staticmethod
+    def send_email_notification(to_email, subject, message, user_name=""):
+        """
+        Send email using Gmail SMTP (Easy & Free)
+        What this does: Sends professional emails about adoption status
+        Why: Users need to know when their application status changes
+        """
+        try:
+            NotificationModel.deliver_email(to_email, subject, NotificationModel.render_email_html(message, user_name))
             print(f"Email sent successfully to {to_email}")
             return True
             
@@ -74,83 +77,106 @@ class NotificationModel:
         Why: Instant notification for important updates
         """
         try:
-            from twilio.rest import Client
-            
-            # Twilio credentials
-            account_sid = Config.TWILIO_ACCOUNT_SID
-            auth_token = Config.TWILIO_AUTH_TOKEN
-            from_phone = Config.TWILIO_PHONE_NUMBER
-            
-            client = Client(account_sid, auth_token)
-            
-            # Send SMS
-            message = client.messages.create(
-                body=f"🐾 Pet Adoption Update: {message}",
-                from_=from_phone,
-                to=to_phone
-            )
-            
-            print(f"SMS sent successfully to {to_phone}, SID: {message.sid}")
+            sid = NotificationModel.deliver_sms(to_phone, f"🐾 Pet Adoption Update: {message}")
+            print(f"SMS sent successfully to {to_phone}, SID: {sid}")
             return True
             
         except Exception as e:
             print(f"SMS sending failed: {e}")
             return False
     
+    @staticmethod
+    def adoption_status_messages(application_data, new_status):
+        """Subject, email body and SMS text for a status change, or None for statuses we don't announce"""
+        pet_name = application_data.get('pet_name') or 'Pet'
+        
+        # Create status-specific messages
+        status_messages = {
+            'approved': {
+                'subject': f'🎉 Your adoption application for {pet_name} has been APPROVED!',
+                'email_body': f"""
+                    <h3 style="color: #27ae60;">Congratulations! Your application has been approved!</h3>
+                    <p><strong>Pet:</strong> {pet_name}</p>
+                    <p><strong>Status:</strong> APPROVED ✅</p>
+                    <p>The shelter will contact you soon to arrange the adoption process. Please have your ID and any required documents ready.</p>
+                    <p style="color: #27ae60;"><strong>Next steps:</strong> Wait for shelter contact within 24-48 hours.</p>
+                """,
+                'sms_body': f"Great news! Your adoption application for {pet_name} has been APPROVED! The shelter will contact you soon. 🎉"
+            },
+            'rejected': {
+                'subject': f'Update on your adoption application for {pet_name}',
+                'email_body': f"""
+                    <h3 style="color: #e74c3c;">Application Update</h3>
+                    <p><strong>Pet:</strong> {pet_name}</p>
+                    <p><strong>Status:</strong> Not approved at this time</p>
+                    <p>Unfortunately, your application was not selected for this pet. This doesn't reflect on you personally - many factors influence adoption decisions.</p>
+                    <p style="color: #3498db;"><strong>Don't give up!</strong> There are many other wonderful pets looking for homes. Keep browsing our available pets!</p>
+                    {f"<p><strong>Shelter notes:</strong> {application_data.get('review_notes', '')}</p>" if application_data.get('review_notes') else ''}
+                """,
+                'sms_body': f"Your application for {pet_name} was not selected this time. Don't give up - check out other amazing pets available for adoption!"
+            },
+            'under_review': {
+                'subject': f'Your adoption application for {pet_name} is under review',
+                'email_body': f"""
+                    <h3 style="color: #f39c12;">Application Under Review</h3>
+                    <p><strong>Pet:</strong> {pet_name}</p>
+                    <p><strong>Status:</strong> Under Review 🔍</p>
+                    <p>Great news! The shelter is now reviewing your application. They'll carefully consider all aspects of your application.</p>
+                    <p><strong>Typical review time:</strong> 2-5 business days</p>
+                    <p>We'll notify you as soon as there's an update!</p>
+                """,
+                'sms_body': f"Your application for {pet_name} is now under review! You'll hear back within 2-5 business days."
+            }
+        }
+        return status_messages.get(new_status)
+    
+    @staticmethod
+    def queue_adoption_status_notification(cursor, application_data, new_status):
+        """
+        Write the status-change email and SMS to the notification outbox on the caller's cursor
+        What this does: Records what to send in the same transaction as the status change
+        Why: Sending from the request thread made every review wait on Gmail and Twilio
+        
+        Returns the number of messages queued; the outbox worker delivers them
+        """
+        message_content = NotificationModel.adoption_status_messages(application_data, new_status)
+        if not message_content:
+            return 0
+        user_name = application_data.get('applicant_name') or 'Adopter'
+        application_id = application_data.get('application_id')
+        queued = 0
+        if application_data.get('email'):
+            notification_outbox.enqueue(
+                cursor, 'email', application_data['email'],
+                NotificationModel.render_email_html(message_content['email_body'], user_name),
+                subject=message_content['subject'], application_id=application_id
+            )
+            queued += 1
+        if application_data.get('phone'):
+            notification_outbox.enqueue(
+                cursor, 'sms', application_data['phone'], f"🐾 Pet Adoption Update: {message_content['sms_body']}",
+                application_id=application_id
+            )
+            queued += 1
+        return queued
+    
     @staticmethod
     def send_adoption_status_notification(application_data, old_status, new_status):
         """
         Send notification when adoption status changes
         What this does: Automatically notifies users of status changes
         Why: Users should know immediately when status updates
+        
+        Sends inline; status changes made through AdoptionModel.update_application_status are
+        queued to the outbox instead (queue_adoption_status_notification)
         """
         try:
             user_name = application_data.get('applicant_name', 'Adopter')
             user_email = application_data.get('email')
             user_phone = application_data.get('phone')
-            pet_name = application_data.get('pet_name', 'Pet')
-            
-            # Create status-specific messages
-            status_messages = {
-                'approved': {
-                    'subject': f'🎉 Your adoption application for {pet_name} has been APPROVED!',
-                    'email_body': f"""
-                        <h3 style="color: #27ae60;">Congratulations! Your application has been approved!</h3>
-                        <p><strong>Pet:</strong> {pet_name}</p>
-                        <p><strong>Status:</strong> APPROVED ✅</p>
-                        <p>The shelter will contact you soon to arrange the adoption process. Please have your ID and any required documents ready.</p>
-                        <p style="color: #27ae60;"><strong>Next steps:</strong> Wait for shelter contact within 24-48 hours.</p>
-                    """,
-                    'sms_body': f"Great news! Your adoption application for {pet_name} has been APPROVED! The shelter will contact you soon. 🎉"
-                },
-                'rejected': {
-                    'subject': f'Update on your adoption application for {pet_name}',
-                    'email_body': f"""
-                        <h3 style="color: #e74c3c;">Application Update</h3>
-                        <p><strong>Pet:</strong> {pet_name}</p>
-                        <p><strong>Status:</strong> Not approved at this time</p>
-                        <p>Unfortunately, your application was not selected for this pet. This doesn't reflect on you personally - many factors influence adoption decisions.</p>
-                        <p style="color: #3498db;"><strong>Don't give up!</strong> There are many other wonderful pets looking for homes. Keep browsing our available pets!</p>
-                        {f"<p><strong>Shelter notes:</strong> {application_data.get('review_notes', '')}</p>" if application_data.get('review_notes') else ''}
-                    """,
-                    'sms_body': f"Your application for {pet_name} was not selected this time. Don't give up - check out other amazing pets available for adoption!"
-                },
-                'under_review': {
-                    'subject': f'Your adoption application for {pet_name} is under review',
-                    'email_body': f"""
-                        <h3 style="color: #f39c12;">Application Under Review</h3>
-                        <p><strong>Pet:</strong> {pet_name}</p>
-                        <p><strong>Status:</strong> Under Review 🔍</p>
-                        <p>Great news! The shelter is now reviewing your application. They'll carefully consider all aspects of your application.</p>
-                        <p><strong>Typical review time:</strong> 2-5 business days</p>
-                        <p>We'll notify you as soon as there's an update!</p>
-                    """,
-                    'sms_body': f"Your application for {pet_name} is now under review! You'll hear back within 2-5 business days."
-                }
-            }
             
             # Get message content
-            message_content = status_messages.get(new_status)
+            message_content = NotificationModel.adoption_status_messages(application_data, new_status)
             if not message_content:
                 return False
             
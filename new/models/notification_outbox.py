@@ -0,0 +1,292 @@
+# models/notification_outbox.py
+#
+# Transactional outbox for user notifications (adoption status emails and SMS).
+#
+# Writers insert notification_outbox rows on their own cursor, in the same transaction as the change
+# being announced, so a committed status change always has its notification and a rolled-back one
+# never does. A worker (python manage.py notification-worker, or a thread in the app when
+# NOTIFICATION_WORKER_IN_APP=1) claims due rows, delivers them from a thread pool, and records the result:
+#
+#   pending --claim--> sending --ok--> sent
+#                         |--error--> pending again after an exponential backoff
+#                         '--error on the last attempt--> dead (kept for inspection, never retried)
+#
+# A claim is a lease: rows left in 'sending' by a crashed worker become claimable again once
+# NOTIFICATION_LEASE_SECONDS have passed, so delivery is at-least-once.
+#
+# Emails in a claimed batch are sent in runs of up to SMTP_BATCH_SIZE over one pooled SMTP session
+# each (models/smtp_pool.py); SMS go one per sender task.
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from config import Config
+from database.db_connection import connect_to_database
+
+CHANNELS = ('email', 'sms')
+MAX_ERROR_LENGTH = 500  # notification_outbox.last_error
+
+INSERT_NOTIFICATION = '''
+    INSERT INTO notification_outbox (channel, recipient, subject, body, application_id, status, attempts, next_attempt_at, created_at)
+    VALUES (%s, %s, %s, %s, %s, 'pending', 0, %s, %s)
+'''
+
+# Due rows, and rows whose lease ran out; SKIP LOCKED lets several workers claim side by side
+# without waiting on each other. Params: now, now, limit
+CLAIM_DUE = '''
+    SELECT notification_id FROM notification_outbox
+    WHERE (status = 'pending' AND next_attempt_at <= %s)
+       OR (status = 'sending' AND locked_until < %s)
+    ORDER BY next_attempt_at
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+'''
+
+
+def enqueue(cursor, channel, recipient, body, subject=None, application_id=None):
+    """Queue one message on the caller's cursor; it is sent only if the caller's transaction commits"""
+    if channel not in CHANNELS:
+        raise ValueError(f"Unknown notification channel: {channel}")
+    now = datetime.now()
+    cursor.execute(INSERT_NOTIFICATION, (channel, recipient, subject, body, application_id, now, now))
+    return cursor.lastrowid
+
+
+def retry_delay(attempts):
+    """Seconds before the next try after `attempts` failures: doubling from the base, capped, +-20% jitter"""
+    delay = min(Config.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1), Config.NOTIFICATION_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def deliver(row):
+    """Send one claimed outbox row through its channel; raises on failure"""
+    from models.notification_model import NotificationModel  # notification_model imports this module
+    if row['channel'] == 'email':
+        NotificationModel.deliver_email(row['recipient'], row['subject'], row['body'])
+    elif row['channel'] == 'sms':
+        NotificationModel.deliver_sms(row['recipient'], row['body'])
+    else:
+        raise ValueError(f"Unknown notification channel: {row['channel']}")
+
+
+def deliver_email_batch(rows):
+    """Send claimed email rows over one pooled SMTP session; one None-or-exception per row"""
+    from models.notification_model import NotificationModel
+    return NotificationModel.deliver_email_batch([(row['recipient'], row['subject'], row['body']) for row in rows])
+
+
+def _error_text(error):
+    return f"{type(error).__name__}: {error}"[:MAX_ERROR_LENGTH]
+
+
+class OutboxWorker:
+    """
+    Drains notification_outbox with a pool of sender threads
+    What this does: Claims due rows in batches, sends them concurrently, and records sent / retry / dead
+    Why: Email and SMS providers are slow and sometimes down; neither should hold up a request
+    """
+
+    def __init__(self, workers=None, batch_size=None, sender=deliver, email_batch_sender=deliver_email_batch):
+        self.workers = workers or Config.NOTIFICATION_WORKERS
+        self.batch_size = batch_size or Config.NOTIFICATION_BATCH_SIZE
+        self.sender = sender
+        self.email_batch_sender = email_batch_sender
+        self.worker_id = uuid.uuid4().hex[:16]
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {'claimed': 0, 'sent': 0, 'retried': 0, 'dead': 0}
+
+    def claim(self):
+        """Lease up to batch_size due rows to this worker and return them"""
+        conn = connect_to_database()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            now = datetime.now()
+            cursor.execute(CLAIM_DUE, (now, now, self.batch_size))
+            ids = [row['notification_id'] for row in cursor.fetchall()]
+            if not ids:
+                conn.commit()
+                return []
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(f'''
+                UPDATE notification_outbox
+                SET status = 'sending', claimed_by = %s, locked_until = %s
+                WHERE notification_id IN ({placeholders})
+            ''', [self.worker_id, now + timedelta(seconds=Config.NOTIFICATION_LEASE_SECONDS)] + ids)
+            cursor.execute(f'''
+                SELECT notification_id, channel, recipient, subject, body, attempts
+                FROM notification_outbox
+                WHERE notification_id IN ({placeholders})
+            ''', ids)
+            rows = cursor.fetchall()
+            conn.commit()
+            self._count(claimed=len(rows))
+            return rows
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _send(self, row):
+        try:
+            self.sender(row)
+            return row, None
+        except Exception as e:
+            return row, _error_text(e)
+
+    def _send_emails(self, rows):
+        try:
+            errors = self.email_batch_sender(rows)
+        except Exception as e:
+            errors = [e] * len(rows)
+        return [(row, None if error is None else _error_text(error)) for row, error in zip(rows, errors)]
+
+    def _send_group(self, group):
+        if group[0]['channel'] == 'email':
+            return self._send_emails(group)
+        return [self._send(row) for row in group]
+
+    def send_all(self, rows, pool):
+        """
+        Deliver claimed rows on the sender pool; returns [(row, error or None)]
+        Emails are split into at most one run per sender (capped at SMTP_BATCH_SIZE), each run over one session
+        """
+        emails = [row for row in rows if row['channel'] == 'email']
+        run = max(1, min(Config.SMTP_BATCH_SIZE, -(-len(emails) // self.workers)))
+        groups = [emails[start:start + run] for start in range(0, len(emails), run)]
+        groups += [[row] for row in rows if row['channel'] != 'email']
+        results = []
+        for group_results in pool.map(self._send_group, groups):
+            results.extend(group_results)
+        return results
+
+    def _record(self, results):
+        """Write the outcome of one batch: sent rows, rows to retry later, rows out of attempts"""
+        now = datetime.now()
+        sent, retry, dead = [], [], []
+        for row, error in results:
+            attempts = row['attempts'] + 1
+            if error is None:
+                sent.append((attempts, now, row['notification_id'], self.worker_id))
+            elif attempts >= Config.NOTIFICATION_MAX_ATTEMPTS:
+                dead.append((attempts, error, row['notification_id'], self.worker_id))
+                print(f"❌ Notification {row['notification_id']} ({row['channel']}) dead after {attempts} attempts: {error}")
+            else:
+                retry.append((attempts, error, now + timedelta(seconds=retry_delay(attempts)),
+                              row['notification_id'], self.worker_id))
+
+        conn = connect_to_database()
+        cursor = conn.cursor()
+        try:
+            # claimed_by guards against overwriting a row another worker re-claimed after our lease ran out
+            if sent:
+                cursor.executemany('''
+                    UPDATE notification_outbox
+                    SET status = 'sent', attempts = %s, sent_at = %s, last_error = NULL, locked_until = NULL
+                    WHERE notification_id = %s AND claimed_by = %s
+                ''', sent)
+            if retry:
+                cursor.executemany('''
+                    UPDATE notification_outbox
+                    SET status = 'pending', attempts = %s, last_error = %s, next_attempt_at = %s, locked_until = NULL
+                    WHERE notification_id = %s AND claimed_by = %s
+                ''', retry)
+            if dead:
+                cursor.executemany('''
+                    UPDATE notification_outbox
+                    SET status = 'dead', attempts = %s, last_error = %s, locked_until = NULL
+                    WHERE notification_id = %s AND claimed_by = %s
+                ''', dead)
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+        self._count(sent=len(sent), retried=len(retry), dead=len(dead))
+
+    def run_once(self, pool):
+        """Claim, send and record one batch; returns the number of rows handled"""
+        rows = self.claim()
+        if rows:
+            self._record(self.send_all(rows, pool))
+        return len(rows)
+
+    def run(self, once=False):
+        """
+        Drain the outbox until stop() (or, with once=True, until nothing is due)
+        Database errors are logged and retried after a poll interval; leased rows simply expire
+        """
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='notification-sender') as pool:
+            while not self._stop.is_set():
+                try:
+                    handled = self.run_once(pool)
+                except Exception as e:
+                    print(f"❌ Notification outbox error: {e}")
+                    handled = 0
+                if not handled:
+                    if once:
+                        return
+                    self._stop.wait(Config.NOTIFICATION_POLL_SECONDS)
+
+    def stop(self):
+        self._stop.set()
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self._stats[name] += amount
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, worker_id=self.worker_id, workers=self.workers)
+
+
+def outbox_counts():
+    """Rows per status, for monitoring the backlog and the dead letters"""
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT status, COUNT(*) FROM notification_outbox GROUP BY status')
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def requeue_dead(notification_ids=None):
+    """Give dead notifications (all, or these ids) a fresh set of attempts; returns how many"""
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    try:
+        query = '''
+            UPDATE notification_outbox
+            SET status = 'pending', attempts = 0, next_attempt_at = %s
+            WHERE status = 'dead'
+        '''
+        params = [datetime.now()]
+        if notification_ids:
+            query += f" AND notification_id IN ({', '.join(['%s'] * len(notification_ids))})"
+            params.extend(notification_ids)
+        cursor.execute(query, params)
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+        conn.close()
+
+
+_app_worker = None
+_app_worker_lock = threading.Lock()
+
+
+def start_in_app():
+    """Run one outbox worker in a daemon thread of this process (NOTIFICATION_WORKER_IN_APP)"""
+    global _app_worker
+    with _app_worker_lock:
+        if _app_worker is None:
+            _app_worker = OutboxWorker()
+            threading.Thread(target=_app_worker.run, name='notification-outbox', daemon=True).start()
+    return _app_worker
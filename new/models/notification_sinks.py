@@ -0,0 +1,187 @@
+# models/notification_sinks.py
+#
+# Local stand-ins for the email and SMS providers, for development and offline benchmarks.
+#
+#   SMTPSink        - accepts SMTP sessions (EHLO/MAIL/RCPT/DATA/NOOP/RSET/QUIT), counts messages, keeps nothing
+#   SMSGatewaySink  - answers Twilio-style POST .../Messages.json with a fake SID, and 429 past its rate limit
+#
+# Both can add a fixed latency per message and fail a fraction of requests, to see how the outbox
+# behaves against a slow or flaky provider. Point the app at them with
+#   SMTP_SERVER=127.0.0.1 SMTP_PORT=<port> SMTP_STARTTLS=0 TWILIO_API_URL=http://127.0.0.1:<port>
+# (python manage.py notification-sinks starts both and prints the settings).
+import json
+import random
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {}
+
+    def add(self, name, amount=1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.values)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write((line + '\r\n').encode('ascii'))
+        self.wfile.flush()
+
+    def handle(self):
+        sink = self.server.sink
+        sink.counters.add('sessions')
+        self._reply('220 sink.local ESMTP ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb == 'EHLO':
+                self._reply('250-sink.local')
+                self._reply('250 8BITMIME')
+            elif verb in ('HELO', 'MAIL', 'RCPT', 'RSET'):
+                self._reply('250 OK')
+            elif verb == 'NOOP':
+                sink.counters.add('noops')
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b'.\r\n', b'.\n'):
+                        break
+                if sink.latency:
+                    time.sleep(sink.latency)
+                if random.random() < sink.failure_rate:
+                    sink.counters.add('failed')
+                    self._reply('451 Temporary failure, try again later')
+                else:
+                    sink.counters.add('messages')
+                    self._reply('250 OK queued')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """
+    Threaded SMTP server that accepts and discards mail
+    latency: seconds added before each DATA is acknowledged; failure_rate: share answered with 451
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.counters = _Counters()
+        self._server = _ThreadingTCPServer((host, port), _SMTPHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name='smtp-sink', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self):
+        return self.counters.snapshot()
+
+
+class _SMSHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body are separate writes; Nagle would add ~40 ms per response
+
+    def do_POST(self):
+        sink = self.server.sink
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if sink.latency:
+            time.sleep(sink.latency)
+        extra_headers = {}
+        if sink.over_limit():
+            sink.counters.add('throttled')
+            status, payload = 429, {'code': 20429, 'message': 'Too Many Requests (sink)'}
+            extra_headers['Retry-After'] = '1'
+        elif random.random() < sink.failure_rate:
+            sink.counters.add('failed')
+            status, payload = 503, {'code': 20503, 'message': 'Service unavailable (sink)'}
+        elif not self.path.endswith('/Messages.json'):
+            status, payload = 404, {'code': 20404, 'message': 'Not found'}
+        else:
+            sink.counters.add('messages')
+            status, payload = 201, {'sid': 'SM' + uuid.uuid4().hex, 'status': 'queued'}
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in extra_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # One line per message would drown a benchmark
+
+
+class SMSGatewaySink:
+    """
+    Threaded HTTP server that answers Twilio Messages API calls with a fake SID
+    rate_limit: requests accepted per second (per one-second window) before answering 429; None for no limit
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, rate_limit=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self._window = (0, 0)  # (second, requests in it)
+        self._window_lock = threading.Lock()
+        self.counters = _Counters()
+        self._server = ThreadingHTTPServer((host, port), _SMSHandler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self.host, self.port = self._server.server_address
+
+    def over_limit(self):
+        if not self.rate_limit:
+            return False
+        with self._window_lock:
+            second, used = self._window
+            now = int(time.monotonic())
+            if now != second:
+                second, used = now, 0
+            self._window = (second, used + 1)
+            return used >= self.rate_limit
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name='sms-sink', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self):
+        return self.counters.snapshot()
@@ -0,0 +1,548 @@
+# models/pet_catalog.py
+import sys
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+from config import Config
+from database.db_connection import connect_to_database
+from models import catalog_events
+from models.pet_status import PetStatus
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: without NumPy every search runs in SQL
+    np = None
+
+
+CATALOG_PETS_QUERY = '''
+    SELECT p.pet_id, p.name, p.category, p.species, p.gender, p.breed, p.age, p.created_at,
+           p.shelter_id, s.location, COALESCE(ms.is_vaccinated, 0) AS is_vaccinated
+    FROM pets p
+    LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
+    LEFT JOIN pet_medical_summary ms ON p.pet_id = ms.pet_id
+    WHERE p.adoption_state = %s
+'''
+
+
+class _Dictionary:
+    """
+    Lower-cased string values <-> int32 codes, plus each code's rank in sorted order
+    Codes never move; ranks are kept current so ORDER BY a string column is an integer sort
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+        self._sorted = []
+        self._ranks = np.zeros(0, dtype=np.int32)
+        self._bulk = False
+
+    def begin_bulk(self):
+        self._bulk = True
+
+    def end_bulk(self):
+        self._bulk = False
+        self._sorted = sorted(self.values)
+        positions = {value: rank for rank, value in enumerate(self._sorted)}
+        self._ranks = np.fromiter((positions[value] for value in self.values), dtype=np.int32, count=len(self.values))
+
+    def encode(self, value):
+        """Code for `value`, adding it if new; None stays -1"""
+        if value is None:
+            return -1
+        value = str(value).strip().lower()
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            if not self._bulk:
+                rank = bisect_left(self._sorted, value)
+                self._sorted.insert(rank, value)
+                self._ranks[self._ranks >= rank] += 1
+                self._ranks = np.append(self._ranks, np.int32(rank))
+        return code
+
+    def lookup(self, value):
+        """Code of an existing value; -2 (matches nothing) when unknown"""
+        return self.codes.get(str(value).strip().lower(), -2)
+
+    def containing(self, text):
+        """Codes whose value contains `text` (LIKE '%text%')"""
+        text = str(text).strip().lower()
+        return np.fromiter((code for value, code in self.codes.items() if text in value), dtype=np.int32)
+
+    def ranks(self, codes):
+        """Sort rank per code; NULL (-1) ranks first like in MySQL"""
+        lookup = np.append(self._ranks, np.int32(-1))  # index -1 -> NULL
+        return lookup[codes]
+
+    def rank_of(self, value):
+        """(rank, exists) of a cursor value; a vanished value ranks where it would be inserted"""
+        if value is None:
+            return -1, True
+        value = str(value).strip().lower()
+        code = self.codes.get(value)
+        if code is not None:
+            return int(self._ranks[code]), True
+        return bisect_left(self._sorted, value), False
+
+
+def _normalize(value):
+    return None if value is None else str(value).strip().lower()
+
+
+class _NameOrder:
+    """
+    Distinct lower-cased names in sorted order, packed into one UTF-8 buffer with int32 offsets
+    Names are nearly unique, so a str object plus a dict entry per pet would outweigh every array together;
+    here a name costs its bytes plus four. Indexable, so bisect searches it directly
+    """
+
+    def __init__(self):
+        self._blob = b''
+        self._offsets = np.zeros(1, dtype=np.int32)
+
+    def __len__(self):
+        return self._offsets.size - 1
+
+    def __getitem__(self, index):
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].decode()
+
+    @property
+    def nbytes(self):
+        return sys.getsizeof(self._blob) + int(self._offsets.nbytes)
+
+    def load(self, names):
+        """Replace the contents with the distinct `names`; returns each name's rank (-1 for None)"""
+        ordered = sorted({name for name in names if name is not None})
+        encoded = [name.encode() for name in ordered]
+        self._blob = b''.join(encoded)
+        self._offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int32, count=len(encoded)), out=self._offsets[1:])
+        positions = {name: rank for rank, name in enumerate(ordered)}
+        return np.fromiter((-1 if name is None else positions[name] for name in names), dtype=np.int32,
+                           count=len(names))
+
+    def add(self, name):
+        """(rank, inserted) of `name`; when inserted, every rank from it upwards has moved up by one"""
+        rank, exists = self.rank_of(name)
+        if exists:
+            return rank, False
+        encoded = name.encode()
+        start = int(self._offsets[rank])
+        self._blob = self._blob[:start] + encoded + self._blob[start:]
+        self._offsets = np.concatenate((self._offsets[:rank + 1], self._offsets[rank:] + len(encoded)))
+        return rank, True
+
+    def rank_of(self, name):
+        """(rank, exists); an unknown name ranks where it would be inserted"""
+        rank = bisect_left(self, name)
+        return rank, rank < len(self) and self[rank] == name
+
+
+class PetCatalog:
+    """
+    Columnar snapshot of available pets
+    What this does: Keeps one compact array per attribute (dictionary codes, ages, ids) so structured
+                    filters become boolean masks and ordering becomes an integer partial sort
+    Why: Category/species/age/vaccinated filters are cheap predicates; paying a three-way join for them on
+         every search is not. The database then only fetches the ids of the one page being shown
+
+    Memory is about 60 bytes per pet: the column arrays take 40 bytes per slot (up to twice that with growth
+    headroom), the sorted pet_id index 8, and a name its UTF-8 bytes plus a 4-byte offset. The remaining value
+    dictionaries hold few distinct values. That keeps a million pets under 100 MB per worker; stats() reports
+    the measured total as memory_bytes and bytes_per_pet.
+    """
+
+    # Dictionary-coded columns; names are nearly unique, so they only keep a sort rank (see _NameOrder)
+    CATEGORICAL = ('category', 'species', 'gender', 'breed', 'location')
+
+    # Filters answered here; anything else (e.g. size) sends the search to SQL
+    FILTERS = ('category', 'species', 'gender', 'breed', 'location', 'min_age', 'max_age', 'vaccinated',
+               'search_text', 'near', 'radius_km')
+
+    # sort_by -> how to get an integer key per row
+    SORTS = ('name', 'breed', 'species', 'age', 'created_at')
+
+    _ID_BITS = 31  # pet ids are MySQL INT, so below 2**31
+
+    def __init__(self, capacity=1024):
+        self._lock = threading.RLock()
+        self.built_at = None
+        self._dicts = {column: _Dictionary() for column in self.CATEGORICAL}
+        self._names = _NameOrder()
+        # pet_id -> slot: live ids kept sorted, searched with np.searchsorted
+        self._index_ids = np.zeros(0, dtype=np.int32)
+        self._index_slots = np.zeros(0, dtype=np.int32)
+        self._free = []   # slots of removed pets, reused first
+        self._size = 0    # slots in use, including freed ones
+        self.revision = 0  # bumped on every write, so derived structures know when to rebuild
+
+        self._pet_id = np.zeros(capacity, dtype=np.int32)
+        self._codes = {column: np.full(capacity, -1, dtype=np.int32) for column in self.CATEGORICAL}
+        self._name_rank = np.full(capacity, -1, dtype=np.int32)    # position in self._names, -1 = NULL
+        self._age = np.full(capacity, -1, dtype=np.int16)          # -1 = NULL
+        self._created = np.full(capacity, -1, dtype=np.int32)      # epoch seconds, -1 = NULL
+        self._shelter = np.full(capacity, -1, dtype=np.int32)
+        self._vaccinated = np.zeros(capacity, dtype=np.int8)
+        self._alive = np.zeros(capacity, dtype=np.bool_)
+
+    def _grow(self):
+        def grow(array, fill):
+            fresh = np.full(len(array) * 2, fill, dtype=array.dtype)
+            fresh[:len(array)] = array
+            return fresh
+
+        self._pet_id = grow(self._pet_id, 0)
+        self._codes = {column: grow(array, -1) for column, array in self._codes.items()}
+        self._name_rank = grow(self._name_rank, -1)
+        self._age = grow(self._age, -1)
+        self._created = grow(self._created, -1)
+        self._shelter = grow(self._shelter, -1)
+        self._vaccinated = grow(self._vaccinated, 0)
+        self._alive = grow(self._alive, False)
+
+    def _find(self, pet_id):
+        """(index position, slot or None) of pet_id"""
+        position = int(np.searchsorted(self._index_ids, pet_id))
+        if position < self._index_ids.size and self._index_ids[position] == pet_id:
+            return position, int(self._index_slots[position])
+        return position, None
+
+    def _new_slot(self):
+        if self._free:
+            return self._free.pop()
+        if self._size == len(self._pet_id):
+            self._grow()
+        self._size += 1
+        return self._size - 1
+
+    def _store(self, slot, row):
+        self._pet_id[slot] = row['pet_id']
+        for column in self.CATEGORICAL:
+            self._codes[column][slot] = self._dicts[column].encode(row.get(column))
+        age = row.get('age')
+        self._age[slot] = -1 if age is None else int(age)
+        created = row.get('created_at')
+        self._created[slot] = -1 if created is None else int(created.timestamp())
+        shelter_id = row.get('shelter_id')
+        self._shelter[slot] = -1 if shelter_id is None else shelter_id
+        self._vaccinated[slot] = 1 if row.get('is_vaccinated') else 0
+        self._alive[slot] = True
+        self.revision += 1
+
+    def build(self, rows):
+        """
+        Load every available pet; rows may be any iterable (streamed from the database)
+        Into an empty catalog the id index and name ranks are built once at the end, so rows need distinct pet_ids
+        """
+        with self._lock:
+            if self._index_ids.size:
+                for row in rows:
+                    self._upsert(row)
+                self.built_at = time.monotonic()
+                return
+
+            names = []
+            for dictionary in self._dicts.values():
+                dictionary.begin_bulk()
+            try:
+                for row in rows:
+                    self._store(self._new_slot(), row)
+                    names.append(_normalize(row.get('name')))
+            finally:
+                for dictionary in self._dicts.values():
+                    dictionary.end_bulk()
+            order = np.argsort(self._pet_id[:self._size], kind='stable')
+            self._index_ids = self._pet_id[order]
+            self._index_slots = order.astype(np.int32)
+            self._name_rank[:self._size] = self._names.load(names)
+            self.built_at = time.monotonic()
+
+    def _upsert(self, row):
+        pet_id = row['pet_id']
+        position, slot = self._find(pet_id)
+        if slot is None:
+            slot = self._new_slot()
+            self._index_ids = np.insert(self._index_ids, position, pet_id)
+            self._index_slots = np.insert(self._index_slots, position, slot)
+        self._store(slot, row)
+
+        name = _normalize(row.get('name'))
+        rank = -1
+        if name is not None:
+            rank, inserted = self._names.add(name)
+            if inserted:
+                ranks = self._name_rank[:self._size]
+                ranks[ranks >= rank] += 1
+        self._name_rank[slot] = rank
+
+    def upsert(self, row):
+        with self._lock:
+            self._upsert(row)
+
+    def remove(self, pet_id):
+        with self._lock:
+            position, slot = self._find(pet_id)
+            if slot is not None:
+                self._index_ids = np.delete(self._index_ids, position)
+                self._index_slots = np.delete(self._index_slots, position)
+                self._alive[slot] = False
+                self._free.append(slot)
+                self.revision += 1
+
+    @property
+    def fresh(self):
+        return self.built_at is not None and time.monotonic() - self.built_at < Config.SEARCH_CATALOG_MAX_AGE_SECONDS
+
+    def supports(self, filter_keys, sort_by):
+        """Whether these filters and this ordering can be answered from the arrays alone"""
+        if sort_by is not None and sort_by not in self.SORTS:
+            return False
+        return all(key in self.FILTERS for key in filter_keys)
+
+    def _sort_key(self, sort_by, slots):
+        if sort_by == 'age':
+            return self._age[slots].astype(np.int64)
+        if sort_by == 'created_at':
+            return self._created[slots].astype(np.int64)
+        if sort_by == 'name':
+            return self._name_rank[slots].astype(np.int64)
+        return self._dicts[sort_by].ranks(self._codes[sort_by][slots]).astype(np.int64)
+
+    def _cursor_key(self, sort_by, cursor_key):
+        """(key, exists) for the cursor's sort value, on the same scale as _sort_key"""
+        value = cursor_key['k']
+        if sort_by == 'name':
+            return (-1, True) if value is None else self._names.rank_of(_normalize(value))
+        if sort_by in self._dicts:
+            return self._dicts[sort_by].rank_of(value)
+        if value is None:
+            return -1, True
+        if sort_by == 'created_at':
+            return int(datetime.fromisoformat(str(value)).timestamp()), True
+        return int(value), True
+
+    def _composite(self, keys, ids):
+        # (key, pet_id) packed into one int64 so one partial sort orders by both; NULL keys (-1) come first
+        return ((keys + 1) << self._ID_BITS) | ids
+
+    def search(self, filters, sort_by, sort_order, limit, offset, cursor_key=None,
+               candidate_ids=None, shelter_ids=None):
+        """
+        One page of matching pet ids: (page_ids, total_matches, has_more)
+        candidate_ids / shelter_ids are the text-index and radius prefilters already resolved by the caller
+        """
+        with self._lock:
+            n = self._size
+            mask = self._alive[:n].copy()
+
+            for column in ('category', 'species', 'gender'):
+                if filters.get(column):
+                    mask &= self._codes[column][:n] == self._dicts[column].lookup(filters[column])
+            for column in ('breed', 'location'):
+                if filters.get(column):
+                    mask &= np.isin(self._codes[column][:n], self._dicts[column].containing(filters[column]))
+            ages = self._age[:n]
+            if filters.get('min_age'):
+                mask &= (ages >= int(filters['min_age'])) & (ages >= 0)
+            if filters.get('max_age'):
+                mask &= (ages <= int(filters['max_age'])) & (ages >= 0)
+            if filters.get('vaccinated'):
+                mask &= self._vaccinated[:n] == (1 if str(filters['vaccinated']).lower() == 'true' else 0)
+            if candidate_ids is not None:
+                mask &= np.isin(self._pet_id[:n], np.asarray(candidate_ids, dtype=np.int32))
+            if shelter_ids is not None:
+                mask &= np.isin(self._shelter[:n], np.asarray(shelter_ids, dtype=np.int32))
+
+            slots = np.flatnonzero(mask)
+            total = int(slots.size)
+            if not sort_by:
+                page = slots[offset:offset + limit + 1]
+                return self._pet_id[page].tolist()[:limit], total, page.size > limit
+
+            ids = self._pet_id[slots].astype(np.int64)
+            composite = self._composite(self._sort_key(sort_by, slots), ids)
+            descending = sort_order == 'DESC'
+
+            if cursor_key:
+                # Rows strictly after the cursor; a value that has since vanished sits just before its successors
+                key, exists = self._cursor_key(sort_by, cursor_key)
+                boundary = self._composite(np.int64(key), np.int64(cursor_key['id'] if exists else 0))
+                if descending:
+                    composite = composite[composite < boundary]
+                else:
+                    composite = composite[composite > (boundary if exists else boundary - 1)]
+                offset = 0
+
+            if descending:
+                composite = -composite
+            wanted = offset + limit + 1
+            if wanted < composite.size:
+                composite = composite[np.argpartition(composite, wanted - 1)[:wanted]]
+            composite.sort()
+            if descending:
+                composite = -composite
+            page = composite[offset:offset + limit + 1] & ((1 << self._ID_BITS) - 1)
+
+        page_ids = page.tolist()
+        return page_ids[:limit], total, len(page_ids) > limit
+
+    def feature_snapshot(self, columns):
+        """
+        Consistent copy of the live rows for scoring outside the lock
+        Returns pet_id / age / created / shelter arrays, the codes of each requested column, a
+        `vocabulary` per column (value -> code, plus how many codes exist) and the revision it reflects
+        """
+        with self._lock:
+            slots = np.flatnonzero(self._alive[:self._size])
+            return {
+                'revision': self.revision,
+                'pet_id': self._pet_id[slots],
+                'age': self._age[slots],
+                'created': self._created[slots],
+                'shelter': self._shelter[slots],
+                'codes': {column: self._codes[column][slots] for column in columns},
+                'vocabulary': {column: (dict(self._dicts[column].codes), len(self._dicts[column].values))
+                               for column in columns},
+            }
+
+    def stats(self):
+        with self._lock:
+            arrays = [self._pet_id, self._name_rank, self._age, self._created, self._shelter, self._vaccinated,
+                      self._alive, self._index_ids, self._index_slots]
+            arrays += list(self._codes.values())
+            array_bytes = int(sum(array.nbytes for array in arrays))
+            # Names, the free-slot list and the (small) value dictionaries live outside the arrays
+            object_bytes = self._names.nbytes + sys.getsizeof(self._free)
+            for dictionary in self._dicts.values():
+                object_bytes += (sys.getsizeof(dictionary.codes) + sys.getsizeof(dictionary.values)
+                                 + sys.getsizeof(dictionary._sorted) + int(dictionary._ranks.nbytes)
+                                 + sum(sys.getsizeof(value) + sys.getsizeof(code)
+                                       for value, code in dictionary.codes.items()))
+            pets = int(self._index_ids.size)
+            return {
+                'pets': pets,
+                'slots': self._size,
+                'array_bytes': array_bytes,        # Column arrays at their allocated capacity, plus the id index
+                'memory_bytes': array_bytes + object_bytes,
+                'bytes_per_pet': round((array_bytes + object_bytes) / pets) if pets else None,
+                'distinct_values': {'name': len(self._names),
+                                    **{column: len(d.values) for column, d in self._dicts.items()}},
+                'age_seconds': None if self.built_at is None else round(time.monotonic() - self.built_at, 1),
+            }
+
+
+# One catalog per worker process, swapped whole on rebuild
+pet_catalog = None
+_rebuild_lock = threading.Lock()
+_rebuild_thread = None
+_pending_ids = None  # pets written while a rebuild was loading
+
+
+def _stream_rows(cursor, batch=10000):
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            return
+        yield from rows
+
+
+def _load(extra_condition='', params=()):
+    conn = connect_to_database()
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(CATALOG_PETS_QUERY + extra_condition, (PetStatus.AVAILABLE,) + tuple(params))
+        return list(_stream_rows(cursor))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def rebuild():
+    """Load a fresh catalog and swap it in; writes that land during the load are replayed"""
+    global pet_catalog, _pending_ids
+    with _rebuild_lock:
+        _pending_ids = set()
+    started = time.monotonic()
+    catalog = PetCatalog()
+    conn = connect_to_database()
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(CATALOG_PETS_QUERY, (PetStatus.AVAILABLE,))
+        catalog.build(_stream_rows(cursor))
+    finally:
+        cursor.close()
+        conn.close()
+
+    with _rebuild_lock:
+        pending, _pending_ids = _pending_ids, None
+        pet_catalog = catalog
+    for pet_id in pending:
+        _refresh_pet(pet_id)
+    print(f"🗂️ Pet catalog built: {catalog.stats()['pets']} pets in {time.monotonic() - started:.1f}s")
+    return catalog
+
+
+def _rebuild_in_background():
+    try:
+        rebuild()
+    except Exception as e:
+        print(f"❌ Pet catalog rebuild failed (searches stay on SQL): {e}")
+
+
+def get_catalog():
+    """
+    The catalog if it can answer searches right now, else None
+    A missing or stale catalog starts one background rebuild; callers use SQL meanwhile
+    """
+    global _rebuild_thread
+    if np is None or not Config.SEARCH_CATALOG_ENABLED:
+        return None
+    catalog = pet_catalog
+    if catalog is not None and catalog.fresh:
+        return catalog
+    with _rebuild_lock:
+        if _rebuild_thread is None or not _rebuild_thread.is_alive():
+            _rebuild_thread = threading.Thread(target=_rebuild_in_background, name='pet-catalog-rebuild', daemon=True)
+            _rebuild_thread.start()
+    return None
+
+
+def _refresh_pet(pet_id, **_):
+    with _rebuild_lock:
+        if _pending_ids is not None:
+            _pending_ids.add(pet_id)
+    catalog = pet_catalog
+    if catalog is None:
+        return
+    rows = _load(' AND p.pet_id = %s', (pet_id,))
+    if rows:
+        catalog.upsert(rows[0])
+    else:
+        catalog.remove(pet_id)
+
+
+def _drop_pet(pet_id, **_):
+    with _rebuild_lock:
+        if _pending_ids is not None:
+            _pending_ids.add(pet_id)
+    if pet_catalog is not None:
+        pet_catalog.remove(pet_id)
+
+
+def _refresh_shelter(shelter_id, **_):
+    catalog = pet_catalog
+    if catalog is None:
+        return
+    for row in _load(' AND p.shelter_id = %s', (shelter_id,)):
+        catalog.upsert(row)
+
+
+catalog_events.subscribe('pet_added', _refresh_pet)
+catalog_events.subscribe('pet_status_changed', _refresh_pet)
+catalog_events.subscribe('medical_updated', _refresh_pet)
+catalog_events.subscribe('pet_deleted', _drop_pet)
+catalog_events.subscribe('shelter_updated', _refresh_shelter)
@@ -1,5 +1,9 @@
 import mysql.connector
+from config import Config
 from database.db_connection import connect_to_database
+from models.pet_status import PetStatus
+from models import catalog_events
+from models import pet_neighbors  # Keeps pet_neighbors current on pet writes
 
 class PetModel:
     @staticmethod
@@ -37,8 +41,8 @@ class PetModel:
                 mysql_connection.close()
                 return []
         elif role == 'adopter':
-            query = "SELECT * FROM pets WHERE adoption_status = 'Not Adopted'"
-            cursor.execute(query)
+            query = "SELECT * FROM pets WHERE adoption_state = %s"
+            cursor.execute(query, (PetStatus.AVAILABLE,))
         else:
             cursor.close()
             mysql_connection.close()
@@ -119,6 +123,36 @@ class PetModel:
         mysql_connection.close()
         return pet_data
     
+    @staticmethod
+    def get_similar_pets(pet_id, limit=None):
+        """
+        Available pets most like this one, most similar first
+        What this does: Reads the precomputed pet_neighbors list (one primary-key range)
+        Why: A pet page needs alternatives, especially once that pet is adopted
+        """
+        limit = min(limit or Config.PET_NEIGHBORS_K, Config.PET_NEIGHBORS_K)
+        mysql_connection = connect_to_database()
+        cursor = mysql_connection.cursor(dictionary=True)
+        
+        try:
+            cursor.execute(f'''
+                SELECT p.pet_id, p.name, p.category, p.species, p.breed, p.age, p.gender, p.image,
+                       p.shelter_id, s.shelter_name, s.location AS shelter_location, n.similarity
+                FROM pet_neighbors n
+                JOIN pets p ON p.pet_id = n.neighbor_id
+                LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
+                WHERE n.pet_id = %s AND p.adoption_state = {PetStatus.AVAILABLE}
+                ORDER BY n.position
+                LIMIT %s
+            ''', (pet_id, limit))
+            return cursor.fetchall()
+        except mysql.connector.Error as e:
+            print("Error:", e)
+            return []
+        finally:
+            cursor.close()
+            mysql_connection.close()
+    
     @staticmethod
     def add_pet(category, name, species, gender, age, breed, image, shelter_id=None, created_by=None):
         """Add new pet to database with user tracking - UPDATED METHOD"""
@@ -126,10 +160,12 @@ class PetModel:
         cursor = mysql_connection.cursor()
         
         try:
-            insert_query = "INSERT INTO pets (category, name, species, gender, age, breed, image, shelter_id, created_by) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
-            cursor.execute(insert_query, (category, name, species, gender, age, breed, image, shelter_id, created_by))
+            insert_query = "INSERT INTO pets (category, name, species, gender, age, breed, image, shelter_id, created_by, adoption_status, adoption_state) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+            cursor.execute(insert_query, (category, name, species, gender, age, breed, image, shelter_id, created_by,
+                                          PetStatus.label(PetStatus.AVAILABLE), PetStatus.AVAILABLE))
             mysql_connection.commit()
             pet_id = cursor.lastrowid
+            catalog_events.publish('pet_added', pet_id=pet_id)
             return pet_id
         except mysql.connector.Error as e:
             print("Error:", e)
@@ -146,15 +182,17 @@ class PetModel:
         cursor = mysql_connection.cursor()
         
         try:
-            # Delete medical records first
+            # Delete medical records (and their summary) first
             delete_medical_query = "DELETE FROM medical_records WHERE pet_id = %s"
             cursor.execute(delete_medical_query, (pet_id,))
+            cursor.execute("DELETE FROM pet_medical_summary WHERE pet_id = %s", (pet_id,))
             mysql_connection.commit()
             
             # Then delete the pet
             delete_query = "DELETE FROM pets WHERE pet_id = %s"
             cursor.execute(delete_query, (pet_id,))
             mysql_connection.commit()
+            catalog_events.publish('pet_deleted', pet_id=pet_id)
             return True
         except mysql.connector.Error as e:
             print("Error:", e)
@@ -165,15 +203,17 @@ class PetModel:
             mysql_connection.close()
     
     @staticmethod
-    def update_adoption_status(pet_id, status='Adopted'):
-        """Update pet adoption status"""
+    def update_adoption_status(pet_id, status=PetStatus.ADOPTED):
+        """Update pet adoption status (accepts a PetStatus code or any legacy label; ValueError for anything else)"""
+        state = PetStatus.from_label(status)
         mysql_connection = connect_to_database()
         cursor = mysql_connection.cursor()
         
         try:
-            update_query = "UPDATE pets SET adoption_status = %s WHERE pet_id = %s"
-            cursor.execute(update_query, (status, pet_id))
+            update_query = "UPDATE pets SET adoption_status = %s, adoption_state = %s WHERE pet_id = %s"
+            cursor.execute(update_query, (PetStatus.label(state), state, pet_id))
             mysql_connection.commit()
+            catalog_events.publish('pet_status_changed', pet_id=pet_id, state=state)
             return True
         except mysql.connector.Error as e:
             print("Error:", e)
@@ -194,9 +234,9 @@ class PetModel:
             SELECT p.pet_id, p.name AS pet_name, p.species, p.gender
             FROM pets p
             LEFT JOIN adoption_procedure ap ON p.pet_id = ap.pet_id
-            WHERE p.adoption_status = 'Not Adopted' AND ap.pet_id IS NULL
+            WHERE p.adoption_state = %s AND ap.pet_id IS NULL
             """
-            cursor.execute(query)
+            cursor.execute(query, (PetStatus.AVAILABLE,))
             not_adopted_pets = cursor.fetchall()
             return not_adopted_pets
         finally:
@@ -0,0 +1,320 @@
+# models/pet_neighbors.py
+#
+# "Similar pets": the k most similar available pets for every pet, stored in pet_neighbors so the
+# endpoint is one primary-key range read.
+#
+# Similarity is a weighted attribute match in [0, 1]: same species / breed / category / gender,
+# closeness in age, and how near the two shelters are. Lists are written by a full rebuild
+# (python manage.py rebuild-pet-neighbors) and then patched from catalog events:
+#   - a pet is listed: it gets its own list and joins the lists of the pets most similar to it
+#   - a pet is adopted or deleted: every list that contained it is recomputed
+# Shelter moves and attribute edits are left to the next rebuild.
+#
+# Events are only queued by the publishing request; a background thread drains the queue, keeping
+# the latest change per pet, and handles each batch against one NeighborSpace.
+import atexit
+import threading
+import weakref
+
+from config import Config
+from database.db_connection import connect_to_database
+from models import catalog_events, geo, pet_catalog
+from models.pet_status import PetStatus
+
+np = pet_catalog.np  # Optional: without NumPy the lists are simply not maintained
+
+SIMILARITY_WEIGHTS = {
+    'species': 0.30,
+    'breed': 0.25,
+    'category': 0.10,
+    'gender': 0.05,
+    'age': 0.15,
+    'shelter': 0.15,
+}
+MATCH_COLUMNS = ('species', 'breed', 'category', 'gender')
+AGE_SPAN_YEARS = 5  # Pets this many years apart get no age credit
+REBUILD_BLOCK = 64  # Source pets scored per matrix during a rebuild
+
+
+class NeighborSpace:
+    """
+    Available pets as attribute vectors, snapshotted from the pet catalog
+    What this does: Scores a block of pets against every available pet in one (block x pets) matrix
+    Why: Pairwise similarity over all available pets in SQL would be a self-join
+
+    Pets with identical attributes score identically, so similarity is worked out once per distinct
+    profile (species, breed, category, gender, age, shelter) and then gathered out to the pets.
+    """
+
+    def __init__(self, catalog, shelter_coordinates):
+        snapshot = catalog.feature_snapshot(MATCH_COLUMNS)
+        self.catalog = weakref.ref(catalog)  # Not kept alive once a rebuild swaps in a new catalog
+        self.revision = snapshot['revision']
+        self.pet_ids = snapshot['pet_id']
+
+        # Ages are small integers, so age closeness is a lookup table too; index 0 is NULL (no credit)
+        ages = snapshot['age'].astype(np.int64)
+        span = np.arange(-1, int(ages.max(initial=0)) + 1, dtype=np.float32)
+        age_closeness = np.clip(1 - np.abs(span[:, None] - span[None, :]) / AGE_SPAN_YEARS, 0, 1)
+        age_closeness[0, :] = age_closeness[:, 0] = 0
+        self.age_closeness = (SIMILARITY_WEIGHTS['age'] * age_closeness).astype(np.float32)
+
+        # Shelters get dense indexes so proximity is a small (shelters x shelters) lookup table
+        shelters = snapshot['shelter']
+        shelter_ids = np.unique(shelters)
+        lat = np.array([shelter_coordinates.get(int(s), (np.nan, np.nan))[0] for s in shelter_ids])
+        lng = np.array([shelter_coordinates.get(int(s), (np.nan, np.nan))[1] for s in shelter_ids])
+        phi, lam = np.radians(lat), np.radians(lng)
+        a = (np.sin((phi[:, None] - phi[None, :]) / 2) ** 2
+             + np.cos(phi[:, None]) * np.cos(phi[None, :]) * np.sin((lam[:, None] - lam[None, :]) / 2) ** 2)
+        km = 2 * geo.EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+        proximity = np.nan_to_num(np.exp(-km / Config.PET_NEIGHBORS_DISTANCE_SCALE_KM), nan=0.0)
+        np.fill_diagonal(proximity, 1.0)  # Same shelter, geocoded or not
+        proximity[shelter_ids < 0, :] = 0.0
+        proximity[:, shelter_ids < 0] = 0.0
+        self.proximity = (SIMILARITY_WEIGHTS['shelter'] * proximity).astype(np.float32)
+
+        attributes = np.stack([snapshot['codes'][column] for column in MATCH_COLUMNS]
+                              + [ages + 1, np.searchsorted(shelter_ids, shelters)], axis=1).astype(np.int64)
+        # Mixed-radix key per pet (codes start at -1) so finding the distinct profiles is a 1-D unique
+        key = np.zeros(attributes.shape[0], dtype=np.int64)
+        for column in attributes.T:
+            key = key * (int(column.max(initial=0)) + 2) + column + 1
+        _, first, self.profile_of = np.unique(key, return_index=True, return_inverse=True)
+        self.profile_of = self.profile_of.ravel()
+        self.profiles = attributes[first]
+
+    def rows(self, pet_ids):
+        """Row of each pet id in this space (None when the pet is not available)"""
+        found = {}
+        wanted = np.asarray(list(pet_ids), dtype=np.int32)
+        for row in np.flatnonzero(np.isin(self.pet_ids, wanted)).tolist():
+            found[int(self.pet_ids[row])] = row
+        return [found.get(pet_id) for pet_id in pet_ids]
+
+    def similarities(self, rows):
+        """(len(rows), pets) similarity matrix; a pet is never its own neighbour"""
+        rows = np.asarray(rows)
+        source = self.profiles[self.profile_of[rows]]     # (rows, attributes)
+        profiles = self.profiles
+        n_match = len(MATCH_COLUMNS)
+        # (rows, profiles) similarity, then one gather from profiles out to pets
+        table = self.proximity[source[:, None, n_match + 1], profiles[None, :, n_match + 1]]
+        table += self.age_closeness[source[:, None, n_match], profiles[None, :, n_match]]
+        for i, column in enumerate(MATCH_COLUMNS):
+            match = (profiles[None, :, i] == source[:, None, i]) & (source[:, None, i] >= 0)
+            table += match * np.float32(SIMILARITY_WEIGHTS[column])
+        scores = table[:, self.profile_of]
+        scores[np.arange(rows.size), rows] = -1
+        return scores
+
+    def top(self, rows, k, scores=None):
+        """[(neighbor_id, similarity)] per row, most similar first"""
+        k = min(k, self.pet_ids.size - 1)
+        if k <= 0:
+            return [[] for _ in rows]
+        if scores is None:
+            scores = self.similarities(rows)
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        return [list(zip(self.pet_ids[ids].tolist(), [round(s, 4) for s in sims.tolist()]))
+                for ids, sims in zip(best, best_scores)]
+
+
+_cached_space = None
+
+
+def _space(catalog):
+    """NeighborSpace of the catalog as it is now, reused until the catalog is written again"""
+    global _cached_space
+    space = _cached_space
+    if space is None or space.catalog() is not catalog or space.revision != catalog.revision:
+        space = _cached_space = NeighborSpace(catalog, geo.ensure_built().coordinates())
+    return space
+
+
+def _write(cursor, lists):
+    """Replace the stored lists of these pets: {pet_id: [(neighbor_id, similarity)]}"""
+    if not lists:
+        return
+    pet_ids = list(lists)
+    cursor.execute('DELETE FROM pet_neighbors WHERE pet_id IN ({})'.format(', '.join(['%s'] * len(pet_ids))), pet_ids)
+    rows = [(pet_id, position, neighbor_id, similarity)
+            for pet_id, neighbors in lists.items()
+            for position, (neighbor_id, similarity) in enumerate(neighbors)]
+    if rows:
+        cursor.executemany('''
+            INSERT INTO pet_neighbors (pet_id, position, neighbor_id, similarity) VALUES (%s, %s, %s, %s)
+        ''', rows)
+
+
+def rebuild_all():
+    """
+    Recompute the list of every available pet from a freshly loaded catalog
+    Lists of pets that are no longer available are kept (their page still shows alternatives)
+    until the pet itself is deleted. Returns the number of lists written.
+    """
+    catalog = pet_catalog.rebuild()
+    space = _space(catalog)
+    total = space.pet_ids.size
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    try:
+        for start in range(0, total, REBUILD_BLOCK):
+            rows = np.arange(start, min(start + REBUILD_BLOCK, total))
+            lists = dict(zip(space.pet_ids[rows].tolist(), space.top(rows, Config.PET_NEIGHBORS_K)))
+            _write(cursor, lists)
+            conn.commit()
+            if (start // REBUILD_BLOCK) % 100 == 0:
+                print(f"  {min(start + REBUILD_BLOCK, total)}/{total} pets")
+        cursor.execute('''
+            DELETE pn FROM pet_neighbors pn
+            LEFT JOIN pets p ON p.pet_id = pn.pet_id
+            WHERE p.pet_id IS NULL
+        ''')
+        conn.commit()
+        return total
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _pet_listed(pet_id):
+    catalog = pet_catalog.pet_catalog
+    if catalog is None:
+        return
+    space = _space(catalog)
+    row = space.rows([pet_id])[0]
+    if row is None:
+        return
+    matrix = space.similarities([row])
+    scores = matrix[0]
+    lists = {pet_id: space.top([row], Config.PET_NEIGHBORS_K, matrix)[0]}
+
+    # Similarity is symmetric: the pets closest to the new one are the lists it is most likely to enter,
+    # and checking only those keeps a listing to one small read and write
+    fan_in = min(Config.PET_NEIGHBORS_FAN_IN, scores.size - 1)
+    if fan_in > 0:
+        closest = np.argpartition(-scores, fan_in - 1)[:fan_in]
+        candidates = {int(space.pet_ids[r]): float(scores[r]) for r in closest.tolist()}
+    else:
+        candidates = {}
+
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    try:
+        if candidates:
+            ids = list(candidates)
+            cursor.execute('''
+                SELECT pet_id, neighbor_id, similarity FROM pet_neighbors
+                WHERE pet_id IN ({}) ORDER BY pet_id, position
+            '''.format(', '.join(['%s'] * len(ids))), ids)
+            stored = {}
+            for other_id, neighbor_id, similarity in cursor.fetchall():
+                if neighbor_id != pet_id:
+                    stored.setdefault(other_id, []).append((neighbor_id, similarity))
+            for other_id, neighbors in stored.items():
+                similarity = round(candidates[other_id], 4)
+                if len(neighbors) < Config.PET_NEIGHBORS_K or similarity > neighbors[-1][1]:
+                    merged = sorted(neighbors + [(pet_id, similarity)], key=lambda item: -item[1])
+                    lists[other_id] = merged[:Config.PET_NEIGHBORS_K]
+        _write(cursor, lists)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _pet_unlisted(pet_id, deleted=False):
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT DISTINCT pet_id FROM pet_neighbors WHERE neighbor_id = %s', (pet_id,))
+        affected = [row[0] for row in cursor.fetchall() if row[0] != pet_id]
+        lists = {}
+        catalog = pet_catalog.pet_catalog
+        if affected and catalog is not None:
+            space = _space(catalog)
+            rows = space.rows(affected)
+            available = [(other_id, row) for other_id, row in zip(affected, rows) if row is not None]
+            if available:
+                lists = dict(zip([other_id for other_id, _ in available],
+                                 space.top([row for _, row in available], Config.PET_NEIGHBORS_K)))
+        _write(cursor, lists)
+        # Lists of pets that are not available themselves just lose the entry
+        cursor.execute('DELETE FROM pet_neighbors WHERE neighbor_id = %s', (pet_id,))
+        if deleted:
+            cursor.execute('DELETE FROM pet_neighbors WHERE pet_id = %s', (pet_id,))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+_pending = {}  # pet_id -> latest change: 'listed', 'unlisted' or 'deleted'
+_pending_changed = threading.Condition()
+_worker = None
+
+
+def _enqueue(pet_id, change):
+    """Queue a change for the worker; a later change to the same pet replaces an unhandled earlier one"""
+    global _worker
+    with _pending_changed:
+        _pending[pet_id] = change
+        _pending_changed.notify()
+        if _worker is None:
+            _worker = threading.Thread(target=_work_forever, name='pet-neighbors', daemon=True)
+            _worker.start()
+            atexit.register(drain)
+
+
+def _handle(changes):
+    for pet_id, change in changes.items():
+        try:
+            if change == 'listed':
+                _pet_listed(pet_id)
+            else:
+                _pet_unlisted(pet_id, deleted=change == 'deleted')
+        except Exception as e:
+            print(f"Error updating similar pets for pet {pet_id} ({change}): {e}")
+
+
+def drain():
+    """Handle every queued change now, in the calling thread; returns how many there were"""
+    with _pending_changed:
+        changes = dict(_pending)
+        _pending.clear()
+    _handle(changes)
+    return len(changes)
+
+
+def _work_forever():
+    while True:
+        with _pending_changed:
+            while not _pending:
+                _pending_changed.wait()
+        drain()
+
+
+def _on_pet_added(pet_id, **_):
+    if np is not None:
+        _enqueue(pet_id, 'listed')
+
+
+def _on_pet_status_changed(pet_id, state, **_):
+    if np is None:
+        return
+    _enqueue(pet_id, 'listed' if state == PetStatus.AVAILABLE else 'unlisted')
+
+
+def _on_pet_deleted(pet_id, **_):
+    _enqueue(pet_id, 'deleted')
+
+
+# pet_catalog subscribed first (imported above), so the catalog already reflects the write
+catalog_events.subscribe('pet_added', _on_pet_added)
+catalog_events.subscribe('pet_status_changed', _on_pet_status_changed)
+catalog_events.subscribe('pet_deleted', _on_pet_deleted)
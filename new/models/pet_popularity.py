@@ -0,0 +1,258 @@
+# models/pet_popularity.py
+#
+# Per-pet popularity counters for the cold-start ("popular") recommendations.
+#
+# pet_popularity holds, per pet: whether it is available, its application and view counts, and a
+# forward-decayed score (log scale, same scheme as search_trends) over three kinds of events:
+#   - the listing itself (PET_POPULARITY_LISTING_WEIGHT at created_at, so new pets are not buried)
+#   - every application (weight 1)
+#   - every detail page view (PET_POPULARITY_VIEW_WEIGHT)
+# The popular list is then an index range read on (is_available, log_score).
+#
+# Counters are kept current on write: applications in the same transaction as the application,
+# availability from catalog events, views batched per process. `python manage.py reconcile-popularity`
+# recomputes the application part from adoption_applications and repairs whatever drifted.
+import atexit
+import math
+import threading
+import time
+
+from config import Config
+from database.db_connection import connect_to_database
+from models import catalog_events
+from models.pet_status import PetStatus
+from models.search_trends import LANDMARK, _log_add
+
+DECAY_RATE = math.log(2) / (Config.PET_POPULARITY_HALF_LIFE_HOURS * 3600)
+RECONCILE_BATCH_SIZE = 1000
+
+
+def now_log_weight(now=None):
+    return DECAY_RATE * ((now or time.time()) - LANDMARK)
+
+
+def _log_add_sql(column, value):
+    # log(e^column + e^value) without overflow
+    return f'GREATEST({column}, {value}) + LN(1 + EXP(-ABS({column} - {value})))'
+
+
+# Listing weight at created_at, without application or view credit
+LISTING_SCORE_SQL = '%(rate)s * (UNIX_TIMESTAMP(p.created_at) - %(landmark)s) + LN(%(listing)s)'
+
+LISTED = f'''
+    INSERT INTO pet_popularity (pet_id, is_available, applications, views, log_score)
+    SELECT p.pet_id, p.adoption_state = %(available)s, 0, 0, {LISTING_SCORE_SQL}
+    FROM pets p
+    WHERE p.pet_id = %(pet_id)s
+    ON DUPLICATE KEY UPDATE is_available = VALUES(is_available)
+'''
+
+APPLIED = f'''
+    INSERT INTO pet_popularity (pet_id, is_available, applications, views, log_score, last_activity_at)
+    SELECT p.pet_id, p.adoption_state = %(available)s, 1, 0,
+           {_log_add_sql(f'({LISTING_SCORE_SQL})', '%(weight)s')}, NOW()
+    FROM pets p
+    WHERE p.pet_id = %(pet_id)s
+    ON DUPLICATE KEY UPDATE
+        applications = applications + 1,
+        log_score = {_log_add_sql('log_score', '%(weight)s')},
+        last_activity_at = NOW()
+'''
+
+VIEWED = f'''
+    UPDATE pet_popularity
+    SET views = views + %(views)s,
+        view_log_score = CASE WHEN view_log_score IS NULL THEN %(weight)s
+                              ELSE {_log_add_sql('view_log_score', '%(weight)s')} END,
+        log_score = {_log_add_sql('log_score', '%(weight)s')},
+        last_activity_at = NOW()
+    WHERE pet_id = %(pet_id)s
+'''
+
+# Recompute a pet_id range from pets and adoption_applications, keeping the view counters.
+# Every term is taken relative to the pet's own listing time, so the EXPs stay small.
+RECONCILE = '''
+    INSERT INTO pet_popularity (pet_id, is_available, applications, views, log_score, view_log_score, last_activity_at)
+    SELECT p.pet_id,
+           p.adoption_state = %(available)s,
+           COUNT(aa.application_id),
+           COALESCE(MAX(pp.views), 0),
+           %(rate)s * (UNIX_TIMESTAMP(p.created_at) - %(landmark)s) + LN(
+               %(listing)s
+               + COALESCE(SUM(EXP(%(rate)s * (UNIX_TIMESTAMP(aa.application_date) - UNIX_TIMESTAMP(p.created_at)))), 0)
+               + COALESCE(EXP(MAX(pp.view_log_score) - %(rate)s * (UNIX_TIMESTAMP(p.created_at) - %(landmark)s)), 0)
+           ),
+           MAX(pp.view_log_score),
+           GREATEST(COALESCE(MAX(aa.application_date), MAX(pp.last_activity_at)),
+                    COALESCE(MAX(pp.last_activity_at), MAX(aa.application_date)))
+    FROM pets p
+    LEFT JOIN pet_popularity pp ON pp.pet_id = p.pet_id
+    LEFT JOIN adoption_applications aa ON aa.pet_id = p.pet_id
+    WHERE p.pet_id BETWEEN %(first)s AND %(last)s
+    GROUP BY p.pet_id
+    ON DUPLICATE KEY UPDATE
+        is_available = VALUES(is_available),
+        applications = VALUES(applications),
+        log_score = VALUES(log_score),
+        last_activity_at = VALUES(last_activity_at)
+'''
+
+
+def _params(**extra):
+    params = {
+        'rate': DECAY_RATE,
+        'landmark': LANDMARK,
+        'listing': Config.PET_POPULARITY_LISTING_WEIGHT,
+        'available': PetStatus.AVAILABLE,
+    }
+    params.update(extra)
+    return params
+
+
+def record_application(cursor, pet_id):
+    """Count an application; run it on the application's cursor so both commit together"""
+    cursor.execute(APPLIED, _params(pet_id=pet_id, weight=now_log_weight()))
+
+
+def reconcile():
+    """
+    Recompute every pet's counters from pets and adoption_applications
+    What this does: Upserts pet_popularity one pet_id range per transaction, then drops rows of deleted pets
+    Why: Catalog events are per process and best effort; this repairs missed availability changes and counts
+    Returns {'pets': rows written, 'orphans': rows deleted}, or None on failure
+    """
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT MIN(pet_id), MAX(pet_id) FROM pets')
+        low, high = cursor.fetchone()
+        if low is not None:
+            start = low
+            while start <= high:
+                end = start + RECONCILE_BATCH_SIZE - 1
+                cursor.execute(RECONCILE, _params(first=start, last=end))
+                conn.commit()
+                start = end + 1
+        cursor.execute('''
+            DELETE pp FROM pet_popularity pp
+            LEFT JOIN pets p ON p.pet_id = pp.pet_id
+            WHERE p.pet_id IS NULL
+        ''')
+        orphans = cursor.rowcount
+        conn.commit()
+        cursor.execute('SELECT COUNT(*) FROM pet_popularity')
+        return {'pets': cursor.fetchone()[0], 'orphans': orphans}
+    except Exception as e:
+        print(f"Error reconciling pet popularity: {e}")
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class ViewCounter:
+    """
+    Per-process view counts, written to pet_popularity every few seconds
+    What this does: Turns each detail page view into a dict update and one batched UPDATE per pet later
+    Why: A write per page view would make the most viewed pets' rows the hottest locks in the database
+    """
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = {}   # pet_id -> [log_weight, views]
+        self.dropped = 0
+        self.flushed = 0
+
+    def record(self, pet_id, now=None):
+        weight = now_log_weight(now) + math.log(Config.PET_POPULARITY_VIEW_WEIGHT)
+        with self._lock:
+            entry = self._pending.get(pet_id)
+            if entry is None:
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    return
+                entry = self._pending[pet_id] = [None, 0]
+            entry[0] = _log_add(entry[0], weight)
+            entry[1] += 1
+
+    def flush(self):
+        """Apply everything recorded since the last flush; returns the number of pets written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        conn = connect_to_database()
+        cursor = conn.cursor()
+        try:
+            # Sorted, so concurrent flushes from other workers lock rows in the same order
+            cursor.executemany(VIEWED, [_params(pet_id=pet_id, weight=weight, views=views)
+                                        for pet_id, (weight, views) in sorted(pending.items())])
+            conn.commit()
+            self.flushed += len(pending)
+            return len(pending)
+        except Exception as e:
+            print(f"Error flushing pet views ({len(pending)} pets lost): {e}")
+            conn.rollback()
+            return 0
+        finally:
+            cursor.close()
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), 'flushed': self.flushed, 'dropped': self.dropped}
+
+
+view_counter = ViewCounter(max_pending=Config.PET_POPULARITY_MAX_PENDING)
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_forever():
+    while True:
+        time.sleep(Config.PET_POPULARITY_FLUSH_SECONDS)
+        view_counter.flush()
+
+
+def record_view(pet_id):
+    """Count a detail page view and make sure this process has a flusher running"""
+    global _flusher
+    view_counter.record(pet_id)
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_flush_forever, name='pet-popularity-flush', daemon=True)
+                _flusher.start()
+                atexit.register(view_counter.flush)
+
+
+def _execute(query, params):
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _on_pet_added(pet_id, **_):
+    _execute(LISTED, _params(pet_id=pet_id))
+
+
+def _on_pet_status_changed(pet_id, state, **_):
+    _execute('UPDATE pet_popularity SET is_available = %s WHERE pet_id = %s',
+             (state == PetStatus.AVAILABLE, pet_id))
+
+
+def _on_pet_deleted(pet_id, **_):
+    _execute('DELETE FROM pet_popularity WHERE pet_id = %s', (pet_id,))
+
+
+catalog_events.subscribe('pet_added', _on_pet_added)
+catalog_events.subscribe('pet_status_changed', _on_pet_status_changed)
+catalog_events.subscribe('pet_deleted', _on_pet_deleted)
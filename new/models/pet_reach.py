@@ -0,0 +1,225 @@
+# models/pet_reach.py
+#
+# "How many distinct people looked at this pet": per-pet, per-day HyperLogLog sketches.
+#
+# A sketch is 2^PRECISION one-byte registers; each visitor is hashed to a register and the register
+# keeps the longest run of leading zeros seen. The distinct count is estimated from the registers
+# (about 1.6% standard error at PRECISION 12), and the union of any set of sketches - several days,
+# several pets, a whole shelter - is just the register-wise maximum, so date ranges are merged on read.
+#
+# Views (pet detail hits and dashboard clicks, via view_events) are folded into small per-process
+# sparse sketches and merged into pet_reach_daily every PET_REACH_FLUSH_SECONDS. Stored blobs are
+# sparse (index, rank) pairs while few registers are set, dense register arrays after that.
+import atexit
+import hashlib
+import math
+import struct
+import threading
+import time
+from datetime import date, timedelta
+
+from config import Config
+from database.db_connection import connect_to_database
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: sketches are then merged in pure Python
+    np = None
+
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+RANK_BITS = 64 - PRECISION
+ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+SPARSE, DENSE = 0, 1
+SPARSE_ENTRY = struct.Struct('>HB')
+# Sparse entries cost 3 bytes, so past a third of the registers the dense form is smaller
+SPARSE_MAX_ENTRIES = REGISTERS // SPARSE_ENTRY.size
+
+
+def register_of(visitor):
+    """(register index, rank) for one visitor key"""
+    hashed = int.from_bytes(hashlib.blake2b(str(visitor).encode('utf-8'), digest_size=8).digest(), 'big')
+    index = hashed >> RANK_BITS
+    rest = hashed & ((1 << RANK_BITS) - 1)
+    return index, RANK_BITS - rest.bit_length() + 1
+
+
+def encode(registers):
+    """Blob for a dense register bytearray"""
+    entries = [(index, rank) for index, rank in enumerate(registers) if rank]
+    if len(entries) <= SPARSE_MAX_ENTRIES:
+        return bytes([SPARSE]) + b''.join(SPARSE_ENTRY.pack(index, rank) for index, rank in entries)
+    return bytes([DENSE]) + bytes(registers)
+
+
+def decode(blob):
+    """Dense register bytearray for a stored blob (an empty sketch for None)"""
+    registers = bytearray(REGISTERS)
+    if not blob:
+        return registers
+    if blob[0] == DENSE:
+        registers[:] = blob[1:1 + REGISTERS]
+        return registers
+    for index, rank in SPARSE_ENTRY.iter_unpack(bytes(blob[1:])):
+        registers[index] = rank
+    return registers
+
+
+def merge(sketches):
+    """Register-wise maximum of dense register arrays (the sketch of the union)"""
+    sketches = list(sketches)
+    if not sketches:
+        return bytearray(REGISTERS)
+    if np is not None:
+        stacked = np.frombuffer(b''.join(bytes(s) for s in sketches), dtype=np.uint8).reshape(len(sketches), REGISTERS)
+        return bytearray(stacked.max(axis=0).tobytes())
+    merged = bytearray(sketches[0])
+    for sketch in sketches[1:]:
+        merged = bytearray(map(max, merged, sketch))
+    return merged
+
+
+def estimate(registers):
+    """Estimated distinct visitors behind a dense register array"""
+    zeros = registers.count(0)
+    if zeros == REGISTERS:
+        return 0
+    raw = ALPHA * REGISTERS * REGISTERS / sum(2.0 ** -rank for rank in registers)
+    if raw <= 2.5 * REGISTERS and zeros:
+        return int(round(REGISTERS * math.log(REGISTERS / zeros)))  # Linear counting for small ranges
+    return int(round(raw))
+
+
+class ReachRecorder:
+    """
+    Per-process sparse sketches waiting to be merged into pet_reach_daily
+    What this does: Turns each view into at most one register update in memory
+    Why: A sketch read-modify-write per view would serialize every viewer of a popular pet
+    """
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = {}   # (pet_id, day) -> {register index: rank}
+        self.dropped = 0
+        self.flushed = 0
+
+    def record(self, pet_id, visitor, day=None):
+        index, rank = register_of(visitor)
+        key = (pet_id, day or date.today())
+        with self._lock:
+            registers = self._pending.get(key)
+            if registers is None:
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    return
+                registers = self._pending[key] = {}
+            if registers.get(index, 0) < rank:
+                registers[index] = rank
+
+    def flush(self):
+        """Merge everything recorded since the last flush into the stored sketches; returns rows written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        keys = sorted(pending)  # Same lock order in every worker
+        conn = connect_to_database()
+        cursor = conn.cursor()
+        try:
+            # Create missing rows first so the locking read below never takes gap locks
+            cursor.executemany('INSERT IGNORE INTO pet_reach_daily (pet_id, day, sketch) VALUES (%s, %s, %s)',
+                               [(pet_id, day, bytes([SPARSE])) for pet_id, day in keys])
+            stored = {}
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                cursor.execute(f'''
+                    SELECT pet_id, day, sketch FROM pet_reach_daily
+                    WHERE (pet_id, day) IN ({', '.join(['(%s, %s)'] * len(chunk))})
+                    FOR UPDATE
+                ''', [value for key in chunk for value in key])
+                for pet_id, day, sketch in cursor.fetchall():
+                    stored[(pet_id, day)] = sketch
+            rows = []
+            for key in keys:
+                registers = decode(stored.get(key))
+                for index, rank in pending[key].items():
+                    if registers[index] < rank:
+                        registers[index] = rank
+                rows.append((encode(registers),) + key)
+            cursor.executemany('UPDATE pet_reach_daily SET sketch = %s WHERE pet_id = %s AND day = %s', rows)
+            cursor.execute('DELETE FROM pet_reach_daily WHERE day < %s LIMIT 1000',
+                           (date.today() - timedelta(days=Config.PET_REACH_RETENTION_DAYS),))
+            conn.commit()
+            self.flushed += len(rows)
+            return len(rows)
+        except Exception as e:
+            print(f"Error flushing pet reach sketches ({len(pending)} lost): {e}")
+            conn.rollback()
+            return 0
+        finally:
+            cursor.close()
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), 'flushed': self.flushed, 'dropped': self.dropped}
+
+
+reach_recorder = ReachRecorder(max_pending=Config.PET_REACH_MAX_PENDING)
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_forever():
+    while True:
+        time.sleep(Config.PET_REACH_FLUSH_SECONDS)
+        reach_recorder.flush()
+
+
+def record_visit(pet_id, visitor):
+    """Count `visitor` (a user id or client address) as having looked at this pet today"""
+    global _flusher
+    reach_recorder.record(pet_id, visitor)
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_flush_forever, name='pet-reach-flush', daemon=True)
+                _flusher.start()
+                atexit.register(reach_recorder.flush)
+
+
+def shelter_reach(shelter_id, start, end):
+    """
+    Distinct visitors per pet of a shelter between two dates (inclusive), and across all its pets
+    Returns {'unique_visitors': n, 'pets': [{'pet_id', 'name', 'unique_visitors'}]} most visited first
+    """
+    conn = connect_to_database()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            SELECT p.pet_id, p.name, r.sketch
+            FROM pets p
+            JOIN pet_reach_daily r ON r.pet_id = p.pet_id
+            WHERE p.shelter_id = %s AND r.day BETWEEN %s AND %s
+        ''', (shelter_id, start, end))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    by_pet = {}
+    names = {}
+    for pet_id, name, sketch in rows:
+        by_pet.setdefault(pet_id, []).append(decode(sketch))
+        names[pet_id] = name
+    merged = {pet_id: merge(sketches) for pet_id, sketches in by_pet.items()}
+    pets = [{'pet_id': pet_id, 'name': names[pet_id], 'unique_visitors': estimate(registers)}
+            for pet_id, registers in merged.items()]
+    pets.sort(key=lambda pet: (-pet['unique_visitors'], pet['pet_id']))
+    return {
+        'unique_visitors': estimate(merge(merged.values())),
+        'pets': pets,
+    }
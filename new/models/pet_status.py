@@ -0,0 +1,36 @@
+class PetStatus:
+    """
+    Adoption status of a pet
+    What this does: One place for the codes stored in pets.adoption_state and their display labels
+    Why: We used 'notadopted', 'Not Adopted', 'adopted' and 'Adopted' in different models,
+         so "available pets" queries could never share an index
+    """
+    AVAILABLE = 0
+    ADOPTED = 1
+
+    LABELS = {
+        AVAILABLE: 'Not Adopted',
+        ADOPTED: 'Adopted',
+    }
+
+    @staticmethod
+    def label(code):
+        """Display label written to the legacy pets.adoption_status column"""
+        return PetStatus.LABELS[code]
+
+    @staticmethod
+    def from_label(value):
+        """
+        Map any spelling we have used over the years to a status code
+        Accepts codes too, so callers can pass either; anything else (None, '', True) is a ValueError
+        """
+        if isinstance(value, int) and not isinstance(value, bool):
+            if value in PetStatus.LABELS:
+                return value
+        elif isinstance(value, str):
+            normalized = value.replace(' ', '').replace('_', '').lower()
+            if normalized == 'adopted':
+                return PetStatus.ADOPTED
+            if normalized in ('notadopted', 'available'):
+                return PetStatus.AVAILABLE
+        raise ValueError(f"Unknown adoption status: {value!r}")
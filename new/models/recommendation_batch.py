@@ -0,0 +1,209 @@
+# models/recommendation_batch.py
+#
+# Offline recommendations for every adopter, written to user_recommendations.
+#
+# Adopters are split into fixed user-id ranges (multiples of the run's chunk size, so the ranges
+# are the same when a run is resumed). A process pool scores one range per task; each task streams
+# its adopters and their applications with a server-side cursor and commits its rows together with a
+# recommendation_run_chunks marker, so an interrupted run picks up at the first unwritten range.
+# Adopters without applications get the popular list the dashboard would show them.
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from config import Config
+from database.db_connection import connect_to_database
+from models import item_similarity, pet_catalog, recommendation_engine
+from models.pet_status import PetStatus
+from models.recommendation_model import RecommendationModel
+
+# One row per application, or a single all-NULL row for an adopter who has none yet
+HISTORY_QUERY = '''
+    SELECT u.id AS user_id, p.pet_id, p.species, p.breed, p.age, p.gender, p.category, p.shelter_id
+    FROM users u
+    LEFT JOIN adoption_applications aa ON aa.user_id = u.id AND aa.status IN (%s, %s)
+    LEFT JOIN pets p ON p.pet_id = aa.pet_id
+    WHERE u.role = 'adopter'
+      AND u.id BETWEEN %s AND %s
+    ORDER BY u.id
+'''
+
+# Cold-start list, same ranking as RecommendationModel.compute_recommendations for a user with no history
+POPULAR_QUERY = '''
+    SELECT pp.pet_id, pp.applications
+    FROM pet_popularity pp
+    JOIN pets p ON p.pet_id = pp.pet_id
+    WHERE pp.is_available = 1
+      AND p.adoption_state = %s
+    ORDER BY pp.log_score DESC
+    LIMIT %s
+'''
+
+INSERT_RECOMMENDATION = '''
+    INSERT INTO user_recommendations (user_id, position, pet_id, score, computed_at)
+    VALUES (%s, %s, %s, %s, %s)
+'''
+
+
+def _init_worker():
+    # Each worker scores against its own catalog and similarity model; without NumPy it falls back to SQL per user
+    if pet_catalog.np is not None:
+        try:
+            pet_catalog.rebuild()
+        except Exception as e:
+            print(f"❌ Worker catalog load failed (scoring in SQL): {e}")
+        if Config.RECOMMENDATION_CF_ENABLED:
+            try:
+                item_similarity.rebuild()
+            except Exception as e:
+                print(f"❌ Worker item similarity load failed (content-only scores): {e}")
+
+
+def _stream(cursor, batch=5000):
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            return
+        yield from rows
+
+
+def score_chunk(run_id, first_user_id, last_user_id, depth):
+    """
+    Score every adopter in [first_user_id, last_user_id] and store the results
+    Returns the number of adopters written, including those given the popular list; runs inside a pool worker
+    """
+    catalog = pet_catalog.pet_catalog
+    computed_at = datetime.now()
+
+    read_conn = connect_to_database()
+    read_cursor = read_conn.cursor(dictionary=True, buffered=False)  # Stream; a range can hold many applications
+    conn = connect_to_database()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        read_cursor.execute(HISTORY_QUERY, RecommendationModel.HISTORY_STATUSES + (first_user_id, last_user_id))
+        rows = []
+        users = 0
+        popular = None
+        for user_id, history in itertools.groupby(_stream(read_cursor), key=lambda row: row['user_id']):
+            # Drops the NULL row of an adopter with no applications (and applications for deleted pets)
+            history = [app for app in history if app['pet_id'] is not None]
+            users += 1
+            if not history:
+                if popular is None:
+                    cursor.execute(POPULAR_QUERY, (PetStatus.AVAILABLE, depth))
+                    popular = [(row['pet_id'], row['applications']) for row in cursor.fetchall()]
+                rows.extend((user_id, position, pet_id, int(score), computed_at)
+                            for position, (pet_id, score) in enumerate(popular))
+                continue
+            preferences = RecommendationModel._preferences_from(history)
+            applied_ids = {app['pet_id'] for app in history}
+            if catalog is not None:
+                ranked = recommendation_engine.score_pets(catalog, preferences, applied_ids, depth,
+                                                          RecommendationModel._affinity(history))
+            else:
+                ranked = [(pet['pet_id'], pet['recommendation_score']) for pet in
+                          RecommendationModel._sql_recommendations(cursor, preferences, applied_ids, depth)]
+            rows.extend((user_id, position, pet_id, int(score), computed_at)
+                        for position, (pet_id, score) in enumerate(ranked))
+
+        cursor.execute('DELETE FROM user_recommendations WHERE user_id BETWEEN %s AND %s',
+                       (first_user_id, last_user_id))
+        if rows:
+            cursor.executemany(INSERT_RECOMMENDATION, rows)
+        cursor.execute('''
+            INSERT INTO recommendation_run_chunks (run_id, first_user_id, users, finished_at)
+            VALUES (%s, %s, %s, NOW())
+        ''', (run_id, first_user_id, users))
+        conn.commit()
+        return users
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        read_cursor.close()
+        read_conn.close()
+        cursor.close()
+        conn.close()
+
+
+def _start_or_resume(cursor, chunk_size, restart):
+    """(run_id, chunk_size, done_chunk_starts) of the unfinished run, or of a new one"""
+    cursor.execute('SELECT run_id, chunk_size FROM recommendation_runs WHERE finished_at IS NULL ORDER BY run_id DESC LIMIT 1')
+    run = cursor.fetchone()
+    if run and restart:
+        cursor.execute('UPDATE recommendation_runs SET finished_at = NOW() WHERE finished_at IS NULL')
+        run = None
+    if run:
+        run_id, chunk_size = run['run_id'], run['chunk_size']
+        cursor.execute('SELECT first_user_id FROM recommendation_run_chunks WHERE run_id = %s', (run_id,))
+        done = {row['first_user_id'] for row in cursor.fetchall()}
+        print(f"↩️  Resuming run {run_id}: {len(done)} chunk(s) already written")
+        return run_id, chunk_size, done
+    cursor.execute('INSERT INTO recommendation_runs (chunk_size, started_at) VALUES (%s, NOW())', (chunk_size,))
+    return cursor.lastrowid, chunk_size, set()
+
+
+def run_batch(workers=None, chunk_size=None, restart=False, depth=None):
+    """
+    Recompute user_recommendations for every adopter
+    What this does: Fans user-id ranges out to a process pool and reports users/second as ranges finish
+    Why: Weekly emails and first dashboard loads should read one precomputed list, not score on demand
+    """
+    workers = workers or Config.RECOMMENDATION_BATCH_WORKERS
+    # More than the dashboard asks for: the read path needs a full list after adopted pets drop out,
+    # or every request would fall through to live scoring
+    depth = depth or Config.RECOMMENDATION_BATCH_DEPTH
+
+    conn = connect_to_database()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        run_id, chunk_size, done = _start_or_resume(cursor, chunk_size or Config.RECOMMENDATION_BATCH_CHUNK_USERS, restart)
+        cursor.execute("SELECT MIN(id) AS low, MAX(id) AS high FROM users WHERE role = 'adopter'")
+        bounds = cursor.fetchone()
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    chunks = []
+    if bounds['low'] is not None:
+        start = bounds['low'] // chunk_size * chunk_size
+        chunks = [first for first in range(start, bounds['high'] + 1, chunk_size) if first not in done]
+
+    started = time.monotonic()
+    users = 0
+    failed = 0
+    print(f"🧮 Run {run_id}: {len(chunks)} chunk(s) of {chunk_size} user ids on {workers} worker(s)")
+    # Each worker opens its own connection pool (db_connection recreates it after a fork)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(score_chunk, run_id, first, first + chunk_size - 1, depth): first for first in chunks}
+        for completed, future in enumerate(as_completed(futures), 1):
+            try:
+                users += future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ Users {futures[future]}-{futures[future] + chunk_size - 1} failed (rerun to retry): {e}")
+                continue
+            elapsed = time.monotonic() - started
+            print(f"   {completed}/{len(chunks)} chunks, {users} users, {users / elapsed:.0f} users/s")
+
+    if not failed:
+        conn = connect_to_database()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('UPDATE recommendation_runs SET finished_at = NOW() WHERE run_id = %s', (run_id,))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    elapsed = time.monotonic() - started
+    return {
+        'run_id': run_id,
+        'users': users,
+        'failed_chunks': failed,
+        'seconds': round(elapsed, 1),
+        'users_per_second': round(users / elapsed, 1) if elapsed else None,
+        'workers': workers,
+    }
@@ -0,0 +1,157 @@
+# models/recommendation_engine.py
+#
+# Content-based scoring of available pets against one adopter's application history.
+#
+# Every pet is a one-hot feature vector over (species, breed, category, gender, age bucket);
+# an adopter is a preference vector over the same features, weighted by how often each value
+# appears in their applications. A pet's score is the dot product of the two.
+#
+# Each pet has exactly one active feature per block, so the pet x feature matrix is stored the
+# compact way: one column index per block and pet (CSR with a fixed row length). The matrix-vector product
+# X @ preference is then preference[indices].sum(axis=0) - no dense matrix is ever built.
+import threading
+
+from config import Config
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: RecommendationModel falls back to SQL scoring
+    np = None
+
+
+# Points per matching application, per feature block (species and breed matter most)
+FEATURE_WEIGHTS = {
+    'species': 10,
+    'breed': 5,
+    'age_bucket': 3,
+    'category': 2,
+    'gender': 1,
+}
+
+# preferences key -> catalog column
+PREFERENCE_COLUMNS = (('species', 'species'), ('breeds', 'breed'), ('categories', 'category'), ('genders', 'gender'))
+
+AGE_BUCKETS = ('young', 'adult', 'senior')  # <= 2, 3-7, > 7 years
+
+
+def age_bucket(age):
+    """'young' / 'adult' / 'senior', or None for an unknown age"""
+    if age is None:
+        return None
+    if age <= 2:
+        return 'young'
+    if age <= 7:
+        return 'adult'
+    return 'senior'
+
+
+def _age_bucket_codes(ages):
+    # Unknown ages (-1) get code 3, a feature nobody can prefer
+    codes = np.where(ages <= 2, 0, np.where(ages <= 7, 1, 2))
+    return np.where(ages < 0, 3, codes)
+
+
+class _FeatureMatrix:
+    """
+    The pet x feature one-hot matrix for one catalog revision
+    Independent of the adopter, so it is built once per catalog write and shared by every request
+    """
+
+    def __init__(self, catalog):
+        snapshot = catalog.feature_snapshot([column for _, column in PREFERENCE_COLUMNS])
+        self.catalog = catalog
+        self.revision = snapshot['revision']
+        self.pet_ids = snapshot['pet_id']
+        self.created = snapshot['created'].astype(np.int64) + 1  # NULL (-1) -> 0, still sorts oldest
+        self.vocabulary = snapshot['vocabulary']
+        self.shelters = snapshot['shelter'].astype(np.int64) + 1  # NULL (-1) -> 0
+
+        # Every block gets one extra trailing column for NULL values, which always carries weight 0
+        self.offsets = {}
+        self.codes = {}
+        columns = []
+        offset = 0
+        for _, column in PREFERENCE_COLUMNS:
+            value_codes, size = self.vocabulary[column]
+            codes = np.where(snapshot['codes'][column] < 0, size, snapshot['codes'][column])
+            self.codes[column] = codes
+            columns.append(codes + offset)
+            self.offsets[column] = offset
+            offset += size + 1
+        self.offsets['age_bucket'] = offset
+        columns.append(_age_bucket_codes(snapshot['age']) + offset)
+        self.width = offset + len(AGE_BUCKETS) + 1
+        self.indices = np.stack(columns).astype(np.int32)  # (blocks, pets): active column per block
+
+    def preference_vector(self, preferences):
+        vector = np.zeros(self.width, dtype=np.int64)
+        for key, column in PREFERENCE_COLUMNS:
+            value_codes, _ = self.vocabulary[column]
+            for value, count in preferences.get(key, {}).items():
+                code = value_codes.get(str(value).strip().lower()) if value is not None else None
+                if code is not None:
+                    vector[self.offsets[column] + code] += count * FEATURE_WEIGHTS[column]
+        for code, bucket in enumerate(AGE_BUCKETS):
+            count = preferences.get('age_ranges', {}).get(bucket, 0)
+            vector[self.offsets['age_bucket'] + code] += count * FEATURE_WEIGHTS['age_bucket']
+        return vector
+
+    def scores(self, preference):
+        # one_hot_matrix @ preference, one gather per block
+        return preference[self.indices].sum(axis=0)
+
+    def affinity_scores(self, breed_weights, shelter_weights):
+        """Collaborative-filtering points per pet from item_similarity.affinity() weights"""
+        value_codes, size = self.vocabulary['breed']
+        by_breed = np.zeros(size + 1)
+        for breed, weight in breed_weights.items():
+            code = value_codes.get(breed)
+            if code is not None:
+                by_breed[code] = weight
+        by_shelter = np.zeros(max(int(self.shelters.max(initial=0)), max(shelter_weights, default=0) + 1) + 1)
+        for shelter_id, weight in shelter_weights.items():
+            by_shelter[shelter_id + 1] = weight
+        blended = by_breed[self.codes['breed']] + by_shelter[self.shelters]
+        return np.rint(blended * Config.RECOMMENDATION_CF_WEIGHT).astype(np.int64)
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def _feature_matrix(catalog):
+    global _matrix
+    matrix = _matrix
+    if matrix is None or matrix.catalog is not catalog or matrix.revision != catalog.revision:
+        with _matrix_lock:
+            matrix = _matrix
+            if matrix is None or matrix.catalog is not catalog or matrix.revision != catalog.revision:
+                matrix = _matrix = _FeatureMatrix(catalog)
+    return matrix
+
+
+def score_pets(catalog, preferences, exclude_ids=(), limit=10, affinity=None):
+    """
+    Top `limit` available pets for these preferences: [(pet_id, score)], best first
+    Ties go to the newest listing, like ORDER BY score DESC, created_at DESC
+    affinity: optional ({breed: weight}, {shelter_id: weight}) from item_similarity, added to the content score
+    """
+    matrix = _feature_matrix(catalog)
+    if matrix.pet_ids.size == 0 or limit <= 0:
+        return []
+
+    # (score, created_at) packed into one int64 so a single partial sort breaks ties by recency
+    scores = matrix.scores(matrix.preference_vector(preferences))
+    if affinity and (affinity[0] or affinity[1]):
+        scores = scores + matrix.affinity_scores(*affinity)
+    ranking = (scores << 32) | matrix.created
+    if exclude_ids:
+        ranking[np.isin(matrix.pet_ids, np.fromiter(exclude_ids, dtype=np.int32))] = -1
+
+    candidates = int(np.count_nonzero(ranking >= 0))
+    limit = min(limit, candidates)
+    if limit == 0:
+        return []
+    top = np.argpartition(-ranking, limit - 1)[:limit]
+    top = top[np.argsort(-ranking[top], kind='stable')]
+    return list(zip(matrix.pet_ids[top].tolist(), scores[top].tolist()))
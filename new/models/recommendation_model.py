@@ -1,7 +1,52 @@
+import threading
+
 import mysql.connector
+from config import Config
 from database.db_connection import connect_to_database as get_db_connection
+from models import item_similarity, pet_catalog, recommendation_engine
+from models.cache import TTLCache
+from models.pet_status import PetStatus
 
 class RecommendationModel:
+    # Applications that say something about what the adopter likes
+    HISTORY_STATUSES = ('pending', 'approved')
+
+    # user_id -> recommendations, RECOMMENDATION_CACHE_DEPTH pets deep; dropped when that user applies
+    _cache = TTLCache(maxsize=max(Config.RECOMMENDATION_CACHE_SIZE, 1), ttl=Config.RECOMMENDATION_CACHE_TTL)
+
+    _stats = {'stale_dropped': 0, 'refilled': 0}
+    _stats_lock = threading.Lock()
+
+    @staticmethod
+    def _application_history(cursor, user_id):
+        cursor.execute('''
+            SELECT p.pet_id, p.species, p.breed, p.age, p.gender, p.category, p.shelter_id
+            FROM adoption_applications aa
+            JOIN pets p ON aa.pet_id = p.pet_id
+            WHERE aa.user_id = %s AND aa.status IN (%s, %s)
+        ''', (user_id,) + RecommendationModel.HISTORY_STATUSES)
+        return cursor.fetchall()
+
+    @staticmethod
+    def _preferences_from(history):
+        """Count how often each species / breed / category / gender / age range was applied for"""
+        preferences = {
+            'species': {},
+            'breeds': {},
+            'categories': {},
+            'age_ranges': {'young': 0, 'adult': 0, 'senior': 0},
+            'genders': {}
+        }
+        for app in history:
+            for key, column in recommendation_engine.PREFERENCE_COLUMNS:
+                value = app[column]
+                if value is not None:
+                    preferences[key][value] = preferences[key].get(value, 0) + 1
+            bucket = recommendation_engine.age_bucket(app['age'])
+            if bucket:
+                preferences['age_ranges'][bucket] += 1
+        return preferences
+
     @staticmethod
     def get_user_preferences(user_id):
         """
@@ -12,52 +57,12 @@ class RecommendationModel:
         try:
             conn = get_db_connection()
             cursor = conn.cursor(dictionary=True)
-            
-            # Get user's application history to understand preferences
-            cursor.execute('''
-                SELECT p.species, p.breed, p.age, p.gender, p.category
-                FROM adoption_applications aa
-                JOIN pets p ON aa.pet_id = p.pet_id
-                WHERE aa.user_id = %s AND aa.status IN ('pending', 'approved')
-            ''', (user_id,))
-            
-            history = cursor.fetchall()
+            history = RecommendationModel._application_history(cursor, user_id)
             conn.close()
             
             if not history:
                 return None
-            
-            # Simple preference analysis
-            preferences = {
-                'species': {},
-                'breeds': {},
-                'age_ranges': {'young': 0, 'adult': 0, 'senior': 0},
-                'genders': {}
-            }
-            
-            for app in history:
-                # Count species preferences
-                species = app['species']
-                preferences['species'][species] = preferences['species'].get(species, 0) + 1
-                
-                # Count breed preferences
-                breed = app['breed']
-                preferences['breeds'][breed] = preferences['breeds'].get(breed, 0) + 1
-                
-                # Age range preferences
-                age = app['age']
-                if age <= 2:
-                    preferences['age_ranges']['young'] += 1
-                elif age <= 7:
-                    preferences['age_ranges']['adult'] += 1
-                else:
-                    preferences['age_ranges']['senior'] += 1
-                
-                # Gender preferences
-                gender = app['gender']
-                preferences['genders'][gender] = preferences['genders'].get(gender, 0) + 1
-            
-            return preferences
+            return RecommendationModel._preferences_from(history)
             
         except Exception as e:
             print(f"Error analyzing preferences: {e}")
@@ -65,29 +70,171 @@ class RecommendationModel:
     
     @staticmethod
     def get_recommended_pets(user_id, limit=10):
+        """
+        Cached front for compute_recommendations
+        What this does: Serves a user's recommendations from memory until they apply for a pet
+        Why: Preferences only change with applications, yet the dashboard asked again on every page load
+
+        Cached pets are checked against pets.adoption_state on every read (one primary-key lookup), so
+        adoptions made through any worker drop out; if that leaves fewer than `limit` pets the list is
+        computed again.
+        """
+        if Config.RECOMMENDATION_CACHE_SIZE <= 0:
+            return RecommendationModel.compute_recommendations(user_id, limit)
+        
+        depth = max(limit, Config.RECOMMENDATION_CACHE_DEPTH)
+        cached = RecommendationModel._cache.get(user_id)
+        if cached is not None:
+            pets = RecommendationModel._drop_unavailable(cached['pets'])
+            if len(pets) >= limit or len(cached['pets']) < depth:
+                return dict(cached, pets=pets[:limit])
+            RecommendationModel._count('refilled')
+        
+        result = RecommendationModel.compute_recommendations(user_id, depth)
+        if result['type'] == 'error':
+            return result
+        RecommendationModel._cache.set(user_id, result)
+        return dict(result, pets=result['pets'][:limit])
+
+    @staticmethod
+    def forget_user(user_id):
+        """
+        Drop a user's cached and precomputed recommendations (their application history changed)
+        The in-memory cache is per process: other workers keep serving their copy for up to
+        RECOMMENDATION_CACHE_TTL seconds (still filtered to available pets, just not re-ranked)
+        """
+        RecommendationModel._cache.pop(user_id)
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM user_recommendations WHERE user_id = %s', (user_id,))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error clearing precomputed recommendations: {e}")
+
+    @staticmethod
+    def record_application(user_id, pet_id):
+        """
+        A user applied for a pet: refresh everything that depends on application history
+        What this does: Drops their cached lists and folds the application into the co-application model
+        """
+        RecommendationModel.forget_user(user_id)
+        if item_similarity.np is None or not Config.RECOMMENDATION_CF_ENABLED:
+            return
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('''
+                SELECT aa.pet_id, p.breed, p.shelter_id
+                FROM adoption_applications aa
+                JOIN pets p ON aa.pet_id = p.pet_id
+                WHERE aa.user_id = %s
+            ''', (user_id,))
+            rows = cursor.fetchall()
+            conn.close()
+        except Exception as e:
+            print(f"Error updating item similarity: {e}")
+            return
+        previous_items, new_items = set(), []
+        for row in rows:
+            items = item_similarity.application_items(row['breed'], row['shelter_id'])
+            if row['pet_id'] == pet_id:
+                new_items = items
+            else:
+                previous_items.update(items)
+        item_similarity.record_application(previous_items, new_items)
+
+    @staticmethod
+    def _affinity(history):
+        """Co-application weights for this history, or None until the similarity model is built"""
+        model = item_similarity.get_model()
+        if model is None:
+            return None
+        user_items = []
+        for app in history:
+            user_items.extend(item_similarity.application_items(app['breed'], app['shelter_id']))
+        return model.affinity(user_items)
+
+    @staticmethod
+    def _drop_unavailable(pets):
+        """Cached pets that are still available, checked against the database rather than this process's events"""
+        if not pets:
+            return pets
+        pet_ids = [pet['pet_id'] for pet in pets]
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT pet_id FROM pets
+                WHERE pet_id IN ({', '.join(['%s'] * len(pet_ids))})
+                  AND adoption_state = {PetStatus.AVAILABLE}
+            ''', pet_ids)
+            available = {row[0] for row in cursor.fetchall()}
+            cursor.close()
+            conn.close()
+        except mysql.connector.Error as e:
+            print(f"Error checking cached recommendations: {e}")
+            return pets
+        kept = [pet for pet in pets if pet['pet_id'] in available]
+        if len(kept) < len(pets):
+            RecommendationModel._count('stale_dropped', len(pets) - len(kept))
+        return kept
+
+    @staticmethod
+    def _count(name, amount=1):
+        with RecommendationModel._stats_lock:
+            RecommendationModel._stats[name] += amount
+
+    @staticmethod
+    def cache_stats():
+        """Hit ratio of the per-user cache and how many cached pets were filtered out as no longer available"""
+        stats = RecommendationModel._cache.stats()
+        with RecommendationModel._stats_lock:
+            stats.update(RecommendationModel._stats)
+        stats['enabled'] = Config.RECOMMENDATION_CACHE_SIZE > 0
+        model = item_similarity.item_similarity
+        stats['item_similarity'] = model.stats() if model is not None else None
+        return stats
+
+    @staticmethod
+    def compute_recommendations(user_id, limit=10):
         """
         AI-powered pet recommendations
         What this does: Suggests pets based on user preferences and behavior
         Why: Personalized experience increases adoption chances
+
+        Scoring runs in memory over the pet catalog (see recommendation_engine) when it is loaded,
+        blended with co-application similarity (item_similarity); the database is only asked for
+        the adopter's history and the rows of the winning pets.
         """
         try:
             conn = get_db_connection()
             cursor = conn.cursor(dictionary=True)
             
-            # Get user preferences
-            preferences = RecommendationModel.get_user_preferences(user_id)
+            # Written by the nightly/weekly batch (manage.py recommend-batch); one primary-key range read
+            precomputed = RecommendationModel._precomputed(cursor, user_id, limit)
+            if len(precomputed) >= limit:
+                conn.close()
+                return {
+                    'type': 'personalized',
+                    'message': 'Recommended based on your preferences',
+                    'pets': precomputed[:limit]
+                }
             
-            if not preferences:
-                # New user - show popular/recent pets
-                cursor.execute('''
-                    SELECT p.*, s.shelter_name, 
-                           COUNT(aa.pet_id) as application_count
-                    FROM pets p
+            history = RecommendationModel._application_history(cursor, user_id)
+            
+            if not history:
+                # New user - show popular/recent pets: an index range read on pet_popularity
+                # (is_available, log_score); the pets filter drops rows whose availability drifted
+                cursor.execute(f'''
+                    SELECT p.*, s.shelter_name, pp.applications AS application_count
+                    FROM pet_popularity pp
+                    JOIN pets p ON p.pet_id = pp.pet_id
                     LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
-                    LEFT JOIN adoption_applications aa ON p.pet_id = aa.pet_id
-                    WHERE p.adoption_status = 'notadopted'
-                    GROUP BY p.pet_id
-                    ORDER BY application_count DESC, p.created_at DESC
+                    WHERE pp.is_available = 1
+                      AND p.adoption_state = {PetStatus.AVAILABLE}
+                    ORDER BY pp.log_score DESC
                     LIMIT %s
                 ''', (limit,))
                 
@@ -100,51 +247,16 @@ class RecommendationModel:
                     'pets': recommendations
                 }
             
-            # Build recommendation query based on preferences
-            query = '''
-                SELECT p.*, s.shelter_name, 
-                       (CASE 
-            '''
-            
-            score_conditions = []
-            params = []
-            
-            # Species scoring
-            for species, count in preferences['species'].items():
-                score_conditions.append(f"WHEN p.species = %s THEN {count * 10}")
-                params.append(species)
-            
-            # Breed scoring
-            for breed, count in preferences['breeds'].items():
-                score_conditions.append(f"WHEN p.breed = %s THEN {count * 5}")
-                params.append(breed)
-            
-            # Age range scoring
-            if preferences['age_ranges']['young'] > 0:
-                score_conditions.append(f"WHEN p.age <= 2 THEN {preferences['age_ranges']['young'] * 3}")
-            if preferences['age_ranges']['adult'] > 0:
-                score_conditions.append(f"WHEN p.age BETWEEN 3 AND 7 THEN {preferences['age_ranges']['adult'] * 3}")
-            if preferences['age_ranges']['senior'] > 0:
-                score_conditions.append(f"WHEN p.age > 7 THEN {preferences['age_ranges']['senior'] * 3}")
-            
-            query += ' + '.join(score_conditions) if score_conditions else '0'
-            query += '''
-                       ELSE 1 END) as recommendation_score
-                FROM pets p
-                LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
-                WHERE p.adoption_status = 'notadopted'
-                  AND p.pet_id NOT IN (
-                      SELECT pet_id FROM adoption_applications 
-                      WHERE user_id = %s AND status IN ('pending', 'approved')
-                  )
-                ORDER BY recommendation_score DESC, p.created_at DESC
-                LIMIT %s
-            '''
+            preferences = RecommendationModel._preferences_from(history)
+            applied_ids = {app['pet_id'] for app in history}
             
-            params.extend([user_id, limit])
-            
-            cursor.execute(query, params)
-            recommendations = cursor.fetchall()
+            catalog = pet_catalog.get_catalog()
+            if catalog is not None:
+                ranked = recommendation_engine.score_pets(catalog, preferences, applied_ids, limit,
+                                                          RecommendationModel._affinity(history))
+                recommendations = RecommendationModel._fetch_ranked(cursor, ranked)
+            else:
+                recommendations = RecommendationModel._sql_recommendations(cursor, preferences, applied_ids, limit)
             conn.close()
             
             return {
@@ -156,4 +268,78 @@ class RecommendationModel:
             
         except Exception as e:
             print(f"Error getting recommendations: {e}")
-            return {'type': 'error', 'pets': [], 'message': str(e)}
\ No newline at end of file
+            return {'type': 'error', 'pets': [], 'message': str(e)}
+
+    @staticmethod
+    def _precomputed(cursor, user_id, limit):
+        """Still-available pets from the user's recent user_recommendations rows, in stored order"""
+        cursor.execute(f'''
+            SELECT p.*, s.shelter_name, ur.score AS recommendation_score
+            FROM user_recommendations ur
+            JOIN pets p ON p.pet_id = ur.pet_id
+            LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
+            WHERE ur.user_id = %s
+              AND ur.computed_at >= NOW() - INTERVAL %s HOUR
+              AND p.adoption_state = {PetStatus.AVAILABLE}
+            ORDER BY ur.position
+            LIMIT %s
+        ''', (user_id, Config.RECOMMENDATION_PRECOMPUTED_MAX_AGE_HOURS, limit))
+        return cursor.fetchall()
+
+    @staticmethod
+    def _fetch_ranked(cursor, ranked):
+        """Rows for [(pet_id, score)] in ranked order; pets adopted since the catalog last saw them drop out"""
+        if not ranked:
+            return []
+        pet_ids = [pet_id for pet_id, _ in ranked]
+        cursor.execute(f'''
+            SELECT p.*, s.shelter_name
+            FROM pets p
+            LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
+            WHERE p.pet_id IN ({', '.join(['%s'] * len(pet_ids))})
+              AND p.adoption_state = {PetStatus.AVAILABLE}
+        ''', pet_ids)
+        rows = {row['pet_id']: row for row in cursor.fetchall()}
+        recommendations = []
+        for pet_id, score in ranked:
+            row = rows.get(pet_id)
+            if row is not None:
+                row['recommendation_score'] = score
+                recommendations.append(row)
+        return recommendations
+
+    @staticmethod
+    def _sql_recommendations(cursor, preferences, applied_ids, limit):
+        """
+        Same scoring as recommendation_engine, in SQL, for when the catalog is not loaded
+        Each matching feature adds its points (a sum of CASEs, not one CASE that stops at the first match)
+        """
+        weights = recommendation_engine.FEATURE_WEIGHTS
+        terms = []
+        params = []
+        for key, column in recommendation_engine.PREFERENCE_COLUMNS:
+            for value, count in preferences[key].items():
+                terms.append(f"(CASE WHEN p.{column} = %s THEN {count * weights[column]} ELSE 0 END)")
+                params.append(value)
+        age_conditions = {'young': 'p.age <= 2', 'adult': 'p.age BETWEEN 3 AND 7', 'senior': 'p.age > 7'}
+        for bucket, count in preferences['age_ranges'].items():
+            if count > 0:
+                terms.append(f"(CASE WHEN {age_conditions[bucket]} THEN {count * weights['age_bucket']} ELSE 0 END)")
+        
+        query = f'''
+            SELECT p.*, s.shelter_name, {' + '.join(terms) if terms else '0'} AS recommendation_score
+            FROM pets p
+            LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
+            WHERE p.adoption_state = {PetStatus.AVAILABLE}
+        '''
+        if applied_ids:
+            query += f"AND p.pet_id NOT IN ({', '.join(['%s'] * len(applied_ids))})"
+            params.extend(applied_ids)
+        query += '''
+            ORDER BY recommendation_score DESC, p.created_at DESC
+            LIMIT %s
+        '''
+        params.append(limit)
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
@@ -0,0 +1,612 @@
+# models/search_index.py
+import heapq
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from config import Config
+from database.db_connection import connect_to_database
+from models import catalog_events
+from models.pet_status import PetStatus
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lower-cased alphanumeric tokens"""
+    return TOKEN.findall((text or '').lower())
+
+
+class PetSearchIndex:
+    """
+    In-memory inverted index over available pets
+    What this does: Maps every token of name, breed, species and shelter name to the pets containing it
+    Why: LIKE '%x%' over four columns can never use an index and scans the whole join on every keystroke
+    """
+
+    # Field boosts: a match on the pet's name matters more than a match on its shelter
+    FIELDS = {'name': 3.0, 'breed': 2.0, 'species': 1.5, 'shelter_name': 1.0}
+
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+
+    # Prefix expansions score a little lower than exact token matches
+    PREFIX_DISCOUNT = 0.8
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built = False
+        self.built_at = None
+        self._reset()
+
+    def _reset(self):
+        self._postings = {field: {} for field in self.FIELDS}      # field -> token -> {pet_id: tf}
+        self._lengths = {field: {} for field in self.FIELDS}       # field -> pet_id -> token count
+        self._total_length = {field: 0 for field in self.FIELDS}
+        self._docs = {}                                             # pet_id -> {field: [tokens]}
+        self._vocabulary = []                                       # sorted, for prefix lookups
+        self._term_refs = {}                                        # token -> number of (field, pet) postings
+
+    def build(self, rows):
+        """Replace the whole index with `rows` (dicts with pet_id and the indexed fields)"""
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(row)
+            self._vocabulary = sorted(self._term_refs)
+            self.built = True
+            self.built_at = time.monotonic()
+
+    def add(self, row):
+        with self._lock:
+            gone = self._remove(row['pet_id'])
+            new_tokens = self._add(row)
+            for token in set(gone) - set(new_tokens):
+                self._drop_from_vocabulary(token)
+            for token in new_tokens:
+                index = bisect_left(self._vocabulary, token)
+                if index == len(self._vocabulary) or self._vocabulary[index] != token:
+                    self._vocabulary.insert(index, token)
+
+    def remove(self, pet_id):
+        with self._lock:
+            for token in self._remove(pet_id):
+                self._drop_from_vocabulary(token)
+
+    def _drop_from_vocabulary(self, token):
+        if token in self._term_refs:
+            return
+        index = bisect_left(self._vocabulary, token)
+        if index < len(self._vocabulary) and self._vocabulary[index] == token:
+            del self._vocabulary[index]
+
+    def _add(self, row):
+        """Index one pet; returns tokens that are new to the vocabulary"""
+        pet_id = row['pet_id']
+        new_tokens = []
+        doc = {}
+        for field in self.FIELDS:
+            tokens = tokenize(row.get(field))
+            doc[field] = tokens
+            self._lengths[field][pet_id] = len(tokens)
+            self._total_length[field] += len(tokens)
+
+            postings = self._postings[field]
+            for token in tokens:
+                pets = postings.setdefault(token, {})
+                if pet_id not in pets:
+                    if token not in self._term_refs:
+                        new_tokens.append(token)
+                    self._term_refs[token] = self._term_refs.get(token, 0) + 1
+                pets[pet_id] = pets.get(pet_id, 0) + 1
+        self._docs[pet_id] = doc
+        return new_tokens
+
+    def _remove(self, pet_id):
+        """Drop one pet; returns tokens that no longer occur anywhere"""
+        doc = self._docs.pop(pet_id, None)
+        if doc is None:
+            return []
+
+        gone = []
+        for field, tokens in doc.items():
+            self._total_length[field] -= self._lengths[field].pop(pet_id, 0)
+            postings = self._postings[field]
+            for token in set(tokens):
+                pets = postings.get(token)
+                if not pets or pets.pop(pet_id, None) is None:
+                    continue
+                if not pets:
+                    del postings[token]
+                self._term_refs[token] -= 1
+                if self._term_refs[token] == 0:
+                    del self._term_refs[token]
+                    gone.append(token)
+        return gone
+
+    def _expand(self, token):
+        """The token itself plus vocabulary terms it is a prefix of (capped)"""
+        terms = []
+        index = bisect_left(self._vocabulary, token)
+        while index < len(self._vocabulary) and len(terms) < Config.SEARCH_INDEX_MAX_EXPANSIONS:
+            term = self._vocabulary[index]
+            if not term.startswith(token):
+                break
+            terms.append(term)
+            index += 1
+        return terms
+
+    def _score_term(self, term, weight, scores):
+        """Add BM25 contributions of `term` across all fields into `scores`; returns matching pet ids"""
+        matched = set()
+        total_docs = len(self._docs) or 1
+        for field, boost in self.FIELDS.items():
+            pets = self._postings[field].get(term)
+            if not pets:
+                continue
+            avg_length = (self._total_length[field] / total_docs) or 1.0
+            lengths = self._lengths[field]
+            idf = math.log(1 + (total_docs - len(pets) + 0.5) / (len(pets) + 0.5))
+            for pet_id, tf in pets.items():
+                norm = 1 - self.B + self.B * lengths[pet_id] / avg_length
+                scores[pet_id] = scores.get(pet_id, 0.0) + weight * boost * idf * tf * (self.K1 + 1) / (tf + self.K1 * norm)
+                matched.add(pet_id)
+        return matched
+
+    def search(self, text, limit=None):
+        """
+        Rank available pets for a free-text query
+        Every query token must match some field (exactly or as a prefix); returns [(pet_id, score)] best first
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+
+        with self._lock:
+            scores = {}
+            candidates = None
+            for token in tokens:
+                matched = set()
+                for term in self._expand(token):
+                    weight = 1.0 if term == token else self.PREFIX_DISCOUNT
+                    matched |= self._score_term(term, weight, scores)
+                candidates = matched if candidates is None else candidates & matched
+                if not candidates:
+                    return []
+
+        ranked = sorted(((pet_id, scores[pet_id]) for pet_id in candidates), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+    def stats(self):
+        with self._lock:
+            return {
+                'built': self.built,
+                'documents': len(self._docs),
+                'terms': len(self._vocabulary),
+            }
+
+
+class _TrieNode:
+    __slots__ = ('children', 'terms', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.terms = set()   # terms whose key ends at this node
+        self.top = []        # best terms anywhere below this node, best first
+
+
+class PetSuggestIndex:
+    """
+    Prefix trie of pet names, breeds, species and shelter names for typeahead
+    What this does: Every node keeps its best few completions, weighted by how many available pets use the term
+    Why: A suggestion is then one walk down the typed prefix, with no ranking work and no database query
+    """
+
+    # Row field -> suggestion type
+    FIELDS = {'name': 'name', 'breed': 'breed', 'species': 'species', 'shelter_name': 'shelter'}
+
+    def __init__(self, top_k):
+        self.top_k = top_k
+        self._lock = threading.RLock()
+        self.built = False
+        self.built_at = None
+        self._reset()
+
+    def _reset(self):
+        self._root = _TrieNode()
+        self._counts = {}    # (type, lower-cased text) -> available pets using it
+        self._display = {}   # (type, lower-cased text) -> text as first seen
+        self._docs = {}      # pet_id -> [terms]
+
+    @staticmethod
+    def _keys(term):
+        """'german shepherd' is reachable by typing 'ger...' or 'shep...'"""
+        tokens = tokenize(term[1])
+        return {' '.join(tokens[i:]) for i in range(len(tokens))}
+
+    def _rank(self, term):
+        return (-self._counts[term], term[1], term[0])
+
+    def _terms_of(self, row):
+        terms = []
+        for field, kind in self.FIELDS.items():
+            text = (row.get(field) or '').strip()
+            if text and tokenize(text):
+                term = (kind, text.lower())
+                self._display.setdefault(term, text)
+                terms.append(term)
+        return terms
+
+    def build(self, rows):
+        with self._lock:
+            self._reset()
+            for row in rows:
+                terms = self._terms_of(row)
+                self._docs[row['pet_id']] = terms
+                for term in terms:
+                    self._counts[term] = self._counts.get(term, 0) + 1
+            for term in self._counts:
+                for key in self._keys(term):
+                    self._path(key, create=True)[-1].terms.add(term)
+            self._refresh_subtree(self._root)
+            self.built = True
+            self.built_at = time.monotonic()
+
+    def add(self, row):
+        with self._lock:
+            old_terms = set(self._docs.get(row['pet_id'], []))
+            new_terms = self._terms_of(row)
+            self._docs[row['pet_id']] = new_terms
+            # Only touch what changed; a shelter rename re-adds every pet but moves one term
+            for term in old_terms - set(new_terms):
+                self._bump(term, -1)
+            for term in set(new_terms) - old_terms:
+                self._bump(term, 1)
+
+    def remove(self, pet_id):
+        with self._lock:
+            for term in self._docs.pop(pet_id, []):
+                self._bump(term, -1)
+
+    def _path(self, key, create=False):
+        """Nodes from the root down to `key`; None if it is not in the trie"""
+        node = self._root
+        nodes = [node]
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _TrieNode()
+            node = child
+            nodes.append(node)
+        return nodes
+
+    def _bump(self, term, delta):
+        count = self._counts.get(term, 0) + delta
+        if count > 0:
+            self._counts[term] = count
+        else:
+            self._counts.pop(term, None)
+            self._display.pop(term, None)
+
+        for key in self._keys(term):
+            nodes = self._path(key, create=count > 0)
+            if nodes is None:
+                continue
+            if count > 0:
+                nodes[-1].terms.add(term)
+            else:
+                nodes[-1].terms.discard(term)
+            # Re-rank from the leaf up, unlinking nodes that no longer lead anywhere
+            for depth in range(len(nodes) - 1, -1, -1):
+                node = nodes[depth]
+                if depth and not node.terms and not node.children:
+                    del nodes[depth - 1].children[key[depth - 1]]
+                    continue
+                self._refresh(node)
+
+    def _refresh(self, node):
+        candidates = set(node.terms)
+        for child in node.children.values():
+            candidates.update(child.top)
+        # A term being dropped can still sit in tops along its other keys until those are refreshed
+        candidates.intersection_update(self._counts)
+        node.top = heapq.nsmallest(self.top_k, candidates, key=self._rank)
+
+    def _refresh_subtree(self, root):
+        # Iterative post-order, so long names cannot hit the recursion limit
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                self._refresh(node)
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+
+    def suggest(self, prefix, limit=None):
+        """Best completions of `prefix`: [{'text', 'type', 'count'}], never more than top_k"""
+        key = ' '.join(tokenize(prefix))
+        if not key:
+            return []
+        limit = max(1, min(limit or self.top_k, self.top_k))
+        with self._lock:
+            nodes = self._path(key)
+            if nodes is None:
+                return []
+            return [{'text': self._display[term], 'type': term[0], 'count': self._counts[term]}
+                    for term in nodes[-1].top[:limit]]
+
+    def stats(self):
+        with self._lock:
+            return {'built': self.built, 'terms': len(self._counts), 'pets': len(self._docs)}
+
+
+def trigrams(token):
+    padded = f'${token}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Optimal-string-alignment distance (transpositions count once); anything above `limit` returns limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class FuzzyVocabulary:
+    """
+    Character-trigram index over the words of available pets
+    What this does: Maps a misspelled query word to the closest known word ("labrdor" -> "labrador")
+    Why: Substring matching finds nothing for a typo; correcting the word first keeps every engine unchanged
+    """
+
+    # Words in the vocabulary; shelter names are included so a correct shelter word is never "fixed"
+    FIELDS = ('name', 'breed', 'species', 'shelter_name')
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built = False
+        self.built_at = None
+        self._reset()
+
+    def _reset(self):
+        self._refs = {}          # word -> available pets using it
+        self._grams = {}         # trigram -> {words}
+        self._docs = {}          # pet_id -> {words}
+        self._sorted = []        # sorted words, for "is this a prefix of something" checks
+
+    def _words_of(self, row):
+        words = set()
+        for field in self.FIELDS:
+            words.update(tokenize(row.get(field)))
+        return words
+
+    def build(self, rows):
+        with self._lock:
+            self._reset()
+            for row in rows:
+                words = self._words_of(row)
+                self._docs[row['pet_id']] = words
+                for word in words:
+                    self._refs[word] = self._refs.get(word, 0) + 1
+            for word in self._refs:
+                for gram in trigrams(word):
+                    self._grams.setdefault(gram, set()).add(word)
+            self._sorted = sorted(self._refs)
+            self.built = True
+            self.built_at = time.monotonic()
+
+    def add(self, row):
+        with self._lock:
+            old_words = self._docs.get(row['pet_id'], set())
+            new_words = self._words_of(row)
+            self._docs[row['pet_id']] = new_words
+            for word in old_words - new_words:
+                self._unref(word)
+            for word in new_words - old_words:
+                self._ref(word)
+
+    def remove(self, pet_id):
+        with self._lock:
+            for word in self._docs.pop(pet_id, set()):
+                self._unref(word)
+
+    def _ref(self, word):
+        if word in self._refs:
+            self._refs[word] += 1
+            return
+        self._refs[word] = 1
+        for gram in trigrams(word):
+            self._grams.setdefault(gram, set()).add(word)
+        self._sorted.insert(bisect_left(self._sorted, word), word)
+
+    def _unref(self, word):
+        self._refs[word] -= 1
+        if self._refs[word]:
+            return
+        del self._refs[word]
+        for gram in trigrams(word):
+            words = self._grams.get(gram)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self._grams[gram]
+        index = bisect_left(self._sorted, word)
+        if index < len(self._sorted) and self._sorted[index] == word:
+            del self._sorted[index]
+
+    def _is_known(self, word):
+        """Known word, or the start of one (the user may still be typing)"""
+        index = bisect_left(self._sorted, word)
+        return index < len(self._sorted) and self._sorted[index].startswith(word)
+
+    def correct(self, word):
+        """Closest known word for a misspelled one, or None when `word` is fine or nothing is close enough"""
+        if len(word) < Config.SEARCH_FUZZY_MIN_LENGTH or word.isdigit():
+            return None
+        with self._lock:
+            if self._is_known(word):
+                return None
+
+            grams = trigrams(word)
+            shared = {}
+            for gram in grams:
+                for candidate in self._grams.get(gram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+
+            max_edits = 1 if len(word) <= 5 else 2
+            best = None
+            for candidate, overlap in shared.items():
+                # Cheap upper bound first: most candidates share a single trigram
+                if overlap < Config.SEARCH_FUZZY_MIN_SIMILARITY * len(grams) or abs(len(candidate) - len(word)) > max_edits:
+                    continue
+                similarity = overlap / (len(grams) + len(trigrams(candidate)) - overlap)
+                if similarity < Config.SEARCH_FUZZY_MIN_SIMILARITY:
+                    continue
+                distance = edit_distance(word, candidate, max_edits)
+                if distance > max_edits:
+                    continue
+                # Fewest edits first, then the closer spelling, then the more common word
+                rank = (distance, -similarity, -self._refs[candidate], candidate)
+                if best is None or rank < best[0]:
+                    best = (rank, candidate)
+            return best[1] if best else None
+
+    def correct_text(self, text):
+        """Returns (corrected text, [(wrong, right)]); text comes back untouched when nothing was corrected"""
+        corrections = []
+        words = []
+        for word in tokenize(text):
+            fixed = self.correct(word)
+            if fixed:
+                corrections.append((word, fixed))
+            words.append(fixed or word)
+        return (' '.join(words) if corrections else text), corrections
+
+    def stats(self):
+        with self._lock:
+            return {'built': self.built, 'words': len(self._refs), 'trigrams': len(self._grams)}
+
+
+# One index of each kind per worker process
+pet_search_index = PetSearchIndex()
+pet_suggest_index = PetSuggestIndex(top_k=Config.SEARCH_SUGGEST_MAX_RESULTS)
+fuzzy_vocabulary = FuzzyVocabulary()
+_build_lock = threading.Lock()
+
+INDEXED_PETS_QUERY = '''
+    SELECT p.pet_id, p.name, p.breed, p.species, s.shelter_name
+    FROM pets p
+    LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
+    WHERE p.adoption_state = %s
+'''
+
+
+def _load_rows(extra_condition='', params=()):
+    conn = connect_to_database()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(INDEXED_PETS_QUERY + extra_condition, (PetStatus.AVAILABLE,) + tuple(params))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _stale(index):
+    return index.built_at is None or time.monotonic() - index.built_at > Config.SEARCH_INDEX_REFRESH_SECONDS
+
+
+def _ensure(index, announce):
+    """
+    Build `index` from the database the first time it is needed, and again once it is older than
+    SEARCH_INDEX_REFRESH_SECONDS: catalog_events only carries this process's writes, so pets added,
+    edited or adopted through other workers show up at the next refresh
+    """
+    if not _stale(index):
+        return index
+    if index.built:
+        # Refresh: one thread reloads while the others keep answering from the current index
+        if not _build_lock.acquire(blocking=False):
+            return index
+    else:
+        _build_lock.acquire()
+    try:
+        if _stale(index):
+            try:
+                rows = _load_rows()
+            except Exception as e:
+                if not index.built:
+                    raise
+                print(f"❌ Search index refresh failed (serving the previous one): {e}")
+                return index
+            index.build(rows)
+            print(announce(index, rows))
+    finally:
+        _build_lock.release()
+    return index
+
+
+def ensure_built():
+    return _ensure(pet_search_index, lambda index, rows: f"🔎 Search index built: {len(rows)} pets")
+
+
+def ensure_suggestions_built():
+    return _ensure(pet_suggest_index, lambda index, rows: f"🔎 Suggestion trie built: {index.stats()['terms']} terms")
+
+
+def ensure_fuzzy_built():
+    return _ensure(fuzzy_vocabulary, lambda index, rows: f"🔎 Fuzzy vocabulary built: {index.stats()['words']} words")
+
+
+def _built_indexes():
+    return [index for index in (pet_search_index, pet_suggest_index, fuzzy_vocabulary) if index.built]
+
+
+def _reindex_pet(pet_id, **_):
+    indexes = _built_indexes()
+    if not indexes:
+        return
+    rows = _load_rows(' AND p.pet_id = %s', (pet_id,))
+    for index in indexes:
+        if rows:
+            index.add(rows[0])
+        else:
+            index.remove(pet_id)
+
+
+def _drop_pet(pet_id, **_):
+    for index in _built_indexes():
+        index.remove(pet_id)
+
+
+def _reindex_shelter(shelter_id, **_):
+    indexes = _built_indexes()
+    if not indexes:
+        return
+    for row in _load_rows(' AND p.shelter_id = %s', (shelter_id,)):
+        for index in indexes:
+            index.add(row)
+
+
+catalog_events.subscribe('pet_added', _reindex_pet)
+catalog_events.subscribe('pet_status_changed', _reindex_pet)
+catalog_events.subscribe('pet_deleted', _drop_pet)
+catalog_events.subscribe('shelter_updated', _reindex_shelter)
@@ -1,8 +1,67 @@
 # models/search_model.py
+import base64
+import json
 import mysql.connector
 from database.db_connection import connect_to_database as get_db_connection
+from config import Config
+from models import catalog_events, geo, pet_catalog, search_index, search_trends
+from models.cache import TTLCache
+from models.pet_status import PetStatus
+
+
+class SearchFilterError(ValueError):
+    """Raised for a search parameter that cannot be interpreted (reported to the client as a 400)"""
+
+
+class SearchCursorError(SearchFilterError):
+    """Raised for a malformed cursor or one issued for a different ordering"""
+
 
 class SearchModel:
+    SORT_FIELDS = ['name', 'age', 'breed', 'species', 'created_at']
+    
+    # Orderings computed outside SQL; their cursors carry a position instead of a key
+    POSITIONAL_SORTS = ('relevance', 'distance')
+    
+    # Request keys that change how results are returned but not which pets match
+    NON_FILTER_KEYS = ('limit', 'offset', 'cursor', 'count', 'sort_by', 'sort_order', 'facets', 'fuzzy')
+    
+    # Free-text filters that fuzzy=true may correct
+    FUZZY_FIELDS = ('search_text', 'breed', 'species')
+    
+    # Facets returned by facets=true, as (name, SQL expression)
+    FACETS = [
+        ('category', 'p.category'),
+        ('species', 'p.species'),
+        ('gender', 'p.gender'),
+        ('breed', 'p.breed'),
+        ('location', 's.location'),
+        ('age_bucket', "CASE WHEN p.age <= 2 THEN 'young' WHEN p.age <= 7 THEN 'adult' ELSE 'senior' END"),
+    ]
+    
+    # Whole result pages per canonical request, dropped on any catalog write
+    _result_cache = TTLCache(maxsize=Config.SEARCH_RESULT_CACHE_SIZE, ttl=Config.SEARCH_RESULT_CACHE_TTL)
+    
+    # Total matches per normalized filter set, for count=cached
+    _count_cache = TTLCache(maxsize=Config.SEARCH_COUNT_CACHE_SIZE, ttl=Config.SEARCH_COUNT_CACHE_TTL)
+    
+    # Facet counts per normalized filter set
+    _facet_cache = TTLCache(maxsize=Config.SEARCH_FACET_CACHE_SIZE, ttl=Config.SEARCH_FACET_CACHE_TTL)
+    
+    # Dropdown options for the advanced search page
+    _filter_options_cache = TTLCache(maxsize=1, ttl=Config.SEARCH_FACET_CACHE_TTL)
+    
+    # Trending lists only move when workers flush, so a short cache absorbs page loads
+    _trending_cache = TTLCache(maxsize=8, ttl=Config.SEARCH_TRENDS_FLUSH_SECONDS)
+    
+    # Columns of a search result row; FROM/WHERE is appended per query
+    RESULT_COLUMNS = '''
+        SELECT p.*, s.shelter_name, s.location as shelter_location,
+               ms.is_vaccinated, ms.last_visit_date, ms.visit_count,
+               ms.latest_diagnosis AS diagnosis, ms.latest_dr_name AS dr_name,
+               ms.latest_vaccinations AS vaccinations
+    '''
+    
     @staticmethod
     def search_pets(filters):
         """
@@ -10,123 +69,475 @@ class SearchModel:
         What this does: Searches pets based on multiple criteria
         Why: Users want to find specific types of pets quickly
         """
+        use_cache = Config.SEARCH_RESULT_CACHE_SIZE > 0
+        if use_cache:
+            # Read the version before querying so a write that lands mid-query retires this entry
+            key = SearchModel.result_key(filters)
+            cached = SearchModel._result_cache.get(key)
+            if cached is not None:
+                return cached
+        
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            # Base query with JOINs for complete pet info
-            base_query = '''
-                SELECT DISTINCT p.*, s.shelter_name, s.location as shelter_location,
-                       m.vaccinations, m.diagnosis, m.dr_name
-                FROM pets p
-                LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
-                LEFT JOIN medical_records m ON p.pet_id = m.pet_id
-                WHERE p.adoption_status = 'notadopted'
-            '''
-            
-            conditions = []
-            params = []
+            result = SearchModel._run_search(filters)
+        except SearchFilterError:
+            raise
+        except Exception as e:
+            print(f"Search error: {e}")
+            return {'pets': [], 'total_count': 0, 'current_page': 1, 'total_pages': 1}
+        
+        if use_cache:
+            SearchModel._result_cache.set(key, result)
+        return result
+    
+    @staticmethod
+    def _run_search(filters):
+        """One page of results, picked by the in-memory catalog when it can and by SQL otherwise"""
+        from_where, params, relevance_ids, distances = SearchModel._build_where(filters)
+        if from_where is None:
+            return {'pets': [], 'total_count': 0, 'current_page': 1, 'total_pages': 0,
+                    'has_more': False, 'next_cursor': None}
+        
+        # SORTING
+        sort_by = filters.get('sort_by', 'name')
+        sort_order = 'DESC' if str(filters.get('sort_order', 'ASC')).upper() == 'DESC' else 'ASC'
+        if (sort_by == 'relevance' and not relevance_ids) or (sort_by == 'distance' and distances is None):
+            sort_by = 'name'
+        elif sort_by not in SearchModel.POSITIONAL_SORTS and sort_by not in SearchModel.SORT_FIELDS:
+            sort_by = None
+        
+        # PAGINATION: opaque keyset cursor if given, plain offset otherwise
+        limit = max(min(int(filters.get('limit', 20)), 100), 1)  # Max 100 results
+        offset = max(int(filters.get('offset', 0)), 0)
+        cursor_key = SearchModel.decode_cursor(filters['cursor'], sort_by, sort_order) if filters.get('cursor') else None
+        if cursor_key and sort_by in SearchModel.POSITIONAL_SORTS:
+            offset = cursor_key['pos']
+        
+        # TOTAL COUNT: exact (default for offset paging), cached per filter set, or skipped
+        count_mode = filters.get('count') or ('cached' if cursor_key else 'exact')
+        
+        catalog = SearchModel._usable_catalog(filters, sort_by, relevance_ids)
+        if catalog is not None:
+            page_ids, total_matches, has_more = catalog.search(
+                filters, sort_by, sort_order, limit, offset, cursor_key,
+                candidate_ids=relevance_ids, shelter_ids=None if distances is None else list(distances)
+            )
+            results = SearchModel._fetch_pets(page_ids)
+            total_count = None if count_mode == 'none' else total_matches
+        else:
+            results, has_more, total_count = SearchModel._sql_page(
+                filters, from_where, params, relevance_ids, distances,
+                sort_by, sort_order, limit, offset, cursor_key, count_mode
+            )
+        
+        if distances is not None:
+            for row in results:
+                row['distance_km'] = distances.get(row['shelter_id'])
+        
+        next_cursor = None
+        if has_more and sort_by:
+            next_cursor = SearchModel.encode_cursor(sort_by, sort_order, results[-1], offset + limit)
+        
+        return {
+            'pets': results,
+            'total_count': total_count,
+            'count_mode': count_mode,
+            'current_page': None if cursor_key else offset // limit + 1,
+            'total_pages': None if total_count is None else (total_count + limit - 1) // limit,
+            'has_more': has_more,
+            'next_cursor': next_cursor
+        }
+    
+    @staticmethod
+    def _usable_catalog(filters, sort_by, relevance_ids):
+        """The columnar catalog when it is fresh and understands every filter, else None (use SQL)"""
+        if sort_by in SearchModel.POSITIONAL_SORTS:
+            return None
+        # Substring text search needs SQL; index-engine text search arrives here as candidate ids
+        if filters.get('search_text') and relevance_ids is None:
+            return None
+        filter_keys = [key for key, value in filters.items()
+                       if value not in (None, '') and key not in SearchModel.NON_FILTER_KEYS]
+        catalog = pet_catalog.get_catalog()
+        if catalog is None or not catalog.supports(filter_keys, sort_by):
+            return None
+        return catalog
+    
+    @staticmethod
+    def _fetch_pets(pet_ids):
+        """
+        Result rows for the given pets, in the given order (primary-key lookups only)
+        Pets adopted since the ids were picked (another worker, or the catalog's last refresh) are left out
+        """
+        if not pet_ids:
+            return []
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(SearchModel.RESULT_COLUMNS + '''
+            FROM pets p
+            LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
+            LEFT JOIN pet_medical_summary ms ON p.pet_id = ms.pet_id
+            WHERE p.pet_id IN ({}) AND p.adoption_state = {}
+        '''.format(', '.join(['%s'] * len(pet_ids)), PetStatus.AVAILABLE), pet_ids)
+        rows = {row['pet_id']: row for row in cursor.fetchall()}
+        cursor.close()
+        conn.close()
+        return [rows[pet_id] for pet_id in pet_ids if pet_id in rows]
+    
+    @staticmethod
+    def _sql_page(filters, from_where, params, relevance_ids, distances,
+                  sort_by, sort_order, limit, offset, cursor_key, count_mode):
+        """One page and its total straight from the database: (rows, has_more, total_count)"""
+        if sort_by == 'relevance':
+            return SearchModel._relevance_page(filters, from_where, params, relevance_ids, limit, offset, count_mode)
+        
+        query = SearchModel.RESULT_COLUMNS + from_where
+        page_params = list(params)
+        
+        if sort_by == 'distance':
+            # Nearest shelter first; its pets in id order
+            shelter_ids = list(distances)
+            query += f" ORDER BY FIELD(p.shelter_id, {', '.join(['%s'] * len(shelter_ids))}), p.pet_id"
+            page_params.extend(shelter_ids)
+        elif sort_by:
+            if cursor_key:
+                keyset_sql, keyset_params = SearchModel._keyset_condition(sort_by, sort_order, cursor_key)
+                query += ' AND ' + keyset_sql
+                page_params.extend(keyset_params)
+                offset = 0
+            # pet_id breaks ties so every row has exactly one position for the cursor
+            query += f' ORDER BY p.{sort_by} {sort_order}, p.pet_id {sort_order}'
+        
+        # One extra row tells us whether there is a next page without counting
+        query += f' LIMIT {limit + 1} OFFSET {offset}'
+        
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        
+        cursor.execute(query, page_params)
+        results = cursor.fetchall()
+        has_more = len(results) > limit
+        results = results[:limit]
+        total_count = SearchModel._total_count(cursor, filters, from_where, params, count_mode)
+        
+        cursor.close()
+        conn.close()
+        return results, has_more, total_count
+    
+    @staticmethod
+    def _total_count(cursor, filters, from_where, params, count_mode):
+        """COUNT(*) over the filtered join, or None for count=none; count=cached reuses a recent one"""
+        if count_mode == 'none':
+            return None
+        count_key = (catalog_events.catalog_version(),) + SearchModel.filter_key(filters, exclude=SearchModel.NON_FILTER_KEYS)
+        total_count = SearchModel._count_cache.get(count_key) if count_mode == 'cached' else None
+        if total_count is None:
+            cursor.execute('SELECT COUNT(*) AS total_count ' + from_where, params)
+            total_count = cursor.fetchone()['total_count']
+            SearchModel._count_cache.set(count_key, total_count)
+        return total_count
+    
+    @staticmethod
+    def _relevance_page(filters, from_where, params, relevance_ids, limit, offset, count_mode):
+        """
+        Page of text matches in the inverted index's BM25 order: (rows, has_more, total_count)
+        Walks the ranked ids best first, SEARCH_INDEX_MAX_SQL_IDS at a time, asking SQL which of them pass
+        the other filters, and stops once the page is full; ORDER BY FIELD() over every match would
+        search the whole id list for each row
+        """
+        wanted = offset + limit + 1
+        chunk_size = max(Config.SEARCH_INDEX_MAX_SQL_IDS, 1)
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        ordered = []
+        for start in range(0, len(relevance_ids), chunk_size):
+            chunk = relevance_ids[start:start + chunk_size]
+            cursor.execute('SELECT p.pet_id ' + from_where + f" AND p.pet_id IN ({', '.join(['%s'] * len(chunk))})",
+                           list(params) + chunk)
+            matching = {row['pet_id'] for row in cursor.fetchall()}
+            ordered.extend(pet_id for pet_id in chunk if pet_id in matching)
+            if len(ordered) >= wanted:
+                break
+        if count_mode == 'none':
+            total_count = None
+        elif len(ordered) < wanted:
+            total_count = len(ordered)  # Walked every match
+        else:
+            total_count = SearchModel._total_count(cursor, filters, from_where, params, count_mode)
+        cursor.close()
+        conn.close()
+        
+        page_ids = ordered[offset:wanted]
+        results = SearchModel._fetch_pets(page_ids[:limit])
+        return results, len(page_ids) > limit, total_count
+    
+    @staticmethod
+    def get_facet_counts(filters):
+        """
+        Per-facet counts for the current filter set
+        What this does: Counts matching pets per category/species/gender/breed/location/age bucket
+        Why: One grouped pass over the filtered join instead of a DISTINCT scan per dropdown
+        """
+        key = (catalog_events.catalog_version(),) + SearchModel.filter_key(filters, exclude=SearchModel.NON_FILTER_KEYS)
+        cached = SearchModel._facet_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            facets = {name: {} for name, _ in SearchModel.FACETS}
+            from_where, params, _, _ = SearchModel._build_where(filters)
+            
+            if from_where is not None:
+                columns = ', '.join(f'{expression} AS {name}' for name, expression in SearchModel.FACETS)
+                group_by = ', '.join(name for name, _ in SearchModel.FACETS)
+                
+                conn = get_db_connection()
+                cursor = conn.cursor(dictionary=True)
+                # Each pet falls in exactly one attribute combination, so the group counts add up per facet
+                cursor.execute(
+                    f'SELECT {columns}, COUNT(*) AS pet_count {from_where} GROUP BY {group_by}',
+                    params
+                )
+                for row in cursor.fetchall():
+                    for name, _ in SearchModel.FACETS:
+                        value = row[name]
+                        if value is not None:
+                            facets[name][value] = facets[name].get(value, 0) + row['pet_count']
+                cursor.close()
+                conn.close()
+            
+            result = {
+                name: [{'value': value, 'count': count}
+                       for value, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))]
+                for name, counts in facets.items()
+            }
+            SearchModel._facet_cache.set(key, result)
+            return result
             
-            # TEXT SEARCH (breed, name, species)
-            if filters.get('search_text'):
+        except Exception as e:
+            print(f"Error getting facet counts: {e}")
+            return {name: [] for name, _ in SearchModel.FACETS}
+    
+    @staticmethod
+    def _build_where(filters):
+        """
+        Turn request filters into the shared FROM ... WHERE clause
+        Returns (from_where, params, relevance_ids, distances); from_where is None when the text or
+        radius part matched nothing. distances maps shelter_id -> km, nearest first, when near= is given
+        """
+        conditions = []
+        params = []
+        relevance_ids = None
+        distances = None
+        
+        # TEXT SEARCH (breed, name, species, shelter name)
+        if filters.get('search_text'):
+            if Config.SEARCH_ENGINE == 'index':
+                # Resolve the text part to candidate pet ids before the structured filters run; every
+                # match goes in, since a cap here would drop pets the other filters are looking for
+                ranked = search_index.ensure_built().search(filters['search_text'])
+                if not ranked:
+                    return None, [], [], None
+                relevance_ids = [pet_id for pet_id, _ in ranked]
+                if len(relevance_ids) <= Config.SEARCH_INDEX_MAX_SQL_IDS:
+                    conditions.append(f"p.pet_id IN ({', '.join(['%s'] * len(relevance_ids))})")
+                    params.extend(relevance_ids)
+                else:
+                    # A broad term: shipping every id would bloat the packet, so SQL re-derives the matches.
+                    # Each query word must occur in some field, a superset of the index's word-prefix matches;
+                    # the relevance order still comes from the ranked ids
+                    for token in search_index.tokenize(filters['search_text']):
+                        conditions.append('(p.name LIKE %s OR p.breed LIKE %s OR p.species LIKE %s OR s.shelter_name LIKE %s)')
+                        params.extend([f'%{token}%'] * 4)
+            else:
                 search_text = f"%{filters['search_text']}%"
                 conditions.append('''
                     (p.name LIKE %s OR p.breed LIKE %s OR p.species LIKE %s 
                      OR s.shelter_name LIKE %s)
                 ''')
                 params.extend([search_text, search_text, search_text, search_text])
-            
-            # CATEGORY FILTER
-            if filters.get('category'):
-                conditions.append('p.category = %s')
-                params.append(filters['category'])
-            
-            # SPECIES FILTER
-            if filters.get('species'):
-                conditions.append('p.species = %s')
-                params.append(filters['species'])
-            
-            # BREED FILTER
-            if filters.get('breed'):
-                conditions.append('p.breed LIKE %s')
-                params.append(f"%{filters['breed']}%")
-            
-            # AGE RANGE FILTER
-            if filters.get('min_age'):
-                conditions.append('p.age >= %s')
-                params.append(int(filters['min_age']))
-            
-            if filters.get('max_age'):
-                conditions.append('p.age <= %s')
-                params.append(int(filters['max_age']))
-            
-            # GENDER FILTER
-            if filters.get('gender'):
-                conditions.append('p.gender = %s')
-                params.append(filters['gender'])
-            
-            # VACCINATION STATUS FILTER
-            if filters.get('vaccinated'):
-                if filters['vaccinated'].lower() == 'true':
-                    conditions.append('m.vaccinations IS NOT NULL AND m.vaccinations != ""')
-                else:
-                    conditions.append('(m.vaccinations IS NULL OR m.vaccinations = "")')
-            
-            # SHELTER LOCATION FILTER
-            if filters.get('location'):
-                conditions.append('s.location LIKE %s')
-                params.append(f"%{filters['location']}%")
-            
-            # SIZE FILTER (if you have size field)
-            if filters.get('size'):
-                conditions.append('p.size = %s')
-                params.append(filters['size'])
-            
-            # Build final query
-            if conditions:
-                query = base_query + ' AND ' + ' AND '.join(conditions)
+        
+        # CATEGORY FILTER
+        if filters.get('category'):
+            conditions.append('p.category = %s')
+            params.append(filters['category'])
+        
+        # SPECIES FILTER
+        if filters.get('species'):
+            conditions.append('p.species = %s')
+            params.append(filters['species'])
+        
+        # BREED FILTER
+        if filters.get('breed'):
+            conditions.append('p.breed LIKE %s')
+            params.append(f"%{filters['breed']}%")
+        
+        # AGE RANGE FILTER
+        if filters.get('min_age'):
+            conditions.append('p.age >= %s')
+            params.append(int(filters['min_age']))
+        
+        if filters.get('max_age'):
+            conditions.append('p.age <= %s')
+            params.append(int(filters['max_age']))
+        
+        # GENDER FILTER
+        if filters.get('gender'):
+            conditions.append('p.gender = %s')
+            params.append(filters['gender'])
+        
+        # VACCINATION STATUS FILTER
+        if filters.get('vaccinated'):
+            if filters['vaccinated'].lower() == 'true':
+                conditions.append('ms.is_vaccinated = 1')
             else:
-                query = base_query
-            
-            # SORTING
-            sort_by = filters.get('sort_by', 'name')
-            sort_order = filters.get('sort_order', 'ASC')
-            
-            valid_sort_fields = ['name', 'age', 'breed', 'species', 'created_at']
-            if sort_by in valid_sort_fields:
-                query += f' ORDER BY p.{sort_by} {sort_order}'
-            
-            # PAGINATION
-            limit = min(int(filters.get('limit', 20)), 100)  # Max 100 results
-            offset = int(filters.get('offset', 0))
-            query += f' LIMIT {limit} OFFSET {offset}'
-            
-            print(f"Search Query: {query}")  # Debug
-            print(f"Params: {params}")  # Debug
-            
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            # Get total count for pagination
-            count_query = base_query.replace('SELECT DISTINCT p.*, s.shelter_name, s.location as shelter_location, m.vaccinations, m.diagnosis, m.dr_name', 'SELECT COUNT(DISTINCT p.pet_id)')
-            if conditions:
-                count_query += ' AND ' + ' AND '.join(conditions)
-            
-            cursor.execute(count_query, params[:-2] if conditions else [])  # Remove LIMIT/OFFSET params
-            total_count = cursor.fetchone()['COUNT(DISTINCT p.pet_id)']
-            
-            conn.close()
-            
-            return {
-                'pets': results,
-                'total_count': total_count,
-                'current_page': offset // limit + 1,
-                'total_pages': (total_count + limit - 1) // limit
-            }
-            
-        except Exception as e:
-            print(f"Search error: {e}")
-            return {'pets': [], 'total_count': 0, 'current_page': 1, 'total_pages': 1}
+                conditions.append('(ms.is_vaccinated IS NULL OR ms.is_vaccinated = 0)')
+        
+        # SHELTER LOCATION FILTER
+        if filters.get('location'):
+            conditions.append('s.location LIKE %s')
+            params.append(f"%{filters['location']}%")
+        
+        # RADIUS FILTER: shelters within radius_km of near=lat,lng, resolved in memory
+        if filters.get('near'):
+            lat, lng, radius_km = SearchModel._parse_near(filters)
+            nearby = geo.ensure_built().within(lat, lng, radius_km)
+            if not nearby:
+                return None, [], [], None
+            distances = dict(nearby)
+            conditions.append(f"p.shelter_id IN ({', '.join(['%s'] * len(distances))})")
+            params.extend(distances)
+        
+        # SIZE FILTER (if you have size field)
+        if filters.get('size'):
+            conditions.append('p.size = %s')
+            params.append(filters['size'])
+        
+        # FROM + WHERE shared by the page, count and facet queries (at most one row per pet)
+        from_where = f'''
+            FROM pets p
+            LEFT JOIN shelter s ON p.shelter_id = s.shelter_id
+            LEFT JOIN pet_medical_summary ms ON p.pet_id = ms.pet_id
+            WHERE p.adoption_state = {PetStatus.AVAILABLE}
+        '''
+        if conditions:
+            from_where += ' AND ' + ' AND '.join(conditions)
+        return from_where, params, relevance_ids, distances
+    
+    @staticmethod
+    def _parse_near(filters):
+        """(lat, lng, radius_km) from near=lat,lng and radius_km=; SearchFilterError if malformed"""
+        try:
+            lat, lng = (float(part) for part in str(filters['near']).split(','))
+        except ValueError:
+            raise SearchFilterError('near must be "latitude,longitude"')
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise SearchFilterError('near is out of range')
+        try:
+            radius_km = float(filters.get('radius_km') or Config.SEARCH_DEFAULT_RADIUS_KM)
+        except ValueError:
+            raise SearchFilterError('radius_km must be a number')
+        if radius_km <= 0:
+            raise SearchFilterError('radius_km must be positive')
+        return lat, lng, min(radius_km, Config.SEARCH_MAX_RADIUS_KM)
+    
+    @staticmethod
+    def normalize_filters(filters):
+        """
+        Canonical form of a filter dict
+        What this does: Drops empty values, trims and lower-cases text, sorts keys
+        Why: 'Dog' and ' dog' are the same search and should share cached work
+        """
+        normalized = {}
+        for key, value in filters.items():
+            if value is None or value == '':
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+                if key not in ('cursor',):
+                    value = value.lower()
+                if not value:
+                    continue
+            normalized[key] = value
+        return dict(sorted(normalized.items()))
+    
+    @staticmethod
+    def filter_key(filters, exclude=()):
+        """Hashable cache key for a filter set"""
+        normalized = SearchModel.normalize_filters(filters)
+        return tuple((key, str(value)) for key, value in normalized.items() if key not in exclude)
+    
+    @staticmethod
+    def result_key(filters):
+        """
+        Cache key for one page of search results
+        What this does: Canonical filters with the page size clamped as search_pets clamps it, plus the catalog version
+        Why: limit=500 and limit=100 return the same page, and any catalog write must retire every cached page
+        """
+        canonical = dict(filters)
+        try:
+            canonical['limit'] = max(min(int(filters.get('limit', 20)), 100), 1)
+        except (TypeError, ValueError):
+            pass  # Left as sent; the search itself rejects it
+        return (catalog_events.catalog_version(),) + SearchModel.filter_key(canonical)
+    
+    @staticmethod
+    def cache_stats():
+        """Hit/miss counters of the search caches, for tuning their sizes and TTLs"""
+        return {
+            'catalog_version': catalog_events.catalog_version(),
+            'results': SearchModel._result_cache.stats(),
+            'counts': SearchModel._count_cache.stats(),
+            'facets': SearchModel._facet_cache.stats(),
+            'filter_options': SearchModel._filter_options_cache.stats(),
+            'catalog': pet_catalog.pet_catalog.stats() if pet_catalog.pet_catalog is not None else None,
+            'trends': search_trends.search_trends.stats(),
+        }
+    
+    @staticmethod
+    def encode_cursor(sort_by, sort_order, last_row, position):
+        """Opaque cursor pointing just after `last_row` in the given ordering"""
+        payload = {'s': sort_by, 'o': sort_order}
+        if sort_by in SearchModel.POSITIONAL_SORTS:
+            payload['pos'] = position
+        else:
+            value = last_row.get(sort_by)
+            payload['k'] = value.isoformat(sep=' ') if hasattr(value, 'isoformat') else value
+            payload['id'] = last_row['pet_id']
+        raw = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(token, sort_by, sort_order):
+        """Decode a cursor; SearchCursorError if it is malformed or was issued for a different ordering"""
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except Exception:
+            raise SearchCursorError('Invalid cursor')
+        if not isinstance(payload, dict) or payload.get('s') != sort_by or payload.get('o') != sort_order:
+            raise SearchCursorError('Cursor does not match sort_by/sort_order')
+        if sort_by in SearchModel.POSITIONAL_SORTS:
+            if not isinstance(payload.get('pos'), int):
+                raise SearchCursorError('Invalid cursor')
+        elif not isinstance(payload.get('id'), int) or 'k' not in payload:
+            raise SearchCursorError('Invalid cursor')
+        return payload
+    
+    @staticmethod
+    def _keyset_condition(sort_by, sort_order, cursor_key):
+        """
+        WHERE fragment for rows strictly after the cursor in (sort column, pet_id) order
+        MySQL puts NULLs first when ascending and last when descending, so they need their own branch
+        """
+        column = f'p.{sort_by}'
+        value, pet_id = cursor_key['k'], cursor_key['id']
+        if sort_order == 'ASC':
+            if value is None:
+                return f'(({column} IS NULL AND p.pet_id > %s) OR {column} IS NOT NULL)', [pet_id]
+            return f'({column} > %s OR ({column} = %s AND p.pet_id > %s))', [value, value, pet_id]
+        if value is None:
+            return f'({column} IS NULL AND p.pet_id < %s)', [pet_id]
+        return f'({column} < %s OR ({column} = %s AND p.pet_id < %s) OR {column} IS NULL)', [value, value, pet_id]
     
     @staticmethod
     def get_search_filters():
@@ -135,6 +546,10 @@ class SearchModel:
         What this does: Returns all unique values for filter dropdowns
         Why: Frontend needs to know what filter options are available
         """
+        cached = SearchModel._filter_options_cache.get(('options', catalog_events.catalog_version()))
+        if cached is not None:
+            return cached
+        
         try:
             conn = get_db_connection()
             cursor = conn.cursor(dictionary=True)
@@ -166,6 +581,7 @@ class SearchModel:
             }
             
             conn.close()
+            SearchModel._filter_options_cache.set(('options', catalog_events.catalog_version()), filters)
             return filters
             
         except Exception as e:
@@ -173,44 +589,77 @@ class SearchModel:
             return {}
     
     @staticmethod
-    def get_popular_searches():
+    def correct_filters(filters):
+        """
+        Fix misspelled words in the free-text filters
+        What this does: Maps each unknown word to the closest word used by an available pet
+        Why: "labrdor" should find Labradors instead of nothing; the lookup is in memory, so it is cheap per request
+        Returns (filters, corrections) where corrections is a list of {'field', 'from', 'to'}
+        """
+        corrected = dict(filters)
+        corrections = []
+        try:
+            vocabulary = search_index.ensure_fuzzy_built()
+            for field in SearchModel.FUZZY_FIELDS:
+                if not filters.get(field):
+                    continue
+                text, fixes = vocabulary.correct_text(filters[field])
+                corrected[field] = text
+                corrections.extend({'field': field, 'from': wrong, 'to': right} for wrong, right in fixes)
+        except Exception as e:
+            print(f"Error correcting search filters: {e}")
+            return filters, []
+        return corrected, corrections
+    
+    @staticmethod
+    def get_suggestions(prefix, limit=None):
+        """
+        Typeahead completions for a partly typed query
+        What this does: Looks the prefix up in the in-memory suggestion trie
+        Why: Runs on every keystroke, so it must not reach the database
+        """
+        try:
+            return search_index.ensure_suggestions_built().suggest(prefix, limit)
+        except Exception as e:
+            print(f"Error getting suggestions: {e}")
+            return []
+    
+    @staticmethod
+    def record_search(filters, result):
+        """
+        Log a search for the trending list
+        What this does: Counts the normalized filter set (and whether it found nothing) in the in-memory aggregator
+        Why: Trending searches should come from what people search for, not from what the catalog holds
+        """
+        # Later pages of the same search are not new searches
+        if filters.get('cursor') or str(filters.get('offset', '0')) not in ('', '0'):
+            return
+        normalized = dict(SearchModel.filter_key(filters, exclude=SearchModel.NON_FILTER_KEYS))
+        if not normalized:
+            return
+        try:
+            search_trends.record_search(normalized, zero_results=not result.get('pets'))
+        except Exception as e:
+            print(f"Error recording search: {e}")
+    
+    @staticmethod
+    def get_popular_searches(limit=10):
         """
         Get popular/trending searches
-        What this does: Returns commonly searched breeds and categories
-        Why: Helps users discover popular pets
+        What this does: Returns the most searched filter sets and the most searched ones that found nothing
+        Why: Helps users discover popular pets, and tells shelters what people look for but cannot find
         """
+        cached = SearchModel._trending_cache.get(limit)
+        if cached is not None:
+            return cached
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            # Most common breeds
-            cursor.execute('''
-                SELECT breed, COUNT(*) as count 
-                FROM pets 
-                WHERE adoption_status = 'notadopted' 
-                GROUP BY breed 
-                ORDER BY count DESC 
-                LIMIT 8
-            ''')
-            popular_breeds = cursor.fetchall()
-            
-            # Most common categories
-            cursor.execute('''
-                SELECT category, COUNT(*) as count 
-                FROM pets 
-                WHERE adoption_status = 'notadopted' 
-                GROUP BY category 
-                ORDER BY count DESC
-            ''')
-            popular_categories = cursor.fetchall()
-            
-            conn.close()
-            
-            return {
-                'popular_breeds': popular_breeds,
-                'popular_categories': popular_categories
+            popular = {
+                'trending': search_trends.top_queries(limit),
+                'zero_results': search_trends.top_queries(limit, zero_results=True)
             }
+            SearchModel._trending_cache.set(limit, popular)
+            return popular
             
         except Exception as e:
             print(f"Error getting popular searches: {e}")
-            return {'popular_breeds': [], 'popular_categories': []}
\ No newline at end of file
+            return {'trending': [], 'zero_results': []}
\ No newline at end of file
@@ -0,0 +1,178 @@
+# models/search_trends.py
+import atexit
+import hashlib
+import json
+import math
+import threading
+import time
+
+from config import Config
+from database.db_connection import connect_to_database
+
+# Scores are kept as log(sum of e^(λ·(t - LANDMARK))) over searches ("forward decay").
+# A fixed landmark means stored scores never need rewriting: ranking by log score is ranking by
+# decayed count at any moment, and merging two scores is a log-sum-exp.
+LANDMARK = 1704067200  # 2024-01-01 UTC
+DECAY_RATE = math.log(2) / (Config.SEARCH_TRENDS_HALF_LIFE_HOURS * 3600)
+
+MAX_FILTERS_LENGTH = 2000  # search_trends.filters column
+
+
+def _log_add(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def now_log_weight(now=None):
+    return DECAY_RATE * ((now or time.time()) - LANDMARK)
+
+
+UPSERT_TREND = '''
+    INSERT INTO search_trends (query_hash, filters, log_score, zero_log_score, searches, zero_results, last_searched_at)
+    VALUES (%s, %s, %s, %s, %s, %s, NOW())
+    ON DUPLICATE KEY UPDATE
+        log_score = GREATEST(log_score, VALUES(log_score)) + LN(1 + EXP(-ABS(log_score - VALUES(log_score)))),
+        zero_log_score = CASE
+            WHEN VALUES(zero_log_score) IS NULL THEN zero_log_score
+            WHEN zero_log_score IS NULL THEN VALUES(zero_log_score)
+            ELSE GREATEST(zero_log_score, VALUES(zero_log_score))
+                 + LN(1 + EXP(-ABS(zero_log_score - VALUES(zero_log_score))))
+        END,
+        searches = searches + VALUES(searches),
+        zero_results = zero_results + VALUES(zero_results),
+        last_searched_at = NOW()
+'''
+
+
+class SearchTrends:
+    """
+    Per-process aggregator of normalized searches
+    What this does: Folds each search into a decayed score in memory and upserts the totals every few seconds
+    Why: Recording must cost a dict update on the request path, not a write per search
+    """
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = {}   # query_hash -> [filters_json, log_score, zero_log_score, searches, zero_results]
+        self.dropped = 0
+        self.flushed = 0
+
+    def record(self, filters, zero_results=False, now=None):
+        """Count one search for this normalized filter set"""
+        filters_json = json.dumps(filters, sort_keys=True, separators=(',', ':'), default=str)
+        if len(filters_json) > MAX_FILTERS_LENGTH:
+            return
+        query_hash = hashlib.sha1(filters_json.encode('utf-8')).hexdigest()
+        weight = now_log_weight(now)
+        with self._lock:
+            entry = self._pending.get(query_hash)
+            if entry is None:
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1  # A burst of unique searches; the head of the distribution is already in
+                    return
+                entry = self._pending[query_hash] = [filters_json, None, None, 0, 0]
+            entry[1] = _log_add(entry[1], weight)
+            entry[3] += 1
+            if zero_results:
+                entry[2] = _log_add(entry[2], weight)
+                entry[4] += 1
+
+    def flush(self):
+        """Upsert everything recorded since the last flush; returns the number of queries written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        conn = connect_to_database()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(UPSERT_TREND, [(query_hash,) + tuple(entry) for query_hash, entry in pending.items()])
+            # Forget queries whose decayed count has fallen below SEARCH_TRENDS_MIN_SCORE
+            cursor.execute('DELETE FROM search_trends WHERE log_score < %s LIMIT 1000',
+                           (now_log_weight() + math.log(Config.SEARCH_TRENDS_MIN_SCORE),))
+            conn.commit()
+            self.flushed += len(pending)
+            return len(pending)
+        except Exception as e:
+            print(f"Error flushing search trends ({len(pending)} queries lost): {e}")
+            conn.rollback()
+            return 0
+        finally:
+            cursor.close()
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), 'flushed': self.flushed, 'dropped': self.dropped}
+
+
+search_trends = SearchTrends(max_pending=Config.SEARCH_TRENDS_MAX_PENDING)
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_forever():
+    while True:
+        time.sleep(Config.SEARCH_TRENDS_FLUSH_SECONDS)
+        search_trends.flush()
+
+
+def record_search(filters, zero_results=False):
+    """Record a search and make sure this process has a flusher running"""
+    global _flusher
+    search_trends.record(filters, zero_results)
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_flush_forever, name='search-trends-flush', daemon=True)
+                _flusher.start()
+                atexit.register(search_trends.flush)
+
+
+def label(filters):
+    """Short human-readable form of a filter set: 'golden, category: dog, max_age: 3'"""
+    parts = [str(filters['search_text'])] if filters.get('search_text') else []
+    parts += [f"{key}: {value}" for key, value in filters.items() if key != 'search_text']
+    return ', '.join(parts)
+
+
+def top_queries(limit, zero_results=False):
+    """
+    Trending filter sets from search_trends, best first
+    Both orderings are index range reads, so this costs O(limit) however many pets or searches there are
+    """
+    column, count_column = ('zero_log_score', 'zero_results') if zero_results else ('log_score', 'searches')
+    conn = connect_to_database()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f'''
+            SELECT filters, {column} AS log_score, {count_column} AS searches, last_searched_at
+            FROM search_trends
+            WHERE {column} IS NOT NULL
+            ORDER BY {column} DESC
+            LIMIT %s
+        ''', (limit,))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    current = now_log_weight()
+    trending = []
+    for row in rows:
+        filters = json.loads(row['filters'])
+        trending.append({
+            'label': label(filters),
+            'filters': filters,
+            'score': round(math.exp(row['log_score'] - current), 3),  # Decayed search count right now
+            'searches': row['searches'],
+            'last_searched_at': row['last_searched_at'],
+        })
+    return trending
+
@@ -1,5 +1,9 @@
 import mysql.connector
+from datetime import date, timedelta
+from config import Config
 from database.db_connection import connect_to_database
+from models.pet_status import PetStatus
+from models import catalog_events, geo, pet_reach
 
 class ShelterModel:
     @staticmethod
@@ -90,20 +94,16 @@ class ShelterModel:
         cursor = mysql_connection.cursor()
         
         try:
-            # Total pets in shelter
-            cursor.execute("SELECT COUNT(*) as total_pets FROM pets WHERE shelter_id = %s", (shelter_id,))
-            result = cursor.fetchone()
-            total_pets = result[0] if result else 0
-            
-            # Adopted pets from shelter
-            cursor.execute("SELECT COUNT(*) as adopted_pets FROM pets WHERE shelter_id = %s AND adoption_status = 'Adopted'", (shelter_id,))
-            result = cursor.fetchone()
-            adopted_pets = result[0] if result else 0
-            
-            # Available pets in shelter
-            cursor.execute("SELECT COUNT(*) as available_pets FROM pets WHERE shelter_id = %s AND adoption_status = 'Not Adopted'", (shelter_id,))
-            result = cursor.fetchone()
-            available_pets = result[0] if result else 0
+            # Total, adopted and available pets in one pass over the (shelter_id, adoption_state) index
+            cursor.execute("""
+                SELECT adoption_state, COUNT(*) FROM pets
+                WHERE shelter_id = %s
+                GROUP BY adoption_state
+            """, (shelter_id,))
+            counts = dict(cursor.fetchall())
+            total_pets = sum(counts.values())
+            adopted_pets = counts.get(PetStatus.ADOPTED, 0)
+            available_pets = counts.get(PetStatus.AVAILABLE, 0)
             
             # Pending applications for shelter pets
             cursor.execute("""
@@ -118,11 +118,16 @@ class ShelterModel:
             cursor.close()
             mysql_connection.close()
             
+            # Distinct people who looked at any of the shelter's pets lately (None if sketches are unavailable)
+            reach = ShelterModel.get_pet_reach(shelter_id)
+            
             return {
                 'total_pets': total_pets,
                 'adopted_pets': adopted_pets,
                 'available_pets': available_pets,
-                'pending_applications': pending_applications
+                'pending_applications': pending_applications,
+                'unique_visitors': reach['unique_visitors'] if reach else None,
+                'unique_visitors_days': Config.PET_REACH_DEFAULT_DAYS
             }
         except mysql.connector.Error as e:
             print(f"Error in get_shelter_statistics: {e}")
@@ -132,6 +137,25 @@ class ShelterModel:
             mysql_connection.close()
             return None
     
+    @staticmethod
+    def get_pet_reach(shelter_id, start=None, end=None):
+        """
+        Distinct visitors per pet and across the shelter for a date range (inclusive)
+        What this does: Merges the pets' daily HyperLogLog sketches (see models/pet_reach.py)
+        Why: COUNT(DISTINCT) over raw views per pet and range would grow with every page view
+        
+        Defaults to the last PET_REACH_DEFAULT_DAYS days; returns None on database errors
+        """
+        end = end or date.today()
+        start = start or end - timedelta(days=Config.PET_REACH_DEFAULT_DAYS - 1)
+        try:
+            reach = pet_reach.shelter_reach(shelter_id, start, end)
+        except mysql.connector.Error as e:
+            print(f"Error in get_pet_reach: {e}")
+            return None
+        reach.update(start=start.isoformat(), end=end.isoformat())
+        return reach
+    
     @staticmethod
     def add_shelter(shelter_name, location, contact_person, contact_phone=None, email=None, manager_user_id=None):
         """Add new shelter"""
@@ -139,13 +163,16 @@ class ShelterModel:
         cursor = mysql_connection.cursor()
         
         try:
+            latitude, longitude = geo.geocode(location) or (None, None)
             insert_query = """
-            INSERT INTO shelter (shelter_name, location, contact_person, contact_phone, email, manager_user_id) 
-            VALUES (%s, %s, %s, %s, %s, %s)
+            INSERT INTO shelter (shelter_name, location, contact_person, contact_phone, email, manager_user_id, latitude, longitude) 
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """
-            cursor.execute(insert_query, (shelter_name, location, contact_person, contact_phone, email, manager_user_id))
+            cursor.execute(insert_query, (shelter_name, location, contact_person, contact_phone, email, manager_user_id,
+                                          latitude, longitude))
             mysql_connection.commit()
             shelter_id = cursor.lastrowid
+            catalog_events.publish('shelter_added', shelter_id=shelter_id)
             return shelter_id
         except mysql.connector.Error as e:
             print(f"Error adding shelter: {e}")
@@ -172,6 +199,10 @@ class ShelterModel:
             if location:
                 update_fields.append("location = %s")
                 values.append(location)
+                # Unknown places clear the old coordinates rather than keep pointing at the previous city
+                update_fields.append("latitude = %s")
+                update_fields.append("longitude = %s")
+                values.extend(geo.geocode(location) or (None, None))
             if contact_person:
                 update_fields.append("contact_person = %s")
                 values.append(contact_person)
@@ -187,6 +218,7 @@ class ShelterModel:
                 update_query = f"UPDATE shelter SET {', '.join(update_fields)} WHERE shelter_id = %s"
                 cursor.execute(update_query, values)
                 mysql_connection.commit()
+                catalog_events.publish('shelter_updated', shelter_id=shelter_id)
                 return True
             return False
         except mysql.connector.Error as e:
@@ -197,6 +229,45 @@ class ShelterModel:
             cursor.close()
             mysql_connection.close()
     
+    @staticmethod
+    def geocode_shelters(only_missing=True):
+        """
+        Fill shelter coordinates from the offline geocode file
+        What this does: Looks every shelter's location up in database/data/geocodes.csv
+        Why: Radius search only sees shelters with coordinates; rows from before the columns existed have none
+        Returns (updated, unresolved locations)
+        """
+        mysql_connection = connect_to_database()
+        cursor = mysql_connection.cursor()
+        
+        try:
+            query = "SELECT shelter_id, location FROM shelter"
+            if only_missing:
+                query += " WHERE latitude IS NULL OR longitude IS NULL"
+            cursor.execute(query)
+            
+            updates = []
+            unresolved = []
+            for shelter_id, location in cursor.fetchall():
+                coordinates = geo.geocode(location)
+                if coordinates:
+                    updates.append(coordinates + (shelter_id,))
+                else:
+                    unresolved.append(location)
+            
+            if updates:
+                cursor.executemany("UPDATE shelter SET latitude = %s, longitude = %s WHERE shelter_id = %s", updates)
+                mysql_connection.commit()
+                geo.shelter_locator.invalidate()
+            return len(updates), unresolved
+        except mysql.connector.Error as e:
+            print(f"Error geocoding shelters: {e}")
+            mysql_connection.rollback()
+            return 0, []
+        finally:
+            cursor.close()
+            mysql_connection.close()
+    
     @staticmethod
     def can_user_manage_shelter(user_id, role, shelter_id):
         """Check if user can manage specific shelter"""
@@ -241,6 +312,7 @@ class ShelterModel:
             delete_query = "DELETE FROM shelter WHERE shelter_id = %s"
             cursor.execute(delete_query, (shelter_id,))
             mysql_connection.commit()
+            catalog_events.publish('shelter_deleted', shelter_id=shelter_id)
             cursor.close()
             mysql_connection.close()
             return True, "Shelter deleted successfully"
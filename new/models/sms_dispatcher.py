@@ -0,0 +1,202 @@
+# models/sms_dispatcher.py
+#
+# One SMS sender per process, shared by inline sends and the notification outbox.
+#
+#   - one requests.Session, so calls reuse keep-alive HTTPS connections to the provider instead of a
+#     new TCP + TLS handshake per message (its connection pool is sized to SMS_CONCURRENCY)
+#   - at most SMS_CONCURRENCY requests in flight, however many threads call send(); a message waiting
+#     to retry gives its slot back, and takes a slot and a rate-limit token again for the next attempt
+#   - a token bucket holds us to SMS_RATE_PER_SECOND (bursts up to SMS_RATE_BURST), so we queue
+#     locally instead of collecting 429s from the provider
+#   - 429s, 5xx and connection errors are retried up to SMS_MAX_ATTEMPTS with jittered exponential
+#     backoff (honouring Retry-After); other 4xx fail at once
+#
+# stats() gives counters per response status and latency histograms per request and per message
+# (the latter includes rate-limit waits and retries). Point TWILIO_API_URL at models/notification_sinks.SMSGatewaySink to test offline.
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+# Upper bounds (ms) of the latency histogram buckets; slower requests land in '+Inf'
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+
+class SMSDeliveryError(Exception):
+    """The provider refused the message, or kept failing until we ran out of attempts"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenBucket:
+    """Blocking rate limiter: `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+
+    def add(self, ms):
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                break
+        else:
+            index = len(LATENCY_BUCKETS_MS)
+        self.counts[index] += 1
+        self.total_ms += ms
+
+    def snapshot(self):
+        observed = sum(self.counts)
+        buckets = {f'le_{bound}': count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets['+Inf'] = self.counts[-1]
+        return {'count': observed, 'avg_ms': round(self.total_ms / observed, 1) if observed else None,
+                'buckets': buckets}
+
+
+def retry_delay(attempt, retry_after=None):
+    """Seconds before retry number `attempt`: Retry-After when given, else doubling from the base with full jitter"""
+    if retry_after is not None:
+        return min(retry_after, Config.SMS_RETRY_MAX_SECONDS)
+    return random.uniform(0, min(Config.SMS_RETRY_BASE_SECONDS * 2 ** (attempt - 1), Config.SMS_RETRY_MAX_SECONDS))
+
+
+class SMSDispatcher:
+    """
+    Rate-limited, concurrency-bounded SMS client over one HTTP session
+    What this does: Sends Twilio Messages API requests on kept-alive connections, within the provider's limits
+    Why: A fresh connection per SMS was slow, and bursts of status changes tripped the provider's rate limit
+    """
+
+    def __init__(self, concurrency, rate_per_second, burst):
+        self.concurrency = concurrency
+        self.limiter = TokenBucket(rate_per_second, burst)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+        self._statuses = {}   # HTTP status (or error name) -> responses
+        self._counters = {'sent': 0, 'failed': 0, 'retries': 0, 'throttled_seconds': 0.0}
+        self._request_latency = _Histogram()
+        self._message_latency = _Histogram()
+
+    def _http(self):
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                # Sessions hold sockets; a forked worker builds its own
+                session = requests.Session()
+                session.auth = (Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session, self._pid = session, os.getpid()
+            return self._session
+
+    def _post(self, to_phone, body):
+        """One API request; returns (status key, response or None)"""
+        waited = self.limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = self._http().post(
+                f"{Config.TWILIO_API_URL}/2010-04-01/Accounts/{Config.TWILIO_ACCOUNT_SID}/Messages.json",
+                data={'From': Config.TWILIO_PHONE_NUMBER, 'To': to_phone, 'Body': body},
+                timeout=Config.SMS_TIMEOUT
+            )
+            status = response.status_code
+        except requests.Timeout:
+            response, status = None, 'timeout'
+        except requests.ConnectionError:
+            response, status = None, 'connection_error'
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._statuses[status] = self._statuses.get(status, 0) + 1
+            self._counters['throttled_seconds'] += waited
+            self._request_latency.add(elapsed_ms)
+        return status, response
+
+    def send(self, to_phone, body):
+        """
+        Send one SMS, retrying transient failures; returns the message SID
+        Raises SMSDeliveryError when the provider rejects it or every attempt failed
+        """
+        started = time.monotonic()
+        for attempt in range(1, Config.SMS_MAX_ATTEMPTS + 1):
+            # The slot covers one request only; a message backing off must not keep others from sending
+            with self._slots:
+                status, response = self._post(to_phone, body)
+            if response is not None and response.ok:
+                with self._lock:
+                    self._counters['sent'] += 1
+                    self._message_latency.add((time.monotonic() - started) * 1000)
+                return response.json().get('sid')
+            transient = status not in range(400, 600) or status in TRANSIENT_STATUSES
+            if not transient or attempt == Config.SMS_MAX_ATTEMPTS:
+                break
+            retry_after = None
+            if response is not None and response.headers.get('Retry-After', '').isdigit():
+                retry_after = int(response.headers['Retry-After'])
+            with self._lock:
+                self._counters['retries'] += 1
+            time.sleep(retry_delay(attempt, retry_after))
+        with self._lock:
+            self._counters['failed'] += 1
+        detail = f" {response.text[:200]}" if response is not None else ''
+        raise SMSDeliveryError(f"SMS to {to_phone} failed after {attempt} attempt(s): {status}{detail}", status=status)
+
+    def send_many(self, messages):
+        """
+        Send [(to_phone, body)] concurrently; returns one (sid, error) pair per message, in order
+        """
+        def send_one(message):
+            try:
+                return self.send(*message), None
+            except Exception as e:
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='sms-send') as pool:
+            return list(pool.map(send_one, messages))
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters,
+                        throttled_seconds=round(self._counters['throttled_seconds'], 2),
+                        concurrency=self.concurrency,
+                        rate_per_second=self.limiter.rate,
+                        statuses={str(status): count for status, count in self._statuses.items()},
+                        request_latency=self._request_latency.snapshot(),
+                        message_latency=self._message_latency.snapshot())
+
+
+sms_dispatcher = SMSDispatcher(concurrency=Config.SMS_CONCURRENCY, rate_per_second=Config.SMS_RATE_PER_SECOND,
+                               burst=Config.SMS_RATE_BURST)
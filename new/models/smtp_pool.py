@@ -0,0 +1,264 @@
+# models/smtp_pool.py
+#
+# A small pool of logged-in SMTP sessions shared by everything that sends email in this process.
+#
+# Connecting, STARTTLS and LOGIN cost several round trips (and count against the provider's login
+# rate limits), so sessions are opened once and reused:
+#   - a session idle for longer than SMTP_NOOP_AFTER_SECONDS is checked with NOOP before use, and
+#     replaced if the server has dropped it
+#   - a send that fails because the connection died is retried once on a fresh session
+#   - a session is retired after SMTP_MAX_MESSAGES_PER_SESSION messages (providers cap them)
+# send_batch() sends a list of messages over one session. stats() reports messages/second and
+# per-message latency over the last SMTP_STATS_WINDOW sends.
+#
+# SMTP_POOL_SIZE = 0 turns pooling off: every message gets its own session, like before.
+import os
+import queue
+import smtplib
+import threading
+import time
+from collections import deque
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from config import Config
+
+def connection_lost(error):
+    """True when the session itself is unusable (as opposed to the server refusing one message)"""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    # SMTPException subclasses OSError; only bare socket errors mean the connection is gone
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SMTPPoolTimeout(Exception):
+    """No session became free within SMTP_POOL_TIMEOUT seconds"""
+
+
+def build_message(to_email, subject, html_body):
+    msg = MIMEMultipart()
+    msg['From'] = Config.EMAIL_USER
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(html_body, 'html'))
+    return msg.as_string()
+
+
+class _Session:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+        self.sent = 0
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class SMTPSessionPool:
+    """
+    Reusable authenticated SMTP sessions
+    What this does: Lends out logged-in sessions, health-checks idle ones, and replaces broken ones
+    Why: A connect + STARTTLS + LOGIN per email dominated send time and got us throttled
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._reset()
+        self._counters = {'sent': 0, 'failed': 0, 'sessions_opened': 0, 'reconnects': 0,
+                          'noops': 0, 'stale_replaced': 0, 'retired': 0}
+        self._recent = deque(maxlen=Config.SMTP_STATS_WINDOW)  # (finished_at, seconds) per sent message
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()  # Most recently used first, so spare sessions go idle and get dropped
+        self._open = 0
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _connect(self):
+        smtp = smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT, timeout=Config.SMTP_TIMEOUT)
+        try:
+            if Config.SMTP_STARTTLS:
+                smtp.starttls()
+                smtp.login(Config.EMAIL_USER, Config.EMAIL_PASSWORD)
+        except Exception:
+            smtp.close()
+            raise
+        self._count('sessions_opened')
+        return _Session(smtp)
+
+    def _acquire(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()  # Sessions are sockets; never share them with a forked parent
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                session = None
+                if self._open < self.size:
+                    self._open += 1
+                    reserved = True
+                else:
+                    reserved = False
+        if session is None:
+            if reserved:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            try:
+                session = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise SMTPPoolTimeout(f"No SMTP session free within {self.timeout}s")
+
+        if time.monotonic() - session.last_used > Config.SMTP_NOOP_AFTER_SECONDS:
+            self._count('noops')
+            try:
+                code, _ = session.smtp.noop()
+                healthy = code == 250
+            except OSError:  # Includes every SMTPException
+                healthy = False
+            if not healthy:
+                self._count('stale_replaced')
+                session.close()
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+        return session
+
+    def _release(self, session):
+        if session.sent >= Config.SMTP_MAX_MESSAGES_PER_SESSION:
+            self._count('retired')
+            session.close()
+            with self._lock:
+                self._open -= 1
+            return
+        session.last_used = time.monotonic()
+        self._idle.put(session)
+
+    def send_batch(self, messages):
+        """
+        Send [(to_email, subject, html_body)] over one session, in order
+        Returns one entry per message: None when accepted, else the exception
+        """
+        if not messages:
+            return []
+        if self.size <= 0:
+            return [self._send_unpooled(*message) for message in messages]
+
+        results = []
+        try:
+            session = self._acquire()
+        except Exception as e:
+            self._count('failed', len(messages))
+            return [e] * len(messages)
+        try:
+            for to_email, subject, html_body in messages:
+                payload = build_message(to_email, subject, html_body)
+                started = time.monotonic()
+                try:
+                    try:
+                        session.smtp.sendmail(Config.EMAIL_USER, to_email, payload)
+                    except Exception as e:
+                        if not connection_lost(e):
+                            raise
+                        # Dropped under us (idle timeout, server restart): one retry on a fresh session
+                        self._count('reconnects')
+                        session.close()
+                        session = None
+                        session = self._connect()
+                        session.smtp.sendmail(Config.EMAIL_USER, to_email, payload)
+                except Exception as e:
+                    if session is not None and not connection_lost(e):
+                        # Refused recipient or rejected data: this message failed, the session is still fine
+                        results.append(e)
+                        self._count('failed')
+                        continue
+                    # No usable session left: this message and the rest of the batch fail together
+                    if session is not None:
+                        session.close()
+                        session = None
+                    remaining = len(messages) - len(results)
+                    results.extend([e] * remaining)
+                    self._count('failed', remaining)
+                    break
+                session.sent += 1
+                self._record(started)
+                results.append(None)
+        finally:
+            if session is None:
+                with self._lock:
+                    self._open -= 1
+            else:
+                self._release(session)
+        return results
+
+    def _send_unpooled(self, to_email, subject, html_body):
+        started = time.monotonic()
+        try:
+            session = self._connect()
+            try:
+                session.smtp.sendmail(Config.EMAIL_USER, to_email, build_message(to_email, subject, html_body))
+            finally:
+                session.close()
+        except Exception as e:
+            self._count('failed')
+            return e
+        self._record(started)
+        return None
+
+    def send(self, to_email, subject, html_body):
+        """Send one message; raises what the server or connection raised"""
+        error = self.send_batch([(to_email, subject, html_body)])[0]
+        if error is not None:
+            raise error
+
+    def _record(self, started):
+        finished = time.monotonic()
+        with self._lock:
+            self._counters['sent'] += 1
+            self._recent.append((finished, finished - started))
+
+    def stats(self):
+        """Counters plus messages/second and latency percentiles over the recent window"""
+        with self._lock:
+            stats = dict(self._counters, pool_size=self.size, open=self._open, idle=self._idle.qsize())
+            recent = list(self._recent)
+        if len(recent) >= 2:
+            span = recent[-1][0] - recent[0][0]
+            stats['messages_per_second'] = round((len(recent) - 1) / span, 1) if span > 0 else None
+        else:
+            stats['messages_per_second'] = None
+        latencies = sorted(seconds for _, seconds in recent)
+        if latencies:
+            pick = lambda q: round(latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000, 1)
+            stats['latency_ms'] = {'p50': pick(0.50), 'p95': pick(0.95), 'max': round(latencies[-1] * 1000, 1)}
+        else:
+            stats['latency_ms'] = None
+        return stats
+
+    def close_all(self):
+        """Quit every idle session (tests and shutdown)"""
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            session.close()
+            with self._lock:
+                self._open -= 1
+
+
+smtp_pool = SMTPSessionPool(size=Config.SMTP_POOL_SIZE, timeout=Config.SMTP_POOL_TIMEOUT)
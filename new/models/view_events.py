@@ -0,0 +1,163 @@
+# models/view_events.py
+#
+# Ingestion path for pet view events: POST /api/track-view/<pet_id> from the adopter dashboard and
+# pet detail page hits (/pets/pet/<pet_id>).
+#
+# The request handler only appends to a fixed-size in-memory ring buffer; a background thread drains
+# it in batches into pet_views with one executemany per batch. Nothing on the request path touches
+# the database:
+#   - repeat views of the same pet by the same viewer within VIEW_EVENTS_DEDUPE_SECONDS are dropped
+#   - when the buffer is full new events are rejected and counted (back-pressure), never queued
+#     behind a slow database
+#   - a batch that fails to insert is counted and dropped; views are an analytics signal, not a ledger
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from config import Config
+from database.db_connection import connect_to_database
+from models import pet_popularity, pet_reach
+
+INSERT_VIEWS = '''
+    INSERT INTO pet_views (pet_id, user_id, viewed_at)
+    VALUES (%s, %s, %s)
+'''
+
+
+class ViewIngest:
+    """
+    Bounded buffer of view events with a batching writer
+    What this does: Accepts (pet_id, user_id) events in O(1) and writes them in batches from one thread
+    Why: A card click must not cost a database round trip, and a slow database must not pile up requests
+    """
+
+    def __init__(self, capacity, batch_size, dedupe_seconds):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.dedupe_seconds = dedupe_seconds
+        self._lock = threading.Lock()
+        self._ring = [None] * capacity
+        self._head = 0       # next slot to drain
+        self._size = 0
+        self._seen = OrderedDict()  # (viewer, pet_id) -> monotonic time of the last accepted view, oldest first
+        self._wake = threading.Event()
+        self._stats = {'accepted': 0, 'deduplicated': 0, 'dropped_full': 0,
+                       'written': 0, 'failed': 0, 'batches': 0}
+
+    def record(self, pet_id, user_id=None, viewer=None, now=None):
+        """
+        Queue one view; returns 'accepted', 'duplicate' or 'dropped'
+        viewer identifies anonymous visitors for deduplication (user_id wins when set)
+        """
+        now = time.monotonic() if now is None else now
+        key = (('u', user_id) if user_id is not None else ('a', viewer), pet_id)
+        with self._lock:
+            last = self._seen.get(key)
+            if last is not None and now - last < self.dedupe_seconds:
+                self._stats['deduplicated'] += 1
+                return 'duplicate'
+            if self._size >= self.capacity:
+                self._stats['dropped_full'] += 1
+                return 'dropped'
+            self._seen[key] = now
+            self._seen.move_to_end(key)
+            self._expire_seen(now)
+            self._ring[(self._head + self._size) % self.capacity] = (pet_id, user_id, datetime.now())
+            self._size += 1
+            self._stats['accepted'] += 1
+            full_batch = self._size >= self.batch_size
+        pet_popularity.record_view(pet_id)
+        if full_batch:
+            self._wake.set()
+        return 'accepted'
+
+    def _expire_seen(self, now):
+        # Called with the lock held. Keys are in acceptance order, so only the front can be out of the
+        # window or over capacity, and eviction is amortized O(1) per accepted view
+        cutoff = now - self.dedupe_seconds
+        while self._seen:
+            seen_at = next(iter(self._seen.values()))
+            if seen_at >= cutoff and len(self._seen) <= Config.VIEW_EVENTS_DEDUPE_MAX_KEYS:
+                return
+            self._seen.popitem(last=False)
+
+    def _take(self, limit):
+        with self._lock:
+            count = min(limit, self._size)
+            batch = []
+            for _ in range(count):
+                batch.append(self._ring[self._head])
+                self._ring[self._head] = None
+                self._head = (self._head + 1) % self.capacity
+            self._size -= count
+            return batch
+
+    def flush(self):
+        """Write everything buffered so far, one batch at a time; returns the number of views written"""
+        written = 0
+        while True:
+            batch = self._take(self.batch_size)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def _write(self, batch):
+        try:
+            conn = connect_to_database()
+        except Exception as e:
+            print(f"Error writing pet views ({len(batch)} dropped): {e}")
+            self._count(failed=len(batch))
+            return 0
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(INSERT_VIEWS, batch)
+            conn.commit()
+            self._count(written=len(batch), batches=1)
+            return len(batch)
+        except Exception as e:
+            print(f"Error writing pet views ({len(batch)} dropped): {e}")
+            conn.rollback()
+            self._count(failed=len(batch))
+            return 0
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self._stats[name] += amount
+
+    def run(self):
+        """Writer loop: flush when a batch is ready or every VIEW_EVENTS_FLUSH_SECONDS"""
+        while True:
+            self._wake.wait(Config.VIEW_EVENTS_FLUSH_SECONDS)
+            self._wake.clear()
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, buffered=self._size, capacity=self.capacity, dedupe_keys=len(self._seen))
+
+
+view_ingest = ViewIngest(capacity=Config.VIEW_EVENTS_BUFFER_SIZE, batch_size=Config.VIEW_EVENTS_BATCH_SIZE,
+                         dedupe_seconds=Config.VIEW_EVENTS_DEDUPE_SECONDS)
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def track_view(pet_id, user_id=None, viewer=None):
+    """Record a view and make sure this process has a writer thread running"""
+    global _writer
+    # Distinct-visitor sketches count every view (repeats are free there), even when the buffer is full
+    pet_reach.record_visit(pet_id, f'u:{user_id}' if user_id is not None else f'a:{viewer}')
+    result = view_ingest.record(pet_id, user_id, viewer)
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=view_ingest.run, name='pet-views-writer', daemon=True)
+                _writer.start()
+                atexit.register(view_ingest.flush)
+    return result
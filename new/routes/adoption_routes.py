@@ -1,7 +1,6 @@
 from flask import Blueprint, request, jsonify, render_template
 from models.adoption_model import AdoptionModel
 from models.recommendation_model import RecommendationModel
-from models.notification_model import NotificationModel  # ADD THIS IMPORT
 from models.auth_decorators import adopter_required, shelter_staff_required, get_current_user
 
 adoption_bp = Blueprint('adoptions', __name__)
@@ -101,7 +100,7 @@ def get_pending_applications():
 def review_application():
     """
     Shelter staff approve/reject applications WITH NOTIFICATIONS
-    What this does: Updates application status with reviewer notes AND sends notifications
+    What this does: Updates application status with reviewer notes AND queues notifications
     Why: Shelter staff need to manage adoption workflow and users need updates
     """
     try:
@@ -115,7 +114,7 @@ def review_application():
         if not application_id or new_status not in ['approved', 'rejected']:
             return jsonify({'message': 'Invalid application ID or status'}), 400
         
-        # Get application data BEFORE updating (for notifications)
+        # Make sure the application exists before updating it
         old_application = AdoptionModel.get_application_by_id(application_id)
         if not old_application:
             return jsonify({'success': False, 'message': 'Application not found'}), 404
@@ -126,19 +125,8 @@ def review_application():
         )
         
         if success:
-            # Send notification to the applicant
-            try:
-                # Add review notes to application data for notification
-                notification_data = old_application.copy()
-                notification_data['review_notes'] = review_notes
-                
-                NotificationModel.send_adoption_status_notification(
-                    notification_data, 'pending', new_status
-                )
-                notification_msg = " and user notified"
-            except Exception as e:
-                print(f"Notification failed: {e}")
-                notification_msg = " (notification failed)"
+            # The applicant's email/SMS was queued with the status change; the outbox worker sends it
+            notification_msg = " and user notification queued"
             
             return jsonify({
                 'success': True,
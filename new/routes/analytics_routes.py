@@ -0,0 +1,19 @@
+# routes/analytics_routes.py
+from flask import Blueprint, jsonify, request
+from models import view_events
+from models.auth_decorators import optional_user_id
+
+analytics_bp = Blueprint('analytics', __name__)
+
+@analytics_bp.route('/track-view/<int:pet_id>', methods=['POST'])
+def track_view(pet_id):
+    """
+    Record that someone looked at a pet (adopter dashboard card clicks)
+    What this does: Queues the view in memory and answers immediately; a background thread writes pet_views
+    Why: Engagement signal for popularity and recommendations without a database write per click
+
+    Anonymous views are accepted too (deduplicated per client address). Responds 202 with
+    status accepted / duplicate / dropped; dropped means this worker's buffer is full.
+    """
+    status = view_events.track_view(pet_id, user_id=optional_user_id(), viewer=request.remote_addr)
+    return jsonify({'success': status != 'dropped', 'status': status}), 202
@@ -1,4 +1,6 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, jsonify, render_template, request
+from models import view_events
+from models.auth_decorators import optional_user_id
 from models.pet_model import PetModel
 from models.medical_model import MedicalModel
 from models.shelter_model import ShelterModel
@@ -21,8 +23,19 @@ def our_pets():
 def pet_info(pet_id):
     """Individual pet information page"""
     pet_data = PetModel.get_pet_info_from_view(pet_id)
+    if pet_data:
+        view_events.track_view(pet_id, user_id=optional_user_id(), viewer=request.remote_addr)
     return render_template('pet_info.html', pet=pet_data)
 
+@pet_bp.route('/pet/<int:pet_id>/similar')
+def similar_pets(pet_id):
+    """Available pets similar to this one (?limit=, capped at PET_NEIGHBORS_K)"""
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({'success': False, 'message': 'limit must be a positive integer'}), 400
+    pets = PetModel.get_similar_pets(pet_id, limit)
+    return jsonify({'success': True, 'pet_id': pet_id, 'similar_pets': pets})
+
 @pet_bp.route('/medical_records/<int:pet_id>')
 def medical_records(pet_id):
     """Medical records page for a pet"""
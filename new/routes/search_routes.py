@@ -1,6 +1,6 @@
 # routes/search_routes.py
 from flask import Blueprint, request, jsonify, render_template
-from models.search_model import SearchModel
+from models.search_model import SearchModel, SearchCursorError, SearchFilterError
 from models.auth_decorators import login_required
 
 search_bp = Blueprint('search', __name__)
@@ -13,6 +13,12 @@ def search_pets():
     Why: Users need powerful search capabilities
     
     Usage: /search?search_text=golden&category=dog&min_age=1&max_age=5
+    
+    Paging: pass the returned next_cursor as ?cursor= for keyset pages (offset= still works).
+    count=exact|cached|none controls how total_count is computed.
+    facets=true adds per-facet counts restricted to the same filters.
+    fuzzy=true corrects misspelled words in search_text/breed/species first and lists the corrections.
+    near=lat,lng&radius_km=25 keeps shelters within the radius; sort_by=distance orders by it.
     """
     try:
         # Get all search parameters
@@ -26,25 +32,50 @@ def search_pets():
             'gender': request.args.get('gender', '').strip(),
             'vaccinated': request.args.get('vaccinated', '').strip(),
             'location': request.args.get('location', '').strip(),
+            'near': request.args.get('near', '').strip(),
+            'radius_km': request.args.get('radius_km', '').strip(),
             'size': request.args.get('size', '').strip(),
             'sort_by': request.args.get('sort_by', 'name'),
             'sort_order': request.args.get('sort_order', 'ASC'),
             'limit': request.args.get('limit', 20),
-            'offset': request.args.get('offset', 0)
+            'offset': request.args.get('offset', 0),
+            'cursor': request.args.get('cursor', '').strip(),
+            'count': request.args.get('count', '').strip(),
+            'facets': request.args.get('facets', '').strip().lower(),
+            'fuzzy': request.args.get('fuzzy', '').strip().lower()
         }
         
+        if filters['count'] and filters['count'] not in ('exact', 'cached', 'none'):
+            return jsonify({'success': False, 'message': 'count must be exact, cached or none'}), 400
+        
         # Remove empty filters
         filters = {k: v for k, v in filters.items() if v}
         
+        corrections = None
+        if filters.get('fuzzy') == 'true':
+            filters, corrections = SearchModel.correct_filters(filters)
+        
         # Perform search
         search_results = SearchModel.search_pets(filters)
+        SearchModel.record_search(filters, search_results)
         
-        return jsonify({
+        response = {
             'success': True,
             'results': search_results,
             'filters_applied': filters
-        }), 200
+        }
+        if corrections is not None:
+            response['corrections'] = corrections
+        if filters.get('facets') == 'true':
+            response['facets'] = SearchModel.get_facet_counts(filters)
         
+        return jsonify(response), 200
+        
+    except SearchFilterError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -71,15 +102,41 @@ def get_filter_options():
             'message': f'Error getting filters: {str(e)}'
         }), 500
 
+@search_bp.route('/search/suggest', methods=['GET'])
+def get_search_suggestions():
+    """
+    Typeahead suggestions for the search box
+    What this does: Completes pet names, breeds, species and shelter names from a prefix
+    Why: Suggesting on each keystroke is far cheaper than searching on each keystroke
+    
+    Usage: /search/suggest?q=lab&limit=5
+    """
+    try:
+        limit = request.args.get('limit', type=int)
+        suggestions = SearchModel.get_suggestions(request.args.get('q', ''), limit)
+        return jsonify({
+            'success': True,
+            'suggestions': suggestions
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error getting suggestions: {str(e)}'
+        }), 500
+
 @search_bp.route('/search/popular', methods=['GET'])
 def get_popular_searches():
     """
     Get popular/trending searches
     What this does: Shows what people are searching for most
     Why: Helps users discover popular pets
+    
+    Usage: /search/popular?limit=10
     """
     try:
-        popular = SearchModel.get_popular_searches()
+        limit = max(min(request.args.get('limit', 10, type=int), 50), 1)
+        popular = SearchModel.get_popular_searches(limit)
         return jsonify({
             'success': True,
             'popular': popular
@@ -116,8 +173,17 @@ def search_results_page():
     # Get search parameters from URL
     search_params = dict(request.args)
     
-    # Perform search
-    results = SearchModel.search_pets(search_params)
+    # Perform search (a stale or tampered cursor just restarts from the first page)
+    try:
+        results = SearchModel.search_pets(search_params)
+    except SearchCursorError:
+        search_params.pop('cursor', None)
+        results = SearchModel.search_pets(search_params)
+    except SearchFilterError:
+        # Unusable near=/radius_km=: show the search without the radius
+        for key in ('near', 'radius_km', 'cursor'):
+            search_params.pop(key, None)
+        results = SearchModel.search_pets(search_params)
     
     return render_template('search_results.html', 
                          results=results, 
@@ -1,4 +1,6 @@
+from datetime import date, timedelta
 from flask import Blueprint, render_template, request, redirect, url_for, jsonify, session
+from config import Config
 from models.shelter_model import ShelterModel
 from models.auth_decorators import login_required, shelter_staff_required, admin_required, get_current_user
 
@@ -289,6 +291,42 @@ def get_shelter_statistics(shelter_id):
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
 
+@shelter_bp.route('/api/shelter/<int:shelter_id>/pet-reach')
+@login_required
+def get_shelter_pet_reach(shelter_id):
+    """
+    API endpoint for distinct visitors per pet - PROTECTED
+    Usage: /api/shelter/3/pet-reach?start=2026-01-01&end=2026-01-31 (default: the last 7 days)
+    """
+    current_user = get_current_user()
+    
+    # Check if user can access this shelter's data
+    can_manage = ShelterModel.can_user_manage_shelter(
+        current_user['id'], current_user['role'], shelter_id
+    )
+    
+    if not can_manage and current_user['role'] != 'admin':
+        return jsonify({'message': 'Access denied'}), 403
+    
+    try:
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'start and end must be YYYY-MM-DD dates'}), 400
+    end = end or date.today()
+    start = start or end - timedelta(days=Config.PET_REACH_DEFAULT_DAYS - 1)
+    if end < start or (end - start).days >= Config.PET_REACH_MAX_DAYS:
+        return jsonify({'success': False,
+                        'message': f'end must not be before start, and at most {Config.PET_REACH_MAX_DAYS} days later'}), 400
+    
+    try:
+        reach = ShelterModel.get_pet_reach(shelter_id, start, end)
+        if reach is None:
+            return jsonify({'success': False, 'message': 'Failed to get pet reach'}), 500
+        return jsonify({'success': True, 'shelter_id': shelter_id, **reach})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
 @shelter_bp.route('/api/shelter/<int:shelter_id>/pets')
 @login_required
 def get_shelter_pets_api(shelter_id):
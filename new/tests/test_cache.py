@@ -0,0 +1,62 @@
+# tests/test_cache.py - TTLCache expiry, LRU eviction and counters
+import pytest
+
+from models import cache
+from models.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable time.monotonic for the cache module"""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl=30)
+    ttl_cache.set('a', 1)
+    clock[0] += 29
+    assert ttl_cache.get('a') == 1
+    clock[0] += 1
+    assert ttl_cache.get('a', 'gone') == 'gone'
+    assert ttl_cache.stats()['size'] == 0
+
+
+def test_per_entry_ttl_overrides_the_default(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl=30)
+    ttl_cache.set('short', 1, ttl=5)
+    ttl_cache.set('long', 2)
+    clock[0] += 10
+    assert ttl_cache.get('short') is None
+    assert ttl_cache.get('long') == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    ttl_cache = TTLCache(maxsize=2, ttl=30)
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2)
+    ttl_cache.get('a')  # 'b' is now the oldest
+    ttl_cache.set('c', 3)
+    assert ttl_cache.get('b') is None
+    assert (ttl_cache.get('a'), ttl_cache.get('c')) == (1, 3)
+    assert ttl_cache.stats()['evictions'] == 1
+
+
+def test_zero_size_cache_stores_nothing(clock):
+    ttl_cache = TTLCache(maxsize=0, ttl=30)
+    ttl_cache.set('a', 1)
+    assert ttl_cache.get('a') is None
+
+
+def test_pop_clear_and_stats(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl=30)
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2)
+    assert ttl_cache.pop('a') == 1
+    assert ttl_cache.pop('a') is None
+    ttl_cache.get('b')
+    ttl_cache.get('a')
+    ttl_cache.clear()
+    stats = ttl_cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses'], stats['hit_ratio']) == (0, 1, 1, 0.5)
@@ -0,0 +1,119 @@
+# tests/test_db_connection.py - connection pool and SQL instrumentation (no MySQL server needed)
+import threading
+
+import mysql.connector
+import pytest
+
+from database.db_connection import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.closed = False
+        self.pings = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.alive:
+            raise mysql.connector.Error("gone away")
+
+    def is_connected(self):
+        return self.alive
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool(ConnectionPool):
+    def __init__(self, size=2, timeout=0.05, pre_ping_seconds=60):
+        super().__init__(size, timeout, pre_ping_seconds)
+        self.opened = []
+
+    def _new_connection(self):
+        connection = FakeConnection(len(self.opened) + 1)
+        self.opened.append(connection)
+        return connection
+
+
+def test_checkin_makes_the_connection_reusable():
+    pool = FakePool()
+    first = pool.checkout()
+    pool.checkin(first)
+    assert pool.checkout() is first
+    assert len(pool.opened) == 1
+
+
+def test_pool_grows_to_size_then_times_out():
+    pool = FakePool(size=2)
+    pool.checkout()
+    pool.checkout()
+    with pytest.raises(PoolTimeoutError):
+        pool.checkout()
+    stats = pool.stats()
+    assert stats['created'] == 2 and stats['in_use'] == 2 and stats['checkout_failures'] == 1
+
+
+def test_waiting_checkout_gets_a_returned_connection():
+    pool = FakePool(size=1, timeout=2)
+    held = pool.checkout()
+    threading.Timer(0.05, pool.checkin, args=(held,)).start()
+    assert pool.checkout() is held
+
+
+def test_broken_connection_is_discarded_on_checkin():
+    pool = FakePool(size=1)
+    connection = pool.checkout()
+    connection.alive = False
+    pool.checkin(connection)
+    assert connection.closed
+    assert pool.stats()['created'] == 0
+    assert pool.checkout() is not connection
+
+
+def test_pre_ping_replaces_a_dead_idle_connection():
+    pool = FakePool(size=1, pre_ping_seconds=0)
+    connection = pool.checkout()
+    pool.checkin(connection)
+    connection.alive = False
+    replacement = pool.checkout()
+    assert replacement is not connection and connection.closed
+    assert pool.stats()['reconnects'] == 1
+
+
+def test_pre_ping_skipped_for_recently_returned_connection():
+    pool = FakePool(size=1, pre_ping_seconds=60)
+    connection = pool.checkout()
+    pool.checkin(connection)
+    pool.checkout()
+    assert connection.pings == 0
+
+
+def test_failed_connect_frees_the_slot():
+    class FailingPool(FakePool):
+        def _new_connection(self):
+            raise mysql.connector.Error("refused")
+
+    pool = FailingPool(size=1)
+    with pytest.raises(mysql.connector.Error):
+        pool.checkout()
+    assert pool.stats()['created'] == 0 and pool.stats()['in_use'] == 0
+
+
+def test_normalize_sql_strips_literals_and_whitespace():
+    from database.db_connection import normalize_sql
+    assert normalize_sql("SELECT *  FROM pets\n WHERE pet_id = 42 AND name = 'Rex'") == \
+        "SELECT * FROM pets WHERE pet_id = ? AND name = ?"
+
+
+def test_normalize_sql_same_shape_for_different_ids_and_list_lengths():
+    from database.db_connection import normalize_sql
+    one = normalize_sql("SELECT * FROM pets WHERE pet_id IN (%s, %s)")
+    other = normalize_sql("SELECT * FROM pets WHERE pet_id IN (%s,%s,%s,%s)")
+    assert one == other == "SELECT * FROM pets WHERE pet_id IN (?...)"
+
+
+def test_normalize_sql_handles_escaped_quotes_and_bytes():
+    from database.db_connection import normalize_sql
+    assert normalize_sql(b"SELECT 'it''s', \"a\\\"b\" FROM t2") == "SELECT ?, ? FROM t2"
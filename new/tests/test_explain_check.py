@@ -0,0 +1,44 @@
+# tests/test_explain_check.py - statement capture behind manage.py explain-check
+from database import explain_check
+from database.db_connection import InstrumentedCursor, capture_statements
+
+
+class FakeCursor:
+    rowcount = 0
+
+    def execute(self, operation, params=None):
+        pass
+
+
+def test_capture_records_exact_statements_and_params():
+    cursor = InstrumentedCursor(FakeCursor())
+    with capture_statements() as statements:
+        cursor.execute('SELECT * FROM pets WHERE pet_id = %s', (7,))
+    cursor.execute('SELECT 1')
+    assert statements == [('SELECT * FROM pets WHERE pet_id = %s', (7,))]
+
+
+def test_nested_capture_restores_the_outer_list():
+    cursor = InstrumentedCursor(FakeCursor())
+    with capture_statements() as outer:
+        with capture_statements() as inner:
+            cursor.execute('SELECT 1')
+        cursor.execute('SELECT 2')
+    assert inner == [('SELECT 1', None)] and outer == [('SELECT 2', None)]
+
+
+def test_captured_selects_keeps_one_statement_per_shape(monkeypatch):
+    cursor = InstrumentedCursor(FakeCursor())
+
+    def path(samples):
+        for pet_id in samples['pet_ids']:
+            cursor.execute('SELECT * FROM pets WHERE pet_id = %s', (pet_id,))
+        cursor.execute('UPDATE pets SET age = 1 WHERE pet_id = %s', (1,))
+        cursor.execute('\n  SELECT COUNT(*) FROM pets')
+
+    monkeypatch.setattr(explain_check, 'HOT_PATHS', [('path', path)])
+    selects = explain_check._captured_selects({'pet_ids': [1, 2, 3]})
+    assert selects == [
+        ('path', 'SELECT * FROM pets WHERE pet_id = %s', (1,)),
+        ('path', '\n  SELECT COUNT(*) FROM pets', None),
+    ]
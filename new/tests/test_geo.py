@@ -0,0 +1,51 @@
+# tests/test_geo.py - shelter radius search
+import random
+
+import pytest
+
+from models.geo import ShelterLocator, haversine_km
+
+
+def test_haversine_known_distance():
+    # Mumbai to Pune, about 120 km
+    assert haversine_km(19.0760, 72.8777, 18.5204, 73.8567) == pytest.approx(120, abs=2)
+
+
+def test_within_sorts_nearest_first():
+    locator = ShelterLocator()
+    locator.build([(1, 18.5204, 73.8567), (2, 19.0760, 72.8777), (3, 28.6139, 77.2090), (4, 19.2183, 72.9781)])
+    found = locator.within(19.0760, 72.8777, 150)
+    assert [shelter_id for shelter_id, _ in found] == [2, 4, 1]
+    assert found[0][1] == 0.0
+
+
+@pytest.mark.parametrize('lat, lng', [(19.0, 72.8), (89.5, 10.0), (0.0, 179.9), (-45.0, -179.5)])
+@pytest.mark.parametrize('radius_km', [0.5, 50, 800, 5000])
+def test_within_matches_brute_force(lat, lng, radius_km):
+    # Includes the poles and the date line, where latitude/longitude boxes go wrong
+    rng = random.Random(f'{lat},{lng},{radius_km}')
+    rows = [(shelter_id, rng.uniform(-90, 90), rng.uniform(-180, 180)) for shelter_id in range(400)]
+    rows += [(400 + i, lat + rng.uniform(-1, 1) * 0.3, lng + rng.uniform(-1, 1) * 0.3) for i in range(50)]
+    rows = [(shelter_id, max(-90, min(90, shelter_lat)), shelter_lng) for shelter_id, shelter_lat, shelter_lng in rows]
+    locator = ShelterLocator()
+    locator.build(rows)
+
+    coordinates = {shelter_id: (shelter_lat, shelter_lng) for shelter_id, shelter_lat, shelter_lng in rows}
+    expected = {shelter_id for shelter_id, (shelter_lat, shelter_lng) in coordinates.items()
+                if haversine_km(lat, lng, shelter_lat, shelter_lng) <= radius_km}
+    found = locator.within(lat, lng, radius_km)
+    # Allow for float noise right on the boundary
+    boundary = {shelter_id for shelter_id, (shelter_lat, shelter_lng) in coordinates.items()
+                if abs(haversine_km(lat, lng, shelter_lat, shelter_lng) - radius_km) < 1e-6}
+    assert {shelter_id for shelter_id, _ in found} ^ expected <= boundary
+    assert [distance for _, distance in found] == sorted(distance for _, distance in found)
+
+
+def test_empty_and_stale_locator():
+    locator = ShelterLocator()
+    assert locator.stale
+    assert locator.within(0, 0, 1000) == []
+    locator.build([])
+    assert not locator.stale
+    locator.invalidate()
+    assert locator.stale
@@ -0,0 +1,99 @@
+# tests/test_item_similarity.py - co-application similarity (needs NumPy)
+import math
+import random
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from models.item_similarity import ItemSimilarity, application_items
+
+
+def make_applications(seed=3, users=120):
+    rng = random.Random(seed)
+    rows = set()
+    for user_id in range(1, users + 1):
+        for _ in range(rng.randint(1, 5)):
+            rows.add((user_id, rng.choice(['Beagle', 'Labrador', 'Poodle', 'Pug', None]), rng.choice([1, 2, 3, None])))
+    return sorted(rows, key=lambda row: (row[0], str(row[1]), str(row[2])))
+
+
+def brute_force_affinity(rows, user_items):
+    """Cosine over adopter sets, summed over the user's items"""
+    adopters = {}
+    for user_id, breed, shelter_id in rows:
+        for item in application_items(breed, shelter_id):
+            adopters.setdefault(item, set()).add(user_id)
+    totals = {}
+    for a in set(user_items):
+        for b, users in adopters.items():
+            if b == a or a not in adopters:
+                continue
+            co = len(adopters[a] & users)
+            if co:
+                totals[b] = totals.get(b, 0.0) + co / math.sqrt(len(adopters[a]) * len(users))
+    breeds = {item[2:]: weight for item, weight in totals.items() if item.startswith('b:')}
+    shelters = {int(item[2:]): weight for item, weight in totals.items() if item.startswith('s:')}
+    return breeds, shelters
+
+
+def assert_close(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        assert actual[key] == pytest.approx(expected[key])
+
+
+@pytest.mark.parametrize('user_items', [['b:beagle'], ['b:pug', 's:2'], ['s:1', 's:3', 'b:labrador']])
+def test_affinity_matches_brute_force_cosine(user_items):
+    rows = make_applications()
+    model = ItemSimilarity()
+    model.build(iter(rows), neighbors=100, max_items_per_user=100)
+    breeds, shelters = model.affinity(user_items)
+    expected_breeds, expected_shelters = brute_force_affinity(rows, user_items)
+    assert_close(breeds, expected_breeds)
+    assert_close(shelters, expected_shelters)
+
+
+def test_pruning_keeps_the_strongest_neighbours():
+    rows = make_applications()
+    full, pruned = ItemSimilarity(), ItemSimilarity()
+    full.build(iter(rows), neighbors=100, max_items_per_user=100)
+    pruned.build(iter(rows), neighbors=2, max_items_per_user=100)
+    weights = lambda model, item: sorted([*model.affinity([item])[0].values(), *model.affinity([item])[1].values()],
+                                         reverse=True)
+    for item in full.items:
+        assert weights(pruned, item) == pytest.approx(weights(full, item)[:2])
+
+
+def test_bulk_appliers_only_count_their_first_items():
+    rows = [(1, 'Beagle', None), (1, 'Pug', None), (1, 'Poodle', None), (2, 'Beagle', None), (2, 'Pug', None)]
+    model = ItemSimilarity()
+    model.build(iter(rows), neighbors=10, max_items_per_user=2)
+    breeds, _ = model.affinity(['b:beagle'])
+    assert breeds == {'pug': pytest.approx(1.0)}
+    assert model.stats()['items'] == 3
+
+
+def test_delta_matches_a_rebuild():
+    rows = make_applications(users=60)
+    model = ItemSimilarity()
+    model.build(iter(rows), neighbors=100, max_items_per_user=100)
+
+    # User 61 applies for a Labrador at shelter 2, then a Pug at shelter 3
+    model.add_application([], application_items('Labrador', 2))
+    model.add_application(application_items('Labrador', 2), application_items('Pug', 3))
+    rebuilt = ItemSimilarity()
+    rebuilt.build(iter(rows + [(61, 'Labrador', 2), (61, 'Pug', 3)]), neighbors=100, max_items_per_user=100)
+
+    for user_items in (['b:labrador'], ['s:3', 'b:beagle']):
+        breeds, shelters = model.affinity(user_items)
+        expected_breeds, expected_shelters = rebuilt.affinity(user_items)
+        assert_close(breeds, expected_breeds)
+        assert_close(shelters, expected_shelters)
+    assert model.delta_pairs == 12
+
+
+def test_empty_build_answers_nothing():
+    model = ItemSimilarity()
+    model.build(iter([]), neighbors=10, max_items_per_user=10)
+    assert model.affinity(['b:beagle']) == ({}, {})
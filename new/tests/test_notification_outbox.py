@@ -0,0 +1,78 @@
+# tests/test_notification_outbox.py - outbox retry schedule and outcome recording (no MySQL server needed)
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from config import Config
+from models import notification_outbox
+from models.notification_outbox import OutboxWorker, retry_delay
+
+
+@pytest.mark.parametrize('attempts, base', [(1, 30), (2, 60), (3, 120), (5, 480), (8, 3600), (30, 3600)])
+def test_retry_delay_doubles_with_jitter_and_cap(monkeypatch, attempts, base):
+    monkeypatch.setattr(Config, 'NOTIFICATION_RETRY_BASE_SECONDS', 30)
+    monkeypatch.setattr(Config, 'NOTIFICATION_RETRY_MAX_SECONDS', 3600)
+    delays = [retry_delay(attempts) for _ in range(200)]
+    assert all(base * 0.8 <= delay <= base * 1.2 for delay in delays)
+    assert max(delays) - min(delays) > 0  # Jittered, so retries of one outage spread out
+
+
+class RecordingConnection:
+    def __init__(self, writes):
+        self.writes = writes
+
+    def cursor(self, **_):
+        return self
+
+    def executemany(self, query, rows):
+        status = query.split("status = '")[1].split("'")[0]
+        self.writes[status] = rows
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_record_sorts_outcomes_into_sent_retry_and_dead(monkeypatch):
+    writes = {}
+    monkeypatch.setattr(Config, 'NOTIFICATION_RETRY_BASE_SECONDS', 30)
+    monkeypatch.setattr(notification_outbox, 'connect_to_database', lambda: RecordingConnection(writes))
+    worker = OutboxWorker(workers=1, batch_size=10)
+    rows = [{'notification_id': 1, 'channel': 'sms', 'attempts': 0},
+            {'notification_id': 2, 'channel': 'email', 'attempts': 2},
+            {'notification_id': 3, 'channel': 'email', 'attempts': Config.NOTIFICATION_MAX_ATTEMPTS - 1}]
+    before = datetime.now()
+    worker._record([(rows[0], None), (rows[1], 'SMTPServerDisconnected: gone'), (rows[2], 'timeout')])
+
+    assert [row[2] for row in writes['sent']] == [1]
+    (attempts, error, next_attempt_at, notification_id, claimed_by), = writes['pending']
+    assert (attempts, error, notification_id, claimed_by) == (3, 'SMTPServerDisconnected: gone', 2, worker.worker_id)
+    assert before + timedelta(seconds=120 * 0.8) <= next_attempt_at <= datetime.now() + timedelta(seconds=120 * 1.2)
+    assert [(row[0], row[2]) for row in writes['dead']] == [(Config.NOTIFICATION_MAX_ATTEMPTS, 3)]
+    assert worker.stats()['sent'] == 1 and worker.stats()['retried'] == 1 and worker.stats()['dead'] == 1
+
+
+def test_send_all_batches_emails_and_reports_per_row_errors(monkeypatch):
+    monkeypatch.setattr(Config, 'SMTP_BATCH_SIZE', 3)
+    batches = []
+
+    def email_batch(rows):
+        batches.append([row['notification_id'] for row in rows])
+        return [ValueError('refused') if row['notification_id'] == 4 else None for row in rows]
+
+    def sender(row):
+        raise ConnectionError('gateway down')
+
+    worker = OutboxWorker(workers=2, batch_size=10, sender=sender, email_batch_sender=email_batch)
+    rows = [{'notification_id': i, 'channel': 'email'} for i in range(1, 8)] + [{'notification_id': 8, 'channel': 'sms'}]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = worker.send_all(rows, pool)
+
+    assert sorted(batches) == [[1, 2, 3], [4, 5, 6], [7]]
+    errors = {row['notification_id']: error for row, error in results}
+    assert errors[4] == 'ValueError: refused'
+    assert errors[8] == 'ConnectionError: gateway down'
+    assert [notification_id for notification_id, error in errors.items() if error is None] == [1, 2, 3, 5, 6, 7]
@@ -0,0 +1,122 @@
+# tests/test_pet_catalog.py - columnar catalog filters and paging (needs NumPy)
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from models.pet_catalog import PetCatalog
+from models.search_model import SearchModel
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for pet_id in range(1, count + 1):
+        rows.append({
+            'pet_id': pet_id,
+            'name': rng.choice(['bella', 'max', 'luna', 'rex', None]),
+            'category': rng.choice(['Dog', 'Cat']),
+            'species': 'x',
+            'gender': rng.choice(['Male', 'Female']),
+            'breed': rng.choice(['Beagle', 'Labrador', 'Poodle']),
+            'age': rng.choice([None, 1, 2, 3, 5, 8]),
+            'created_at': datetime(2024, 1, 1) + timedelta(days=rng.randrange(30)),
+            'shelter_id': rng.randrange(5),
+            'location': rng.choice(['Mumbai', 'Pune']),
+            'is_vaccinated': rng.choice([0, 1]),
+        })
+    return rows
+
+
+def expected_order(rows, sort_by, sort_order):
+    # MySQL order: NULLs first ascending (last descending), pet_id breaks ties in the same direction
+    key = lambda row: (row[sort_by] is not None, row[sort_by] if row[sort_by] is not None else 0, row['pet_id'])
+    return [row['pet_id'] for row in sorted(rows, key=key, reverse=sort_order == 'DESC')]
+
+
+@pytest.fixture
+def catalog_and_rows():
+    rows = make_rows(300)
+    catalog = PetCatalog(capacity=16)  # Forces several array growths
+    catalog.build(rows)
+    return catalog, rows
+
+
+@pytest.mark.parametrize('sort_by', ['name', 'age', 'created_at'])
+@pytest.mark.parametrize('sort_order', ['ASC', 'DESC'])
+def test_offset_pages_follow_sql_order(catalog_and_rows, sort_by, sort_order):
+    catalog, rows = catalog_and_rows
+    expected = expected_order(rows, sort_by, sort_order)
+    seen, offset = [], 0
+    while True:
+        page, total, has_more = catalog.search({}, sort_by, sort_order, limit=25, offset=offset)
+        assert total == len(rows)
+        seen += page
+        if not has_more:
+            break
+        offset += 25
+    assert seen == expected
+
+
+@pytest.mark.parametrize('sort_by', ['name', 'age'])
+@pytest.mark.parametrize('sort_order', ['ASC', 'DESC'])
+def test_keyset_pages_cover_every_match_once(catalog_and_rows, sort_by, sort_order):
+    catalog, rows = catalog_and_rows
+    by_id = {row['pet_id']: row for row in rows}
+    dogs = [row for row in rows if row['category'] == 'Dog']
+    seen, cursor_key = [], None
+    while True:
+        page, total, has_more = catalog.search({'category': 'dog'}, sort_by, sort_order, limit=20, offset=0,
+                                               cursor_key=cursor_key)
+        assert total == len(dogs)
+        seen += page
+        if not has_more:
+            break
+        token = SearchModel.encode_cursor(sort_by, sort_order, by_id[page[-1]], len(seen))
+        cursor_key = SearchModel.decode_cursor(token, sort_by, sort_order)
+    assert seen == expected_order(dogs, sort_by, sort_order)
+
+
+def test_filters_and_prefilters(catalog_and_rows):
+    catalog, rows = catalog_and_rows
+    filters = {'breed': 'lab', 'min_age': '2', 'max_age': '5', 'vaccinated': 'true'}
+    candidates = [row['pet_id'] for row in rows[:150]]
+    page, total, _ = catalog.search(filters, 'age', 'ASC', limit=500, offset=0,
+                                    candidate_ids=candidates, shelter_ids=[0, 1, 2])
+    expected = [row for row in rows[:150] if row['breed'] == 'Labrador' and row['age'] is not None
+                and 2 <= row['age'] <= 5 and row['is_vaccinated'] and row['shelter_id'] in (0, 1, 2)]
+    assert total == len(expected)
+    assert page == expected_order(expected, 'age', 'ASC')
+
+
+def test_writes_show_up_in_the_next_page(catalog_and_rows):
+    catalog, rows = catalog_and_rows
+    catalog.remove(1)
+    catalog.upsert(dict(rows[1], name='aaron'))
+    catalog.upsert(dict(rows[0], pet_id=1000, name='zed'))
+    current = [dict(rows[1], name='aaron'), dict(rows[0], pet_id=1000, name='zed')] + rows[2:]
+    page, total, _ = catalog.search({}, 'name', 'ASC', limit=len(current), offset=0)
+    assert total == len(current)
+    assert page == expected_order(current, 'name', 'ASC')
+    page, _, _ = catalog.search({}, 'name', 'DESC', limit=1, offset=0)
+    assert page == [1000]
+
+
+def test_stats_count_the_python_side(catalog_and_rows):
+    catalog, rows = catalog_and_rows
+    stats = catalog.stats()
+    assert stats['pets'] == len(rows)
+    assert stats['memory_bytes'] > stats['array_bytes']
+    assert stats['bytes_per_pet'] == round(stats['memory_bytes'] / len(rows))
+
+
+def test_memory_per_pet_stays_bounded():
+    # Unique names are the worst case; a million pets has to fit in roughly 100 MB per worker
+    rows = [dict(row, name=f"{row['name']} {row['pet_id']}") for row in make_rows(16000)]
+    catalog = PetCatalog()
+    catalog.build(rows)
+    catalog.upsert(dict(rows[0], pet_id=20000, name='a brand new name'))
+    catalog.remove(2)
+    assert catalog.stats()['bytes_per_pet'] <= 100
@@ -0,0 +1,43 @@
+# tests/test_pet_neighbors.py - similar-pet event handling off the request path (no MySQL server needed)
+import pytest
+
+pytest.importorskip('numpy')
+
+from models import pet_neighbors
+from models.pet_catalog import PetCatalog
+from models.pet_status import PetStatus
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(pet_neighbors, '_pet_listed', lambda pet_id: calls.append(('listed', pet_id)))
+    monkeypatch.setattr(pet_neighbors, '_pet_unlisted',
+                        lambda pet_id, deleted=False: calls.append(('deleted' if deleted else 'unlisted', pet_id)))
+    monkeypatch.setattr(pet_neighbors, '_worker', object())  # No thread: the test drains by hand
+    monkeypatch.setattr(pet_neighbors, '_pending', {})
+    return calls
+
+
+def test_publish_only_queues_and_keeps_the_latest_change(handled):
+    pet_neighbors._on_pet_added(1)
+    pet_neighbors._on_pet_status_changed(2, PetStatus.ADOPTED)
+    pet_neighbors._on_pet_status_changed(1, PetStatus.ADOPTED)
+    pet_neighbors._on_pet_deleted(3)
+    assert handled == []
+    assert pet_neighbors.drain() == 3
+    assert sorted(handled) == [('deleted', 3), ('unlisted', 1), ('unlisted', 2)]
+    assert pet_neighbors.drain() == 0
+
+
+def test_space_is_reused_until_the_catalog_changes(monkeypatch):
+    monkeypatch.setattr(pet_neighbors.geo, 'ensure_built', lambda: type('Geo', (), {'coordinates': lambda self: {}})())
+    catalog = PetCatalog()
+    catalog.build([{'pet_id': pet_id, 'species': 'dog', 'breed': 'pug', 'age': 2, 'shelter_id': 1}
+                   for pet_id in (1, 2, 3)])
+    space = pet_neighbors._space(catalog)
+    assert pet_neighbors._space(catalog) is space
+    catalog.upsert({'pet_id': 4, 'species': 'cat', 'age': 1, 'shelter_id': 2})
+    rebuilt = pet_neighbors._space(catalog)
+    assert rebuilt is not space and rebuilt.pet_ids.tolist() == [1, 2, 3, 4]
+    assert [neighbor for neighbor, _ in rebuilt.top(rebuilt.rows([1]), 2)[0]] == [2, 3]
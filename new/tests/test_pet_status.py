@@ -0,0 +1,20 @@
+# tests/test_pet_status.py - adoption status codes and legacy labels
+import pytest
+
+from models.pet_status import PetStatus
+
+
+@pytest.mark.parametrize('value, code', [
+    (0, PetStatus.AVAILABLE), (1, PetStatus.ADOPTED),
+    ('Adopted', PetStatus.ADOPTED), ('adopted', PetStatus.ADOPTED),
+    ('Not Adopted', PetStatus.AVAILABLE), ('notadopted', PetStatus.AVAILABLE), ('not_adopted', PetStatus.AVAILABLE),
+    ('Available', PetStatus.AVAILABLE),
+])
+def test_known_codes_and_labels(value, code):
+    assert PetStatus.from_label(value) == code
+
+
+@pytest.mark.parametrize('value', [None, '', '  ', True, False, 2, -1, 1.0, 'pending'])
+def test_anything_else_is_rejected(value):
+    with pytest.raises(ValueError):
+        PetStatus.from_label(value)
@@ -0,0 +1,78 @@
+# tests/test_recommendation_batch.py - one batch chunk end to end (no MySQL server needed)
+from models import recommendation_batch
+from models.recommendation_model import RecommendationModel
+
+
+class ChunkCursor:
+    """Streams adopter rows for HISTORY_QUERY, answers POPULAR_QUERY and records every write"""
+
+    def __init__(self, history, popular, log):
+        self.history, self.popular, self.log = history, popular, log
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.log.append((query, params))
+        if query is recommendation_batch.HISTORY_QUERY:
+            self.rows = list(self.history)
+        elif query is recommendation_batch.POPULAR_QUERY:
+            self.rows = [{'pet_id': pet_id, 'applications': count} for pet_id, count in self.popular][:params[-1]]
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+
+    def executemany(self, query, rows):
+        self.log.append((query, list(rows)))
+
+    def close(self):
+        pass
+
+
+class ChunkConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, **_):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def application(user_id, pet_id, breed):
+    return {'user_id': user_id, 'pet_id': pet_id, 'species': 'Dog', 'breed': breed, 'age': 2,
+            'gender': 'Male', 'category': 'Dog', 'shelter_id': 1}
+
+
+def no_history(user_id):
+    return dict.fromkeys(application(user_id, None, None), None) | {'user_id': user_id}
+
+
+def test_every_adopter_gets_a_list(monkeypatch):
+    history = [application(10, 1, 'Beagle'), application(10, 2, 'Pug'), no_history(11), no_history(12)]
+    log = []
+    cursor = ChunkCursor(history, [(7, 40), (8, 30), (9, 20)], log)
+    monkeypatch.setattr(recommendation_batch, 'connect_to_database', lambda: ChunkConnection(cursor))
+    monkeypatch.setattr(recommendation_batch.pet_catalog, 'pet_catalog', None)
+    monkeypatch.setattr(RecommendationModel, '_sql_recommendations', staticmethod(
+        lambda cursor, preferences, applied_ids, limit: [{'pet_id': 5, 'recommendation_score': 90}]))
+
+    users = recommendation_batch.score_chunk(run_id=1, first_user_id=10, last_user_id=19, depth=2)
+
+    assert users == 3
+    written = next(rows for query, rows in log if query is recommendation_batch.INSERT_RECOMMENDATION)
+    assert [row[:4] for row in written] == [(10, 0, 5, 90),
+                                            (11, 0, 7, 40), (11, 1, 8, 30),
+                                            (12, 0, 7, 40), (12, 1, 8, 30)]
+    # The popular list is read once per chunk, not once per cold-start adopter
+    assert sum(query is recommendation_batch.POPULAR_QUERY for query, _ in log) == 1
+    assert log[-1][1] == (1, 10, 3)  # The chunk marker counts every adopter
@@ -0,0 +1,118 @@
+# tests/test_recommendation_model.py - recommendation cache (no MySQL server needed)
+import mysql.connector
+import pytest
+
+from config import Config
+from models import recommendation_model
+from models.recommendation_model import RecommendationModel
+
+
+class FakeCursor:
+    def __init__(self, available):
+        self.available = available
+
+    def execute(self, query, params=()):
+        self.rows = [(pet_id,) for pet_id in params if pet_id in self.available]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, available):
+        self.available = available
+
+    def cursor(self, **_):
+        return FakeCursor(self.available)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def available(monkeypatch):
+    """Pet ids the fake database reports as available"""
+    pets = set(range(1, 41))
+    monkeypatch.setattr(recommendation_model, 'get_db_connection', lambda: FakeConnection(pets))
+    monkeypatch.setattr(Config, 'RECOMMENDATION_CACHE_SIZE', 10)
+    monkeypatch.setattr(Config, 'RECOMMENDATION_CACHE_DEPTH', 24)
+    RecommendationModel._cache.clear()
+    yield pets
+    RecommendationModel._cache.clear()
+
+
+def fake_compute(calls):
+    def compute(user_id, limit=10):
+        calls.append(limit)
+        return {'type': 'personalized', 'pets': [{'pet_id': pet_id} for pet_id in range(1, limit + 1)]}
+    return compute
+
+
+def test_cached_list_drops_pets_adopted_elsewhere(monkeypatch, available):
+    calls = []
+    monkeypatch.setattr(RecommendationModel, 'compute_recommendations', staticmethod(fake_compute(calls)))
+    RecommendationModel.get_recommended_pets(7, limit=10)
+    available.discard(3)  # Adopted through another worker: no event reaches this process
+    result = RecommendationModel.get_recommended_pets(7, limit=10)
+    assert calls == [24]
+    assert [pet['pet_id'] for pet in result['pets']] == [1, 2, 4, 5, 6, 7, 8, 9, 10, 11]
+
+
+def test_cached_list_is_recomputed_when_too_short(monkeypatch, available):
+    calls = []
+    monkeypatch.setattr(RecommendationModel, 'compute_recommendations', staticmethod(fake_compute(calls)))
+    RecommendationModel.get_recommended_pets(7, limit=10)
+    available.difference_update(range(1, 16))
+    RecommendationModel.get_recommended_pets(7, limit=10)
+    assert calls == [24, 24]
+
+
+def test_database_error_serves_the_cached_list(monkeypatch, available):
+    def broken():
+        raise mysql.connector.Error('down')
+
+    calls = []
+    monkeypatch.setattr(RecommendationModel, 'compute_recommendations', staticmethod(fake_compute(calls)))
+    RecommendationModel.get_recommended_pets(7, limit=5)
+    monkeypatch.setattr(recommendation_model, 'get_db_connection', broken)
+    result = RecommendationModel.get_recommended_pets(7, limit=5)
+    assert [pet['pet_id'] for pet in result['pets']] == [1, 2, 3, 4, 5]
+    assert calls == [24]
+
+
+class PrecomputedCursor:
+    """Answers _precomputed from a stored list; any other query means live scoring ran"""
+
+    def __init__(self, stored, available, queries):
+        self.stored, self.available, self.queries = stored, available, queries
+
+    def execute(self, query, params=()):
+        self.queries.append(query)
+        limit = params[-1]
+        self.rows = [{'pet_id': pet_id} for pet_id in self.stored if pet_id in self.available][:limit]
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_batch_depth_survives_adoptions(monkeypatch):
+    # What one batch run stores per user, with one of those pets adopted since
+    stored = list(range(1, Config.RECOMMENDATION_BATCH_DEPTH + 1))
+    available = set(stored) - {5}
+    queries = []
+
+    class Connection:
+        def cursor(self, **_):
+            return PrecomputedCursor(stored, available, queries)
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(recommendation_model, 'get_db_connection', Connection)
+    result = RecommendationModel.compute_recommendations(7, Config.RECOMMENDATION_CACHE_DEPTH)
+    assert len(result['pets']) == Config.RECOMMENDATION_CACHE_DEPTH
+    assert 5 not in [pet['pet_id'] for pet in result['pets']]
+    assert len(queries) == 1
@@ -0,0 +1,212 @@
+# tests/test_search_index.py - in-memory search structures (no MySQL server needed)
+import time
+
+import pytest
+
+from config import Config
+from models import search_index, search_model
+from models.search_index import FuzzyVocabulary, PetSearchIndex, PetSuggestIndex, edit_distance
+from models.search_model import SearchModel
+
+
+def pet(pet_id, name, breed='Mixed', species='Dog', shelter_name='Happy Paws'):
+    return {'pet_id': pet_id, 'name': name, 'breed': breed, 'species': species, 'shelter_name': shelter_name}
+
+
+def test_search_ranks_name_matches_above_shelter_matches():
+    index = PetSearchIndex()
+    index.build([pet(1, 'Rex', shelter_name='Labrador Rescue'), pet(2, 'Labrador Larry', breed='Labrador')])
+    assert [pet_id for pet_id, _ in index.search('labrador')] == [2, 1]
+
+
+def test_search_requires_every_token_and_expands_prefixes():
+    index = PetSearchIndex()
+    index.build([pet(1, 'Bella', breed='Beagle'), pet(2, 'Bella', breed='Poodle'), pet(3, 'Max', breed='Beagle')])
+    assert [pet_id for pet_id, _ in index.search('bel beag')] == [1]
+    assert index.search('bella siamese') == []
+
+
+def test_build_where_sends_small_match_sets_as_ids(monkeypatch):
+    index = PetSearchIndex()
+    index.build([pet(pet_id, f'Buddy {pet_id}') for pet_id in range(1, 51)])
+    monkeypatch.setattr(Config, 'SEARCH_ENGINE', 'index')
+    monkeypatch.setattr(Config, 'SEARCH_INDEX_MAX_SQL_IDS', 100)
+    monkeypatch.setattr(search_index, 'ensure_built', lambda: index)
+
+    where, params, relevance_ids, _ = SearchModel._build_where({'search_text': 'buddy', 'category': 'Dog'})
+    assert sorted(relevance_ids) == list(range(1, 51))
+    assert 'p.pet_id IN' in where and set(range(1, 51)) <= set(params)
+
+
+def test_build_where_uses_word_likes_for_broad_terms(monkeypatch):
+    # A common word must neither be capped (pets would go missing) nor sent as thousands of parameters
+    index = PetSearchIndex()
+    index.build([pet(pet_id, f'Buddy {pet_id}', breed='Labrador') for pet_id in range(1, 2501)])
+    monkeypatch.setattr(Config, 'SEARCH_ENGINE', 'index')
+    monkeypatch.setattr(Config, 'SEARCH_INDEX_MAX_SQL_IDS', 100)
+    monkeypatch.setattr(search_index, 'ensure_built', lambda: index)
+
+    where, params, relevance_ids, _ = SearchModel._build_where({'search_text': 'buddy lab', 'category': 'Dog'})
+    assert len(relevance_ids) == 2500
+    assert 'p.pet_id IN' not in where
+    assert params == ['%buddy%'] * 4 + ['%lab%'] * 4 + ['Dog']
+
+
+class RankedCursor:
+    """Fake database: pets with even ids pass the structured filters"""
+
+    def __init__(self, queries):
+        self.queries = queries
+
+    def execute(self, query, params=()):
+        self.queries.append(len(params))
+        if query.lstrip().startswith('SELECT p.pet_id'):
+            self.rows = [{'pet_id': pet_id} for pet_id in params if pet_id % 2 == 0]
+        else:
+            self.rows = [{'pet_id': pet_id} for pet_id in params]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def test_relevance_page_only_checks_ids_up_to_the_page(monkeypatch):
+    queries = []
+
+    class Connection:
+        def cursor(self, **_):
+            return RankedCursor(queries)
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(search_model, 'get_db_connection', Connection)
+    monkeypatch.setattr(Config, 'SEARCH_INDEX_MAX_SQL_IDS', 10)
+    ranked = list(range(1000, 0, -1))
+    rows, has_more, total = SearchModel._relevance_page({}, 'FROM pets p WHERE 1', [], ranked, 5, 5, 'none')
+    assert [row['pet_id'] for row in rows] == [990, 988, 986, 984, 982]
+    assert has_more and total is None
+    # Three chunks of 10 ids (5 matches each) cover the 11 matches needed, then the page rows by primary key
+    assert queries == [10, 10, 10, 5]
+
+    queries.clear()
+    rows, has_more, total = SearchModel._relevance_page({}, 'FROM pets p WHERE 1', [], [7, 4, 3, 2], 5, 0, 'exact')
+    assert [row['pet_id'] for row in rows] == [4, 2]
+    assert (has_more, total) == (False, 2)
+
+
+def test_ensure_rebuilds_once_stale(monkeypatch):
+    index = PetSearchIndex()
+    loads = []
+
+    def load_rows(*_):
+        loads.append(1)
+        return [pet(len(loads), f'Pet {len(loads)}')]
+
+    monkeypatch.setattr(search_index, '_load_rows', load_rows)
+    monkeypatch.setattr(Config, 'SEARCH_INDEX_REFRESH_SECONDS', 300)
+    announce = lambda index, rows: 'built'
+
+    search_index._ensure(index, announce)
+    search_index._ensure(index, announce)
+    assert len(loads) == 1
+
+    index.built_at = time.monotonic() - 301
+    search_index._ensure(index, announce)
+    assert len(loads) == 2
+    assert [pet_id for pet_id, _ in index.search('pet')] == [2]
+
+
+def test_failed_refresh_keeps_the_previous_index(monkeypatch):
+    index = PetSearchIndex()
+    index.build([pet(1, 'Rex')])
+    index.built_at = time.monotonic() - Config.SEARCH_INDEX_REFRESH_SECONDS - 1
+
+    def load_rows(*_):
+        raise RuntimeError('database is down')
+
+    monkeypatch.setattr(search_index, '_load_rows', load_rows)
+    assert search_index._ensure(index, lambda index, rows: 'built') is index
+    assert [pet_id for pet_id, _ in index.search('rex')] == [1]
+
+
+def test_first_build_failure_propagates(monkeypatch):
+    def load_rows(*_):
+        raise RuntimeError('database is down')
+
+    monkeypatch.setattr(search_index, '_load_rows', load_rows)
+    with pytest.raises(RuntimeError):
+        search_index._ensure(PetSearchIndex(), lambda index, rows: 'built')
+
+
+def texts(suggestions):
+    return [(item['text'], item['type'], item['count']) for item in suggestions]
+
+
+def test_suggest_ranks_by_pet_count_and_matches_later_words():
+    trie = PetSuggestIndex(top_k=5)
+    trie.build([pet(1, 'Shep', breed='German Shepherd'), pet(2, 'Sheba', breed='German Shepherd'),
+                pet(3, 'Shelby', breed='Poodle')])
+    assert texts(trie.suggest('she')) == [('German Shepherd', 'breed', 2), ('Sheba', 'name', 1),
+                                          ('Shelby', 'name', 1), ('Shep', 'name', 1)]
+    assert ('German Shepherd', 'breed', 2) in texts(trie.suggest('shep'))
+    assert ('German Shepherd', 'breed', 2) in texts(trie.suggest('GER'))
+    assert trie.suggest('xyz') == []
+    assert trie.suggest('   ') == []
+
+
+def test_suggest_respects_top_k_and_limit():
+    trie = PetSuggestIndex(top_k=3)
+    trie.build([pet(pet_id, f'Bo{pet_id}', breed='', species='', shelter_name='') for pet_id in range(1, 10)])
+    assert len(trie.suggest('bo')) == 3
+    assert len(trie.suggest('bo', limit=2)) == 2
+    assert len(trie.suggest('bo', limit=50)) == 3
+
+
+def test_suggest_follows_adds_and_removals():
+    trie = PetSuggestIndex(top_k=5)
+    trie.build([pet(1, 'Rex', breed='Beagle'), pet(2, 'Max', breed='Beagle')])
+    assert ('Beagle', 'breed', 2) in texts(trie.suggest('bea'))
+
+    trie.remove(1)
+    assert ('Beagle', 'breed', 1) in texts(trie.suggest('bea'))
+    trie.add(pet(2, 'Max', breed='Boxer'))  # Edited breed
+    assert trie.suggest('bea') == []
+    assert ('Boxer', 'breed', 1) in texts(trie.suggest('box'))
+    assert trie.stats() == {'built': True, 'terms': 4, 'pets': 1}
+
+
+def test_edit_distance_counts_transpositions_once_and_stops_at_limit():
+    assert edit_distance('labrador', 'labrdaor', 2) == 1
+    assert edit_distance('beagle', 'bagel', 2) == 2
+    assert edit_distance('poodle', 'dachshund', 2) == 3
+
+
+def test_fuzzy_corrects_typos_and_leaves_known_words():
+    vocabulary = FuzzyVocabulary()
+    vocabulary.build([pet(1, 'Rex', breed='Labrador'), pet(2, 'Bella', breed='Beagle')])
+    assert vocabulary.correct('labrdor') == 'labrador'
+    assert vocabulary.correct('labrador') is None
+    assert vocabulary.correct('labr') is None      # Still typing
+    assert vocabulary.correct('bgle') is None      # Too far from anything
+    assert vocabulary.correct('rxe') is None       # Below SEARCH_FUZZY_MIN_LENGTH
+    assert vocabulary.correct_text('Bela labrdor') == ('bella labrador', [('bela', 'bella'), ('labrdor', 'labrador')])
+    assert vocabulary.correct_text('Bella Rex') == ('Bella Rex', [])
+
+
+def test_fuzzy_prefers_the_more_common_word():
+    vocabulary = FuzzyVocabulary()
+    vocabulary.build([pet(1, 'Milo', breed='Boxer'), pet(2, 'Luna', breed='Boxer'), pet(3, 'Bolt', breed='Boxel')])
+    assert vocabulary.correct('boxet') == 'boxer'
+
+
+def test_fuzzy_follows_adds_and_removals():
+    vocabulary = FuzzyVocabulary()
+    vocabulary.build([pet(1, 'Rex', breed='Labrador')])
+    vocabulary.remove(1)
+    assert vocabulary.correct('labrdor') is None
+    vocabulary.add(pet(2, 'Rex', breed='Dalmatian'))
+    assert vocabulary.correct('dalmation') == 'dalmatian'
+    assert vocabulary.stats()['words'] == 5  # rex, dalmatian, dog, happy, paws
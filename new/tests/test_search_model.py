@@ -0,0 +1,66 @@
+# tests/test_search_model.py - search cursors and keyset paging (no MySQL server needed)
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from models.search_model import SearchModel, SearchCursorError
+
+
+def test_cursor_round_trip():
+    row = {'pet_id': 42, 'age': 3}
+    token = SearchModel.encode_cursor('age', 'DESC', row, position=20)
+    assert '=' not in token
+    assert SearchModel.decode_cursor(token, 'age', 'DESC') == {'s': 'age', 'o': 'DESC', 'k': 3, 'id': 42}
+
+
+def test_cursor_keeps_dates_and_nulls():
+    created = datetime(2024, 5, 1, 9, 30)
+    token = SearchModel.encode_cursor('created_at', 'ASC', {'pet_id': 7, 'created_at': created}, position=0)
+    assert SearchModel.decode_cursor(token, 'created_at', 'ASC')['k'] == '2024-05-01 09:30:00'
+
+    token = SearchModel.encode_cursor('age', 'ASC', {'pet_id': 8, 'age': None}, position=0)
+    assert SearchModel.decode_cursor(token, 'age', 'ASC')['k'] is None
+
+
+def test_positional_cursor_stores_the_offset():
+    token = SearchModel.encode_cursor('relevance', 'DESC', {'pet_id': 1}, position=40)
+    assert SearchModel.decode_cursor(token, 'relevance', 'DESC')['pos'] == 40
+
+
+@pytest.mark.parametrize('token', ['not base64!', 'e30', 'W10'])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(SearchCursorError):
+        SearchModel.decode_cursor(token, 'age', 'ASC')
+
+
+def test_cursor_for_another_ordering_is_rejected():
+    token = SearchModel.encode_cursor('age', 'ASC', {'pet_id': 1, 'age': 2}, position=0)
+    with pytest.raises(SearchCursorError):
+        SearchModel.decode_cursor(token, 'age', 'DESC')
+
+
+@pytest.mark.parametrize('sort_order', ['ASC', 'DESC'])
+def test_keyset_pages_cover_every_row_once(sort_order):
+    # SQLite orders NULLs like MySQL (first ascending, last descending), so the fragments run unchanged
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE pets (pet_id INTEGER PRIMARY KEY, age INTEGER)')
+    ages = [None, 2, 5, None, 2, 7, None, 5, 1, 2, 9, None]
+    db.executemany('INSERT INTO pets VALUES (?, ?)', list(enumerate(ages, start=1)))
+    order = f' ORDER BY p.age {sort_order}, p.pet_id {sort_order}'
+    expected = [row[0] for row in db.execute('SELECT p.pet_id FROM pets p' + order)]
+
+    seen, cursor_key = [], None
+    while True:
+        query, params = 'SELECT p.pet_id, p.age FROM pets p', []
+        if cursor_key:
+            condition, params = SearchModel._keyset_condition('age', sort_order, cursor_key)
+            query += ' WHERE ' + condition.replace('%s', '?')
+        page = db.execute(query + order + ' LIMIT 3', params).fetchall()
+        if not page:
+            break
+        seen.extend(pet_id for pet_id, _ in page)
+        token = SearchModel.encode_cursor('age', sort_order, {'pet_id': page[-1][0], 'age': page[-1][1]}, len(seen))
+        cursor_key = SearchModel.decode_cursor(token, 'age', sort_order)
+
+    assert seen == expected
@@ -0,0 +1,126 @@
+# tests/test_sms_dispatcher.py - SMS rate limiting, retries and concurrency (no network needed)
+import threading
+import time
+
+import pytest
+
+from config import Config
+from models import sms_dispatcher
+from models.sms_dispatcher import SMSDeliveryError, SMSDispatcher, TokenBucket
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.sleep in the dispatcher module; sleeping advances it"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(sms_dispatcher.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(sms_dispatcher.time, 'sleep', fake.sleep)
+    return fake
+
+
+def test_bucket_allows_a_burst_then_paces_to_the_rate(clock):
+    # Rate 4/s keeps the fake clock's arithmetic exact (quarter seconds)
+    bucket = TokenBucket(rate=4, capacity=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert [bucket.acquire() for _ in range(5)] == [0.25] * 5
+    assert clock.now == 101.25
+
+
+def test_bucket_refills_while_idle_but_not_past_capacity(clock):
+    bucket = TokenBucket(rate=4, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    clock.now += 60
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == 0.25
+
+
+class FakeResponse:
+    def __init__(self, status, sid=None, retry_after=None):
+        self.status_code = status
+        self.ok = status < 400
+        self.text = '' if self.ok else 'error'
+        self.headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+        self._sid = sid
+
+    def json(self):
+        return {'sid': self._sid}
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def post(self, *args, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def dispatcher_with(responses):
+    dispatcher = SMSDispatcher(concurrency=2, rate_per_second=1000, burst=1000)
+    session = FakeSession(responses)
+    dispatcher._http = lambda: session
+    return dispatcher, session
+
+
+def test_transient_failures_are_retried_with_retry_after(monkeypatch, clock):
+    monkeypatch.setattr(Config, 'SMS_MAX_ATTEMPTS', 3)
+    dispatcher, session = dispatcher_with([FakeResponse(429, retry_after=2), FakeResponse(503), FakeResponse(201, 'SM1')])
+    assert dispatcher.send('+15550001', 'hi') == 'SM1'
+    assert session.calls == 3
+    assert clock.slept[0] == 2
+    stats = dispatcher.stats()
+    assert (stats['sent'], stats['retries'], stats['statuses']) == (1, 2, {'429': 1, '503': 1, '201': 1})
+
+
+def test_client_errors_fail_at_once(monkeypatch, clock):
+    dispatcher, session = dispatcher_with([FakeResponse(400)])
+    with pytest.raises(SMSDeliveryError) as raised:
+        dispatcher.send('+15550001', 'hi')
+    assert raised.value.status == 400
+    assert session.calls == 1 and dispatcher.stats()['failed'] == 1
+
+
+def test_backoff_gives_the_slot_back(monkeypatch):
+    # One slot: while the first message waits to retry, the second one must get through
+    monkeypatch.setattr(Config, 'SMS_MAX_ATTEMPTS', 2)
+    monkeypatch.setattr(sms_dispatcher, 'retry_delay', lambda attempt, retry_after=None: 0.3)
+    dispatcher = SMSDispatcher(concurrency=1, rate_per_second=1000, burst=1000)
+    finished = {}
+
+    class Session:
+        attempts = {}
+
+        def post(self, url, data, timeout):
+            to = data['To']
+            self.attempts[to] = self.attempts.get(to, 0) + 1
+            return FakeResponse(503) if to == 'slow' and self.attempts[to] == 1 else FakeResponse(201, to)
+
+    session = Session()
+    dispatcher._http = lambda: session
+
+    def send(to):
+        dispatcher.send(to, 'hi')
+        finished[to] = time.monotonic()
+
+    first = threading.Thread(target=send, args=('slow',))
+    first.start()
+    time.sleep(0.05)  # 'slow' has had its 503 and is backing off
+    send('fast')
+    first.join()
+    assert finished['fast'] < finished['slow']
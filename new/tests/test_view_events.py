@@ -0,0 +1,34 @@
+# tests/test_view_events.py - view buffering and deduplication (no MySQL server needed)
+import pytest
+
+from config import Config
+from models import view_events
+from models.view_events import ViewIngest
+
+
+@pytest.fixture
+def ingest(monkeypatch):
+    monkeypatch.setattr(view_events.pet_popularity, 'record_view', lambda pet_id: None)
+    monkeypatch.setattr(Config, 'VIEW_EVENTS_DEDUPE_MAX_KEYS', 3)
+    return ViewIngest(capacity=100, batch_size=50, dedupe_seconds=60)
+
+
+def test_repeat_views_inside_the_window_count_once(ingest):
+    assert ingest.record(1, user_id=7, now=0) == 'accepted'
+    assert ingest.record(1, user_id=7, now=59) == 'duplicate'
+    assert ingest.record(1, viewer='cookie', now=59) == 'accepted'
+    assert ingest.record(1, user_id=7, now=61) == 'accepted'
+
+
+def test_oldest_keys_are_evicted_first(ingest):
+    for pet_id in (1, 2, 3, 4):
+        ingest.record(pet_id, user_id=7, now=pet_id)
+    assert seen_pets(ingest) == [2, 3, 4]    # Over capacity: pet 1, the oldest, went
+    ingest.record(5, user_id=7, now=63)      # Pet 2 has left the window
+    assert seen_pets(ingest) == [3, 4, 5]
+    ingest.record(3, user_id=7, now=64)      # Accepted again, so it moves to the back
+    assert seen_pets(ingest) == [4, 5, 3]
+
+
+def seen_pets(ingest):
+    return [pet_id for _, pet_id in ingest._seen]